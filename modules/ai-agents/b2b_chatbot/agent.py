@@ -16,7 +16,15 @@ from agno.models.google import Gemini
 from agno.tools.reasoning import ReasoningTools
 
 from config import get_config
-from shared import create_knowledge_base
+from shared import RateLimitedModel, create_knowledge_base
+
+
+class RateLimitedOpenAIChat(RateLimitedModel, OpenAIChat):
+    """OpenAIChat whose requests go through the shared rate limiter"""
+
+
+class RateLimitedGemini(RateLimitedModel, Gemini):
+    """Gemini whose requests go through the shared rate limiter"""
 
 
 class B2BChatbotAgent:
@@ -58,14 +66,15 @@ class B2BChatbotAgent:
             for url in knowledge_sources:
                 self.knowledge.add_content(url=url)
         
-        # Select model
+        # Select model; chat traffic is interactive, so each model request
+        # goes ahead of bulk indexing calls queued on the same model
         if self.use_gemini and self.config.has_google:
-            model = Gemini(
+            model = RateLimitedGemini(
                 id=self.config.gemini_model,
                 api_key=self.config.google_api_key
             )
         else:
-            model = OpenAIChat(
+            model = RateLimitedOpenAIChat(
                 id=self.config.openai_model,
                 api_key=self.config.openai_api_key
             )
@@ -145,6 +154,22 @@ class B2BChatbotAgent:
             response = self.agent.run(message, stream=False)
             return response.content
     
+    async def achat(self, message: str) -> str:
+        """
+        Async variant of chat() (non-streaming) for the event loop.
+        
+        Args:
+            message: User message
+            
+        Returns:
+            Response string
+        """
+        if not self._initialized:
+            raise RuntimeError("Agent not initialized. Call initialize() first.")
+        
+        response = await self.agent.arun(message, stream=False)
+        return response.content
+    
     def get_response(self, message: str) -> str:
         """
         Get a simple string response (non-streaming).
@@ -50,7 +50,7 @@ async def chat(request: ChatRequest) -> ChatResponse:
     """
     try:
         chatbot = get_chatbot()
-        response = chatbot.get_response(request.message)
+        response = await chatbot.achat(request.message)
         return ChatResponse(
             response=response,
             session_id=request.session_id
@@ -5,7 +5,6 @@ Loads environment variables and provides shared configuration for all AI agents.
 import os
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from typing import Optional
 
 # Load environment variables
 load_dotenv()
@@ -18,6 +17,23 @@ class AIConfig(BaseModel):
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4o")
     openai_embedding_model: str = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+    # Shortened text-embedding-3 outputs (e.g. 256 or 512; 0 = model default).
+    # With PRODUCT_MATRYOSHKA_RERANK the product table also keeps the full
+    # vectors and search results are reranked with them
+    knowledge_embedding_dimensions: int = int(os.getenv("KNOWLEDGE_EMBEDDING_DIMENSIONS", "0"))
+    product_embedding_dimensions: int = int(os.getenv("PRODUCT_EMBEDDING_DIMENSIONS", "0"))
+    product_matryoshka_rerank: bool = os.getenv("PRODUCT_MATRYOSHKA_RERANK", "false").lower() == "true"
+    
+    # Embedding backend (see shared/embedder_registry.py): "openai", "onnx", or
+    # "hashing" (deterministic, offline; for benchmarks and tests)
+    embedding_provider: str = os.getenv("EMBEDDING_PROVIDER", "openai")
+    # Local ONNX backend: directory holding model.onnx and tokenizer.json
+    local_embedding_model_path: str = os.getenv("LOCAL_EMBEDDING_MODEL_PATH", "./models/embedding")
+    local_embedding_batch_size: int = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+    local_embedding_threads: int = int(os.getenv("LOCAL_EMBEDDING_THREADS", "0"))  # 0 = all cores
+    local_embedding_max_length: int = int(os.getenv("LOCAL_EMBEDDING_MAX_LENGTH", "512"))
+    local_embedding_pooling: str = os.getenv("LOCAL_EMBEDDING_POOLING", "mean")
+    hashing_embedding_dimensions: int = int(os.getenv("HASHING_EMBEDDING_DIMENSIONS", "256"))
     
     # Google Gemini
     google_api_key: str = os.getenv("GOOGLE_API_KEY", "")
@@ -28,6 +44,59 @@ class AIConfig(BaseModel):
     
     # Vector Database
     lancedb_uri: str = os.getenv("LANCEDB_URI", "./data/lancedb")
+    vector_index_type: str = os.getenv("VECTOR_INDEX_TYPE", "IVF_PQ")
+    vector_index_min_rows: int = int(os.getenv("VECTOR_INDEX_MIN_ROWS", "10000"))
+    vector_index_rebuild_fraction: float = float(os.getenv("VECTOR_INDEX_REBUILD_FRACTION", "0.1"))
+    # First-pass vector quantization ("none", "int8" or "binary"); the top
+    # VECTOR_RESCORE_FACTOR x limit candidates are rescored with full vectors
+    vector_quantization: str = os.getenv("VECTOR_QUANTIZATION", "none")
+    vector_rescore_factor: int = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))
+    
+    # Long products are embedded as several chunks of up to PRODUCT_CHUNK_TOKENS
+    # (0 disables chunking); search over-fetches PRODUCT_CHUNK_OVERFETCH times the
+    # limit and scores products by their best chunk ("max") or best m ("top_m")
+    product_chunk_tokens: int = int(os.getenv("PRODUCT_CHUNK_TOKENS", "512"))
+    product_chunk_overlap: int = int(os.getenv("PRODUCT_CHUNK_OVERLAP", "64"))
+    product_max_chunks: int = int(os.getenv("PRODUCT_MAX_CHUNKS", "8"))
+    product_chunk_overfetch: int = int(os.getenv("PRODUCT_CHUNK_OVERFETCH", "4"))
+    product_chunk_aggregation: str = os.getenv("PRODUCT_CHUNK_AGGREGATION", "max")
+    product_chunk_top_m: int = int(os.getenv("PRODUCT_CHUNK_TOP_M", "2"))
+    # Per-query-type field weights, JSON e.g. {"sku": {"name": 0.8, "specs": 0.1, "description": 0.1}}
+    product_field_weights: str = os.getenv("PRODUCT_FIELD_WEIGHTS", "")
+    
+    # Search type per knowledge base: "vector", "keyword" or "hybrid" (BM25 + vector)
+    knowledge_search_type: str = os.getenv("KNOWLEDGE_SEARCH_TYPE", "vector")
+    product_search_type: str = os.getenv("PRODUCT_SEARCH_TYPE", "hybrid")
+    
+    # Embedding cache (shared by all knowledge bases and the product indexer)
+    embedding_cache_enabled: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache.sqlite")
+    embedding_cache_max_mb: int = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "2048"))
+    embedding_max_retries: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "3"))
+    
+    # Embedding request limits (OpenAI: 8191 tokens per input, 300k tokens and
+    # 2048 inputs per request); oversized texts are "truncate"d or "split"
+    embedding_max_input_tokens: int = int(os.getenv("EMBEDDING_MAX_INPUT_TOKENS", "8191"))
+    embedding_max_request_tokens: int = int(os.getenv("EMBEDDING_MAX_REQUEST_TOKENS", "300000"))
+    embedding_max_request_items: int = int(os.getenv("EMBEDDING_MAX_REQUEST_ITEMS", "2048"))
+    embedding_oversize_policy: str = os.getenv("EMBEDDING_OVERSIZE_POLICY", "truncate")
+    
+    # Client-side provider rate limits; RATE_LIMITS is a JSON object mapping
+    # model ids to {"rpm": ..., "tpm": ...}, other models use the defaults
+    rate_limit_enabled: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    rate_limits: str = os.getenv("RATE_LIMITS", "{}")
+    rate_limit_default_rpm: int = int(os.getenv("RATE_LIMIT_DEFAULT_RPM", "3000"))
+    rate_limit_default_tpm: int = int(os.getenv("RATE_LIMIT_DEFAULT_TPM", "1000000"))
+    rate_limit_interactive_reserve: float = float(os.getenv("RATE_LIMIT_INTERACTIVE_RESERVE", "0.2"))
+    # Completion tokens reserved per chat call until its actual usage is known
+    rate_limit_completion_tokens: int = int(os.getenv("RATE_LIMIT_COMPLETION_TOKENS", "1024"))
+    
+    # In-process cache of search query embeddings
+    query_cache_max_entries: int = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "10000"))
+    query_cache_ttl_seconds: float = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+    
+    # Progress journal of product indexing runs (for resume)
+    indexing_journal_path: str = os.getenv("INDEXING_JOURNAL_PATH", "./data/indexing_journal.sqlite")
     
     # MeiliSearch (for product search)
     meilisearch_host: str = os.getenv("MEILISEARCH_HOST", "http://localhost:7700")
@@ -39,6 +108,7 @@ class AIConfig(BaseModel):
     db_name: str = os.getenv("DB_NAME", "cypher_erp")
     db_user: str = os.getenv("DB_USER", "cypher_user")
     db_password: str = os.getenv("DB_PASSWORD", "")
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "4"))
     
     @property
     def has_openai(self) -> bool:
@@ -1,10 +1,15 @@
 """
 Main AI Agents API Application
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from b2b_chatbot.api import router as chatbot_router
 
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+except ImportError:  # optional dependency
+    generate_latest = None
+
 app = FastAPI(
     title="Cypher ERP AI Agents",
     description="AI-powered services for Cypher ERP",
@@ -26,3 +31,10 @@ app.include_router(chatbot_router)
 @app.get("/")
 async def root():
     return {"message": "Cypher AI Agents API is running"}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics (product indexing instrumentation)"""
+    if generate_latest is None:
+        return Response("prometheus_client is not installed\n", status_code=404)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
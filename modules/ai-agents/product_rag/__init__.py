@@ -1,11 +1,21 @@
 """Product RAG module"""
 from .indexer import ProductIndexer, ProductDocument, create_product_indexer
+from .filters import ProductFilters
+from .checkpoint import IndexingJournal, IndexingRun
+from .vector_index import VectorIndexPolicy
 from .search_agent import ProductSearchAgent, create_search_agent
+from .synthetic import generate_catalog, generate_queries
 
 __all__ = [
     "ProductIndexer",
     "ProductDocument", 
     "create_product_indexer",
+    "ProductFilters",
+    "IndexingJournal",
+    "IndexingRun",
+    "VectorIndexPolicy",
     "ProductSearchAgent",
     "create_search_agent",
+    "generate_catalog",
+    "generate_queries",
 ]
@@ -0,0 +1,449 @@
+"""
+Product Catalog RAG - Benchmarks
+
+Measures the indexing and search hot paths on synthetic catalogs with the
+deterministic hashing embedder (no API keys or network needed):
+
+- index_products throughput (products/sec) and peak RSS while indexing
+- ProductIndexer.search latency p50/p95/p99, unfiltered and filtered,
+  by brute force and through the ANN index, plus the ANN build time
+
+Each catalog size runs in its own process, so peak RSS and caches of one
+size do not leak into the next, and every search variant is timed
+--repeats times and summarised by the median of the runs.
+
+Results are written as JSON and compared with a stored baseline; the run
+exits non-zero when a tracked metric regressed by more than the allowed
+percentage (latencies must also have moved by more than a noise floor in
+milliseconds), so it can gate commits. Baselines are machine specific:
+record one (--update-baseline) on the machine that runs the comparison.
+
+Usage (from modules/ai-agents):
+    python -m product_rag.benchmark --sizes 10000,100000 --output results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import get_config
+from .filters import ProductFilters
+from .indexer import ProductIndexer
+from .synthetic import CATEGORIES, generate_catalog, generate_queries
+from .vector_index import MIN_TRAINING_ROWS, VectorIndexPolicy
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+
+# Latency percentiles reported per search variant
+PERCENTILES = (50, 95, 99)
+
+# Latency changes below this many milliseconds are never regressions
+DEFAULT_MIN_CHANGE_MS = 2.0
+
+# p99 of a few hundred queries rests on a handful of samples and moved by
+# up to 25% between identical runs, so it gets its own, wider allowance
+TAIL_METRIC_SUFFIX = ".p99_ms"
+DEFAULT_MAX_TAIL_REGRESSION = 50.0
+
+
+class PeakRss:
+    """Context manager sampling the process RSS in a thread and keeping the peak"""
+    
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+    
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            self._stop.wait(self.interval)
+    
+    def __enter__(self) -> "PeakRss":
+        self.peak = _rss_bytes()
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    """Mean and nearest-rank percentiles of latencies, in milliseconds"""
+    if not seconds:
+        return {}
+    ordered = sorted(seconds)
+    summary = {"mean_ms": 1000 * sum(ordered) / len(ordered)}
+    for p in PERCENTILES:
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+        summary[f"p{p}_ms"] = 1000 * ordered[index]
+    return summary
+
+
+def median_summary(summaries: List[Dict[str, float]]) -> Dict[str, float]:
+    """Per-key median of repeated latency summaries"""
+    if not summaries:
+        return {}
+    return {key: statistics.median(summary[key] for summary in summaries) for key in summaries[0]}
+
+
+def _time_searches(
+    indexer: ProductIndexer,
+    queries: List[str],
+    filters: Optional[List[ProductFilters]] = None,
+    repeats: int = 3,
+    warmup: int = 5
+) -> Dict[str, float]:
+    """Median over `repeats` runs of the search latency summary of a query set"""
+    for query in queries[:warmup]:
+        indexer.search(query, limit=10, min_score=0.0)
+    
+    summaries = []
+    for _ in range(max(repeats, 1)):
+        latencies = []
+        for i, query in enumerate(queries):
+            query_filters = filters[i % len(filters)] if filters else None
+            start = time.perf_counter()
+            indexer.search(query, limit=10, min_score=0.0, filters=query_filters)
+            latencies.append(time.perf_counter() - start)
+        summaries.append(latency_summary(latencies))
+    return median_summary(summaries)
+
+
+def benchmark_size(
+    size: int,
+    queries: int,
+    seed: int,
+    batch_size: int,
+    table_name: str,
+    repeats: int = 3
+) -> Dict[str, Any]:
+    """
+    Index a synthetic catalog of `size` products and time its searches.
+    
+    The ANN index is left out of the indexing run (brute-force searches
+    first), then built explicitly and the searches repeated. Uses the
+    current configuration (see _run_size for the benchmark's own).
+    
+    Returns:
+        Indexing, ANN build and search measurements
+    """
+    config = get_config()
+    indexer = ProductIndexer(
+        table_name=table_name,
+        search_type="vector",
+        index_policy=VectorIndexPolicy(index_type=config.vector_index_type, min_rows=sys.maxsize),
+    )
+    indexer.initialize()
+    
+    with PeakRss() as rss:
+        start = time.perf_counter()
+        stats = indexer.index_products(generate_catalog(size, seed=seed), batch_size=batch_size)
+        wall_seconds = time.perf_counter() - start
+    
+    query_set = generate_queries(queries, size, seed=seed)
+    filters = [
+        ProductFilters(category=category["category"], in_stock_only=True)
+        for category in CATEGORIES
+    ]
+    result: Dict[str, Any] = {
+        "index": {
+            "products": stats["indexed"],
+            "errors": stats["errors"],
+            "duration_seconds": stats["duration_seconds"],
+            "wall_seconds": wall_seconds,
+            "products_per_second": stats["products_per_second"],
+            "peak_rss_mb": rss.peak / 2**20,
+            "stages": {
+                stage: summary["total"] for stage, summary in stats["stages"].items()
+            },
+        },
+        "search": {
+            "brute_force": {
+                "unfiltered": _time_searches(indexer, query_set, repeats=repeats),
+                "filtered": _time_searches(indexer, query_set, filters, repeats=repeats),
+            },
+        },
+    }
+    
+    if size >= MIN_TRAINING_ROWS:
+        indexer.index_policy = VectorIndexPolicy(
+            index_type=config.vector_index_type,
+            quantization=config.vector_quantization,
+            min_rows=MIN_TRAINING_ROWS,
+        )
+        start = time.perf_counter()
+        indexer.ensure_vector_index(force=True)
+        result["ann_build_seconds"] = time.perf_counter() - start
+        result["search"]["ann"] = {
+            "unfiltered": _time_searches(indexer, query_set, repeats=repeats),
+            "filtered": _time_searches(indexer, query_set, filters, repeats=repeats),
+        }
+    return result
+
+
+def _run_size(
+    size: int,
+    queries: int,
+    seed: int,
+    batch_size: int,
+    repeats: int,
+    workdir: str
+) -> Dict[str, Any]:
+    """
+    Benchmark one catalog size with the hashing embedder.
+    
+    Runs in a child process of run_benchmarks, so the configuration
+    changes below never reach the caller.
+    """
+    config = get_config()
+    config.embedding_provider = "hashing"
+    config.embedding_cache_enabled = False
+    config.lancedb_uri = workdir
+    config.indexing_journal_path = os.path.join(workdir, f"indexing_journal_{size}.sqlite")
+    return benchmark_size(
+        size, queries, seed, batch_size, table_name=f"bench_{size}", repeats=repeats
+    )
+
+
+def run_benchmarks(
+    sizes: List[int],
+    queries: int = 200,
+    seed: int = 42,
+    batch_size: int = 1000,
+    uri: Optional[str] = None,
+    repeats: int = 3
+) -> Dict[str, Any]:
+    """
+    Run the benchmark suite with the hashing embedder.
+    
+    Every size is benchmarked in a fresh process; the caller's
+    configuration is left untouched.
+    
+    Args:
+        sizes: Catalog sizes
+        queries: Search queries timed per variant
+        seed: Catalog seed
+        batch_size: Products per indexing batch
+        uri: LanceDB directory (a temporary one, removed afterwards, if None)
+        repeats: Timed runs per search variant (the median is reported)
+        
+    Returns:
+        Machine-readable results
+    """
+    config = get_config()
+    workdir = uri or tempfile.mkdtemp(prefix="product_rag_bench_")
+    context = multiprocessing.get_context("spawn")
+    
+    try:
+        results = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(),
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "seed": seed,
+                "queries": queries,
+                "repeats": repeats,
+                "batch_size": batch_size,
+                "embedding_dimensions": config.hashing_embedding_dimensions,
+                "vector_index_type": config.vector_index_type,
+                "vector_quantization": config.vector_quantization,
+            },
+            "sizes": {},
+        }
+        for size in sizes:
+            print(f"Benchmarking {size} products...")
+            with context.Pool(processes=1) as pool:
+                results["sizes"][str(size)] = pool.apply(
+                    _run_size, (size, queries, seed, batch_size, repeats, workdir)
+                )
+        return results
+    finally:
+        if uri is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def tracked_metrics(results: Dict[str, Any]) -> Dict[str, tuple]:
+    """
+    Metrics compared against the baseline.
+    
+    Returns:
+        Metric name → (value, higher_is_better)
+    """
+    metrics = {}
+    for size, result in results["sizes"].items():
+        index = result["index"]
+        metrics[f"{size}.index.products_per_second"] = (index["products_per_second"], True)
+        metrics[f"{size}.index.peak_rss_mb"] = (index["peak_rss_mb"], False)
+        for mode, variants in result["search"].items():
+            for variant, summary in variants.items():
+                for p in PERCENTILES:
+                    key = f"p{p}_ms"
+                    if key in summary:
+                        metrics[f"{size}.search.{mode}.{variant}.{key}"] = (summary[key], False)
+    return metrics
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    max_regression: float,
+    min_change_ms: float = DEFAULT_MIN_CHANGE_MS,
+    max_tail_regression: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Find metrics that regressed against the baseline.
+    
+    Args:
+        results: Current results
+        baseline: Baseline results
+        max_regression: Allowed regression in percent
+        min_change_ms: Noise floor of latency metrics: slower by less than
+            this many milliseconds is never a regression
+        max_tail_regression: Allowed regression of p99 latencies in percent
+            (max_regression when None)
+        
+    Returns:
+        One entry per regressed metric (metrics missing from either side
+        are ignored)
+    """
+    current = tracked_metrics(results)
+    regressions = []
+    for name, (base_value, higher_is_better) in tracked_metrics(baseline).items():
+        if name not in current or not base_value:
+            continue
+        value = current[name][0]
+        change = 100.0 * (value - base_value) / base_value
+        worse = -change if higher_is_better else change
+        if name.endswith("_ms") and value - base_value < min_change_ms:
+            continue
+        allowed = max_regression
+        if max_tail_regression is not None and name.endswith(TAIL_METRIC_SUFFIX):
+            allowed = max_tail_regression
+        if worse > allowed:
+            regressions.append({
+                "metric": name,
+                "baseline": base_value,
+                "current": value,
+                "change_percent": change,
+            })
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    """Current git commit, if run from a checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit code"""
+    parser = argparse.ArgumentParser(description="Benchmark product_rag indexing and search")
+    parser.add_argument("--sizes", default="10000,100000",
+                        help="Comma-separated catalog sizes")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="Queries timed per search variant")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="Timed runs per search variant (the median is reported)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--uri", default=None,
+                        help="LanceDB directory to keep (temporary by default)")
+    parser.add_argument("--output", default="product_rag_benchmark.json",
+                        help="Where to write the results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="Baseline results to compare with")
+    parser.add_argument("--max-regression", type=float,
+                        default=float(os.getenv("BENCHMARK_MAX_REGRESSION", "10")),
+                        help="Allowed regression per metric, in percent")
+    parser.add_argument("--max-tail-regression", type=float,
+                        default=float(os.getenv("BENCHMARK_MAX_TAIL_REGRESSION",
+                                                str(DEFAULT_MAX_TAIL_REGRESSION))),
+                        help="Allowed regression of p99 latencies, in percent")
+    parser.add_argument("--min-change-ms", type=float,
+                        default=float(os.getenv("BENCHMARK_MIN_CHANGE_MS", str(DEFAULT_MIN_CHANGE_MS))),
+                        help="Latency noise floor: smaller slowdowns never fail the gate")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store the results as the new baseline")
+    args = parser.parse_args(argv)
+    
+    results = run_benchmarks(
+        sizes=[int(size) for size in args.sizes.split(",")],
+        queries=args.queries,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        uri=args.uri,
+        repeats=args.repeats,
+    )
+    
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(
+            results, baseline, args.max_regression, args.min_change_ms, args.max_tail_regression
+        )
+        results["comparison"] = {
+            "baseline": args.baseline,
+            "max_regression_percent": args.max_regression,
+            "max_tail_regression_percent": args.max_tail_regression,
+            "min_change_ms": args.min_change_ms,
+            "regressions": regressions,
+        }
+        machine = ("platform", "cpu_count")
+        if any(baseline["meta"].get(key) != results["meta"][key] for key in machine):
+            print(f"Warning: {args.baseline} was recorded on another machine "
+                  f"({baseline['meta'].get('platform')}, {baseline['meta'].get('cpu_count')} CPUs)")
+    else:
+        print(f"No baseline at {args.baseline}; skipping comparison")
+    
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['metric']}: {regression['baseline']:.3f} -> "
+            f"{regression['current']:.3f} ({regression['change_percent']:+.1f}%)"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+"""
+Product Catalog RAG - Indexing Checkpoints
+
+Durable progress journal for indexing runs. Every batch written to the
+product table is recorded (source cursor and last product id) so an
+interrupted run can be resumed from the last committed batch instead of
+starting over; products re-read after it are skipped by the content
+hashes stored in the table itself.
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from config import get_config
+
+
+# Batches read but not yet journaled before a run is given up on; in-flight
+# batches count, so this must exceed the async pipeline's queue capacity
+MAX_PENDING_BATCHES = 256
+
+
+class IndexingRun(BaseModel):
+    """Journal entry of one indexing run"""
+    run_id: str
+    table_name: str
+    source: str  # "products" or "database"
+    query: Optional[str] = None
+    batch_size: int
+    delete_missing: bool = False
+    status: str = "running"  # running, completed or incomplete
+    last_batch: int = -1
+    cursor: int = 0  # source products consumed up to the last committed batch
+    last_product_id: Optional[str] = None
+    stats: Dict[str, int] = {}
+    started_at: datetime
+    updated_at: datetime
+
+
+class IndexingJournal:
+    """
+    Indexing run journal backed by SQLite.
+    
+    A batch is journaled only after its table write has committed, and the
+    run row and batch row are updated in one transaction, so the journal
+    never claims more progress than the table holds.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open (or create) the journal file.
+        
+        Args:
+            path: SQLite file path
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                table_name TEXT NOT NULL,
+                source TEXT NOT NULL,
+                query TEXT,
+                batch_size INTEGER NOT NULL,
+                delete_missing INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                last_batch INTEGER NOT NULL,
+                cursor INTEGER NOT NULL,
+                last_product_id TEXT,
+                stats TEXT NOT NULL,
+                started_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS batches (
+                run_id TEXT NOT NULL,
+                batch_no INTEGER NOT NULL,
+                cursor INTEGER NOT NULL,
+                last_product_id TEXT,
+                committed_at TEXT NOT NULL,
+                PRIMARY KEY (run_id, batch_no)
+            )
+            """
+        )
+        self._conn.commit()
+    
+    def start_run(
+        self,
+        table_name: str,
+        source: str,
+        batch_size: int,
+        delete_missing: bool = False,
+        query: Optional[str] = None,
+        run_id: Optional[str] = None
+    ) -> IndexingRun:
+        """
+        Record the start of a new run.
+        
+        Args:
+            table_name: Logical table being indexed
+            source: "products" (caller-supplied iterable) or "database"
+            batch_size: Products per batch
+            delete_missing: Whether the run deletes products not in the source
+            query: SQL query of database runs
+            run_id: Run identifier (generated when omitted)
+            
+        Returns:
+            The new run
+        """
+        now = datetime.now()
+        run = IndexingRun(
+            run_id=run_id or uuid.uuid4().hex,
+            table_name=table_name,
+            source=source,
+            query=query,
+            batch_size=batch_size,
+            delete_missing=delete_missing,
+            started_at=now,
+            updated_at=now,
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, table_name, source, query, batch_size, "
+                "delete_missing, status, last_batch, cursor, last_product_id, stats, "
+                "started_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run.run_id, run.table_name, run.source, run.query, run.batch_size,
+                    int(run.delete_missing), run.status, run.last_batch, run.cursor,
+                    run.last_product_id, json.dumps(run.stats),
+                    run.started_at.isoformat(), run.updated_at.isoformat(),
+                ),
+            )
+            self._conn.commit()
+        return run
+    
+    def get_run(self, run_id: str) -> Optional[IndexingRun]:
+        """Load a run by id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, table_name, source, query, batch_size, delete_missing, "
+                "status, last_batch, cursor, last_product_id, stats, started_at, "
+                "updated_at FROM runs WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+        return _to_run(row) if row else None
+    
+    def list_runs(self, status: Optional[str] = None, limit: int = 50) -> List[IndexingRun]:
+        """
+        List the most recent runs.
+        
+        Args:
+            status: Only return runs with this status
+            limit: Maximum runs to return
+            
+        Returns:
+            Runs, newest first
+        """
+        sql = (
+            "SELECT run_id, table_name, source, query, batch_size, delete_missing, "
+            "status, last_batch, cursor, last_product_id, stats, started_at, "
+            "updated_at FROM runs"
+        )
+        params: List[Any] = []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY started_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_to_run(row) for row in rows]
+    
+    def commit_batch(
+        self,
+        run: IndexingRun,
+        batch_no: int,
+        cursor: int,
+        last_product_id: Optional[str],
+        stats: Dict[str, int]
+    ) -> None:
+        """
+        Record a batch whose rows have been committed to the table.
+        
+        Args:
+            run: Run the batch belongs to (updated in place)
+            batch_no: Batch number, contiguous from 0
+            cursor: Source products consumed up to the end of the batch
+            last_product_id: Id of the last product in the batch
+            stats: Cumulative run counters up to and including the batch
+        """
+        now = datetime.now()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO batches (run_id, batch_no, cursor, "
+                    "last_product_id, committed_at) VALUES (?, ?, ?, ?, ?)",
+                    (run.run_id, batch_no, cursor, last_product_id, now.isoformat()),
+                )
+                self._conn.execute(
+                    "UPDATE runs SET last_batch = ?, cursor = ?, last_product_id = ?, "
+                    "stats = ?, updated_at = ? WHERE run_id = ?",
+                    (
+                        batch_no, cursor, last_product_id, json.dumps(stats),
+                        now.isoformat(), run.run_id,
+                    ),
+                )
+        run.last_batch = batch_no
+        run.cursor = cursor
+        run.last_product_id = last_product_id
+        run.stats = dict(stats)
+        run.updated_at = now
+    
+    def set_status(self, run: IndexingRun, status: str) -> None:
+        """
+        Update the status of a run.
+        
+        Args:
+            run: Run to update (updated in place)
+            status: "running", "completed", or "incomplete" when batches failed
+        """
+        now = datetime.now()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?",
+                (status, now.isoformat(), run.run_id),
+            )
+            self._conn.commit()
+        run.status = status
+        run.updated_at = now
+
+
+class RunCheckpoint:
+    """
+    Journals the committed prefix of a run's batches.
+    
+    Batches may finish out of order (the async pipeline has several
+    embedding requests in flight), but the journal cursor only advances
+    over a contiguous run of successful batches. A failed batch holds the
+    cursor back for the rest of the run so a resume retries it; batches
+    after it can no longer be journaled, are not kept, and are re-read on
+    resume and skipped by content hash.
+    
+    A batch that is slow rather than failed holds back every later batch
+    too. Once `max_pending` batches are waiting, register() raises instead
+    of letting them pile up in memory; the run can then be resumed.
+    """
+    
+    def __init__(
+        self,
+        journal: IndexingJournal,
+        run: IndexingRun,
+        max_pending: int = MAX_PENDING_BATCHES
+    ):
+        self.journal = journal
+        self.run = run
+        self.max_pending = max_pending
+        self.failed = False
+        self._next_batch = run.last_batch + 1
+        self._failed_batch: Optional[int] = None
+        self._committed_stats: Dict[str, int] = dict(run.stats)
+        self._batches: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def pending(self) -> int:
+        """Batches registered but not yet journaled (or dropped)"""
+        with self._lock:
+            return len(self._batches)
+    
+    def register(self, batch_no: int, cursor: int, last_product_id: Optional[str]) -> None:
+        """
+        Register a batch read from the source.
+        
+        Args:
+            batch_no: Batch number
+            cursor: Source products consumed up to the end of the batch
+            last_product_id: Id of the last product in the batch
+            
+        Raises:
+            RuntimeError: If `max_pending` batches are already waiting
+                behind an unfinished one
+        """
+        with self._lock:
+            if len(self._batches) >= self.max_pending:
+                raise RuntimeError(
+                    f"Indexing run {self.run.run_id}: {len(self._batches)} batches are "
+                    f"waiting for batch {self._next_batch} to finish; resume the run"
+                )
+            self._batches[batch_no] = {
+                "cursor": cursor,
+                "last_product_id": last_product_id,
+                "done": False,
+            }
+    
+    def complete(
+        self,
+        batch_no: int,
+        stats: Dict[str, int],
+        ok: bool = True
+    ) -> None:
+        """
+        Mark a batch as written (or failed) and journal the committed prefix.
+        
+        Args:
+            batch_no: Batch number
+            stats: Counters of this batch alone
+            ok: False if the batch could not be embedded or written
+        """
+        with self._lock:
+            if not ok:
+                self.failed = True
+                if self._failed_batch is None or batch_no < self._failed_batch:
+                    self._failed_batch = batch_no
+                # Nothing from the failed batch on can be journaled any more
+                for held in [n for n in self._batches if n >= batch_no]:
+                    if held == batch_no or self._batches[held]["done"]:
+                        del self._batches[held]
+                return
+            if self._failed_batch is not None and batch_no > self._failed_batch:
+                self._batches.pop(batch_no, None)
+                return
+            
+            batch = self._batches[batch_no]
+            batch.update(done=True, stats=stats)
+            while self._batches.get(self._next_batch, {}).get("done"):
+                batch = self._batches.pop(self._next_batch)
+                for key, value in batch["stats"].items():
+                    self._committed_stats[key] = self._committed_stats.get(key, 0) + value
+                self.journal.commit_batch(
+                    self.run,
+                    self._next_batch,
+                    batch["cursor"],
+                    batch["last_product_id"],
+                    self._committed_stats,
+                )
+                self._next_batch += 1
+    
+    def finish(self) -> str:
+        """
+        Close the run in the journal.
+        
+        Returns:
+            Final run status
+        """
+        status = "incomplete" if self.failed else "completed"
+        self.journal.set_status(self.run, status)
+        return status
+
+
+def _to_run(row: tuple) -> IndexingRun:
+    """Build an IndexingRun from a runs table row"""
+    (
+        run_id, table_name, source, query, batch_size, delete_missing, status,
+        last_batch, cursor, last_product_id, stats, started_at, updated_at,
+    ) = row
+    return IndexingRun(
+        run_id=run_id,
+        table_name=table_name,
+        source=source,
+        query=query,
+        batch_size=batch_size,
+        delete_missing=bool(delete_missing),
+        status=status,
+        last_batch=last_batch,
+        cursor=cursor,
+        last_product_id=last_product_id,
+        stats=json.loads(stats),
+        started_at=datetime.fromisoformat(started_at),
+        updated_at=datetime.fromisoformat(updated_at),
+    )
+
+
+_journal: Optional[IndexingJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_indexing_journal() -> IndexingJournal:
+    """Get the process-wide indexing journal configured in AIConfig"""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = IndexingJournal(get_config().indexing_journal_path)
+        return _journal
@@ -0,0 +1,112 @@
+"""
+Product Catalog RAG - Database Source
+
+Streams product rows out of the ERP PostgreSQL database using a pooled
+connection and a named (server-side) cursor, so catalog size never
+affects memory use. psycopg2 is imported on first use, so indexing from
+other sources does not need it.
+"""
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Sequence
+
+from config import get_config
+
+if TYPE_CHECKING:
+    from psycopg2.pool import ThreadedConnectionPool
+
+
+# Columns map 1:1 onto ProductDocument fields
+DEFAULT_PRODUCT_QUERY = """
+SELECT
+    p.id::text AS id,
+    p.sku,
+    p.name,
+    COALESCE(p.description, p.short_description, '') AS description,
+    COALESCE(parent.name, c.name) AS category,
+    CASE WHEN parent.id IS NOT NULL THEN c.name END AS subcategory,
+    COALESCE(p.metadata, '{}'::jsonb) AS specs,
+    p.base_price::float AS b2b_price,
+    COALESCE(stock.available, 0)::int AS stock
+FROM products p
+JOIN categories c ON c.id = p.category_id
+LEFT JOIN categories parent ON parent.id = c.parent_id
+LEFT JOIN (
+    SELECT product_id, SUM(quantity_available) AS available
+    FROM stock_levels
+    GROUP BY product_id
+) stock ON stock.product_id = p.id
+WHERE p.is_active = true AND p.deleted_at IS NULL
+ORDER BY p.id
+"""
+
+_pool: Optional["ThreadedConnectionPool"] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> "ThreadedConnectionPool":
+    """Get the process-wide PostgreSQL connection pool configured in AIConfig"""
+    global _pool
+    from psycopg2.pool import ThreadedConnectionPool
+    
+    with _pool_lock:
+        if _pool is None:
+            config = get_config()
+            _pool = ThreadedConnectionPool(
+                minconn=1,
+                maxconn=config.db_pool_size,
+                host=config.db_host,
+                port=config.db_port,
+                dbname=config.db_name,
+                user=config.db_user,
+                password=config.db_password,
+            )
+        return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a connection from the pool and return it afterwards"""
+    pool = get_connection_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+def stream_rows(
+    db_connection,
+    query: str = DEFAULT_PRODUCT_QUERY,
+    params: Optional[Sequence[Any]] = None,
+    fetch_size: int = 1000,
+    cursor_name: str = "product_rag_stream"
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream rows from a query through a named server-side cursor.
+    
+    Only `fetch_size` rows are held client-side at any time. The cursor is
+    closed when the iterator is exhausted or discarded.
+    
+    Args:
+        db_connection: psycopg2 connection
+        query: SQL query to run
+        params: Optional query parameters
+        fetch_size: Rows fetched per round trip
+        cursor_name: Name of the server-side cursor
+        
+    Yields:
+        Rows as dictionaries
+    """
+    from psycopg2.extras import RealDictCursor
+    
+    with db_connection.cursor(name=cursor_name, cursor_factory=RealDictCursor) as cursor:
+        cursor.itersize = fetch_size
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+
@@ -0,0 +1,89 @@
+"""
+Product Catalog RAG - Field Groups
+
+A product is embedded per field group (name, category/specs, description)
+into separate vector columns. At query time the per-field similarities are
+fused with weights chosen by the kind of query: SKU lookups lean on the
+name vector, spec queries ("panou 60x60 40W IP65") on the specs vector and
+free-text questions on the description.
+"""
+import json
+import re
+from typing import Dict, Optional
+
+
+# Field group → vector column
+VECTOR_COLUMNS = {
+    "description": "vector",  # agno-compatible main column, one row per chunk
+    "name": "name_vector",
+    "specs": "specs_vector",
+}
+
+# Full-size copy of a vector column, kept for Matryoshka reranking when the
+# search columns hold shortened vectors: f"{column}{FULL_SUFFIX}"
+FULL_SUFFIX = "_full"
+
+# Field group → content hash column (decides which fields need re-embedding)
+HASH_COLUMNS = {
+    "description": "description_hash",
+    "name": "name_hash",
+    "specs": "specs_hash",
+}
+
+DEFAULT_FIELD_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "sku": {"name": 0.7, "specs": 0.1, "description": 0.2},
+    "spec": {"name": 0.2, "specs": 0.5, "description": 0.3},
+    "descriptive": {"name": 0.2, "specs": 0.2, "description": 0.6},
+}
+
+# Codes such as "LED-PNL-6060", "ABC1234" or "PL_40W_4K"
+_SKU_PATTERN = re.compile(r"^(?=.*\d)(?=.*[a-z])[a-z0-9]+(?:[-_./][a-z0-9]+)*$", re.IGNORECASE)
+
+# Numbers with units and common lighting spec notations
+_SPEC_PATTERN = re.compile(
+    r"\d+(?:[.,]\d+)?\s*(?:w|kw|v|a|ma|k|lm|lm/w|mm|cm|m|hz|°)\b"
+    r"|\bip\s?\d{2}\b"
+    r"|\b\d+\s*x\s*\d+\b"
+    r"|\b(?:cri|ra)\s?\d{2}\b",
+    re.IGNORECASE,
+)
+
+
+def classify_query(query: str) -> str:
+    """
+    Classify a search query for field weighting.
+    
+    Args:
+        query: Search query
+        
+    Returns:
+        "sku", "spec" or "descriptive"
+    """
+    stripped = query.strip()
+    if (
+        stripped and " " not in stripped
+        and _SKU_PATTERN.match(stripped)
+        and not _SPEC_PATTERN.fullmatch(stripped)
+    ):
+        return "sku"
+    if _SPEC_PATTERN.search(stripped):
+        return "spec"
+    return "descriptive"
+
+
+def field_weights(query_type: str, overrides: Optional[str] = None) -> Dict[str, float]:
+    """
+    Field weights for a query type.
+    
+    Args:
+        query_type: "sku", "spec" or "descriptive"
+        overrides: JSON object of per-query-type weights (PRODUCT_FIELD_WEIGHTS);
+            query types missing from it keep the defaults
+            
+    Returns:
+        Field group → weight
+    """
+    weights = dict(DEFAULT_FIELD_WEIGHTS)
+    if overrides:
+        weights.update(json.loads(overrides))
+    return weights.get(query_type, weights["descriptive"])
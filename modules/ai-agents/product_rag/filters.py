@@ -0,0 +1,48 @@
+"""
+Product Catalog RAG - Search Filters
+
+Structured product filters compiled to LanceDB where clauses, so they are
+evaluated against the stored metadata columns instead of in the prompt.
+"""
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ProductFilters(BaseModel):
+    """Structured filters for product search"""
+    category: Optional[str] = None
+    brand: Optional[str] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    in_stock_only: bool = False
+    
+    def to_where(self) -> Optional[str]:
+        """
+        Compile the filters to a LanceDB SQL where clause.
+        
+        Returns:
+            Where clause, or None when no filter is set
+        """
+        clauses: List[str] = []
+        if self.category:
+            clauses.append(f"category = {_sql_literal(self.category)}")
+        if self.brand:
+            clauses.append(f"brand = {_sql_literal(self.brand)}")
+        if self.price_min is not None:
+            clauses.append(f"b2b_price >= {float(self.price_min)}")
+        if self.price_max is not None:
+            clauses.append(f"b2b_price <= {float(self.price_max)}")
+        if self.in_stock_only:
+            clauses.append("stock > 0")
+        return " AND ".join(clauses) if clauses else None
+
+
+def sql_in(column: str, values: List[str]) -> str:
+    """Build a LanceDB `column IN (...)` filter for string values"""
+    return f"{column} IN ({', '.join(_sql_literal(str(value)) for value in values)})"
+
+
+def _sql_literal(value: str) -> str:
+    """Quote a string for use in a LanceDB where clause"""
+    return "'" + value.replace("'", "''") + "'"
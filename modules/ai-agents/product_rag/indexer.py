@@ -5,14 +5,40 @@ Indexes product catalog into LanceDB for natural language search.
 Supports 100k+ products with efficient batch processing.
 """
 import asyncio
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import hashlib
+import itertools
+import json
+import time
+from typing import (
+    List, Dict, Any, Optional, Iterable, Iterator, AsyncIterable, AsyncIterator,
+    Callable, Tuple, Union,
+)
+from datetime import datetime, timedelta
 from pydantic import BaseModel
 
-from agno.knowledge.embedder.openai import OpenAIEmbedder
-from agno.vectordb.lancedb import LanceDb, SearchType
+import lancedb
+import pyarrow as pa
 
 from config import get_config
+from shared import create_embedder
+from shared.batching import async_embed_packed, batched, default_request_limits, embed_packed
+from shared.embeddings import embed_batch, async_embed_batch, truncate_embedding
+from shared.tokenizer import count_tokens, split_tokens
+from .checkpoint import MAX_PENDING_BATCHES, IndexingRun, RunCheckpoint, get_indexing_journal
+from .database import DEFAULT_PRODUCT_QUERY, pooled_connection, stream_rows
+from .fields import FULL_SUFFIX, HASH_COLUMNS, VECTOR_COLUMNS
+from .filters import sql_in
+from .metrics import IndexingMetrics
+from .quantization import BINARY, binary_bytes, binary_column, binary_quantize
+from .rebuild import TableRebuildMixin
+from .search import ProductSearchMixin
+from .vector_index import (
+    VectorIndexPolicy,
+    ensure_scalar_indices,
+    ensure_text_index,
+    ensure_vector_index,
+)
+from .volatile import VOLATILE_FIELDS, VolatileUpdatesMixin
 
 
 class ProductDocument(BaseModel):
@@ -31,156 +57,1101 @@ class ProductDocument(BaseModel):
     tags: List[str] = []
 
 
-class ProductIndexer:
+# Row ids of a product's extra chunks are f"{product_id}#{n}" (n >= 1)
+CHUNK_SEPARATOR = "#"
+
+# Backoff before the first retry of a failed embedding request (doubles per attempt)
+EMBED_RETRY_BASE_SECONDS = 1.0
+
+# Products can come from a list, a generator, or an async generator
+ProductSource = Union[Iterable[ProductDocument], AsyncIterable[ProductDocument]]
+
+# Called after every batch with a snapshot of the run counters
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class ProductIndexer(ProductSearchMixin, TableRebuildMixin, VolatileUpdatesMixin):
     """
     Indexes products into LanceDB for RAG-based search.
     
     Features:
     - Batch processing for 100k+ products
-    - Incremental updates
+    - Incremental updates (unchanged products are skipped by content hash)
+    - Long products embedded as several chunks, scored per product at search time
+    - Checkpointed runs that can be resumed after a crash
+    - Per-stage timings exported to Prometheus
+    - Idempotent upserts and bulk deletes keyed on product id
+    - Blue/green full rebuilds with an atomic table swap
     - Full reindexing support
+    - ANN index (IVF-PQ / HNSW) built and refreshed after bulk loads
+    - Hybrid BM25 + vector search with reciprocal-rank fusion
+    - Optional int8 / binary quantized first pass, rescored at full precision
     """
     
-    def __init__(self, table_name: str = "product_catalog"):
+    def __init__(
+        self,
+        table_name: str = "product_catalog",
+        index_policy: Optional[VectorIndexPolicy] = None,
+        search_type: Optional[str] = None,
+        resolve_alias: bool = True,
+        dimensions: Optional[int] = None,
+        matryoshka_rerank: Optional[bool] = None
+    ):
+        """
+        Args:
+            table_name: Logical table name
+            index_policy: ANN index policy (defaults from AIConfig)
+            search_type: "vector" or "hybrid" (defaults from AIConfig)
+            resolve_alias: Follow the table alias set by rebuild(); disable
+                to address a physical table directly
+            dimensions: Dimensions of the searched vectors, e.g. 256 or 512
+                (defaults from AIConfig; model default when unset)
+            matryoshka_rerank: Also store the full vectors and rerank search
+                candidates with them (defaults from AIConfig)
+        """
         self.config = get_config()
         self.table_name = table_name
-        self.vector_db = None
+        self.resolve_alias = resolve_alias
+        self.physical_table_name = table_name
+        self.search_type = search_type or self.config.product_search_type
+        self.index_policy = index_policy or VectorIndexPolicy(
+            index_type=self.config.vector_index_type,
+            min_rows=self.config.vector_index_min_rows,
+            rebuild_unindexed_fraction=self.config.vector_index_rebuild_fraction,
+            quantization=self.config.vector_quantization,
+        )
+        self.dimensions = dimensions or self.config.product_embedding_dimensions or None
+        self.matryoshka_rerank = (
+            self.config.product_matryoshka_rerank if matryoshka_rerank is None else matryoshka_rerank
+        )
+        self.embedder = None
+        self.db = None
+        self.table = None
+        self.journal = None
+        self.schema_mismatch: Optional[str] = None
+        self.request_limits = default_request_limits()
         self._initialized = False
     
     def initialize(self) -> None:
-        """Initialize the vector database"""
-        self.vector_db = LanceDb(
-            uri=self.config.lancedb_uri,
-            table_name=self.table_name,
-            search_type=SearchType.vector,
-            embedder=OpenAIEmbedder(api_key=self.config.openai_api_key),
-        )
+        """Initialize the embedder and open (or create) the LanceDB table"""
+        # With reranking the provider returns full vectors and the searched
+        # ones are derived from them; otherwise it returns shortened vectors
+        self.embedder = create_embedder(None if self.matryoshka_rerank else self.dimensions)
+        self.dimensions = min(self.dimensions or self.embedder.dimensions, self.embedder.dimensions)
+        self.matryoshka_rerank = self.matryoshka_rerank and self.dimensions < self.embedder.dimensions
+        self.journal = get_indexing_journal()
+        self.db = lancedb.connect(self.config.lancedb_uri)
+        self._open_table(self._resolve_physical_name())
         self._initialized = True
     
+    def _open_table(self, physical_name: str) -> None:
+        """Open (or create) a physical table and make it the active one"""
+        schema = self._table_schema()
+        try:
+            self.table = self.db.open_table(physical_name)
+        except ValueError:
+            self.table = self.db.create_table(physical_name, schema=schema, exist_ok=True)
+            # Keyword search needs the index from the first row on; rows
+            # added later are searched unindexed until refresh_indices()
+            if self.search_type in ("keyword", "hybrid"):
+                ensure_text_index(self.table)
+        self.physical_table_name = physical_name
+        # A table with an outdated layout is still opened so rebuild() can
+        # replace it, but reads and writes refuse it (see _check_schema)
+        self.schema_mismatch = _schema_mismatch(schema, self.table.schema)
+    
+    def _check_schema(self) -> None:
+        """Refuse to use a table whose layout does not match the configuration"""
+        if self.schema_mismatch:
+            raise RuntimeError(
+                f"Table {self.physical_table_name} does not match the configured product "
+                f"table layout ({self.schema_mismatch}). It was created by an older "
+                "version or with different embedding dimensions, quantization or "
+                "Matryoshka settings; run ProductIndexer.rebuild() to reindex the "
+                "catalog into a new table."
+            )
+    
+    def _table_schema(self) -> pa.Schema:
+        """Arrow schema of the product table (agno LanceDb layout plus per-field columns)"""
+        vector_type = pa.list_(pa.float32(), self.dimensions)
+        binary_type = pa.list_(pa.uint8(), binary_bytes(self.dimensions))
+        full_type = pa.list_(pa.float32(), self.embedder.dimensions)
+        return pa.schema([
+            *(pa.field(column, vector_type) for column in VECTOR_COLUMNS.values()),
+            *(
+                pa.field(self._embedded_column(field), full_type)
+                for field in VECTOR_COLUMNS if self.matryoshka_rerank
+            ),
+            *(
+                pa.field(binary_column(column), binary_type)
+                for column in self._binary_columns()
+            ),
+            pa.field("id", pa.string()),
+            pa.field("payload", pa.string()),
+            pa.field("text", pa.string()),
+            pa.field("product_id", pa.string()),
+            pa.field("sku", pa.string()),
+            pa.field("category", pa.string()),
+            pa.field("brand", pa.string()),
+            pa.field("b2b_price", pa.float64()),
+            pa.field("stock", pa.int64()),
+            pa.field("content_hash", pa.string()),
+            *(pa.field(column, pa.string()) for column in HASH_COLUMNS.values()),
+        ])
+    
+    def _embedded_column(self, field: str) -> str:
+        """Column holding the embedder's output for a field group"""
+        column = VECTOR_COLUMNS[field]
+        return f"{column}{FULL_SUFFIX}" if self.matryoshka_rerank else column
+    
+    def _search_vector(self, vector: List[float]) -> List[float]:
+        """An embedder output as stored in (and searched on) the vector columns"""
+        if len(vector) > self.dimensions:
+            return truncate_embedding(vector, self.dimensions)
+        return vector
+    
+    def _binary_columns(self) -> List[str]:
+        """Vector columns with a packed sign-bit companion column"""
+        if self.index_policy.quantization == BINARY:
+            return list(VECTOR_COLUMNS.values())
+        return []
+    
+    def _index_columns(self) -> List[str]:
+        """Columns carrying an ANN index (only the packed ones with binary quantization)"""
+        binary = [binary_column(column) for column in self._binary_columns()]
+        return binary or list(VECTOR_COLUMNS.values())
+    
+    def _product_metadata(self, product: ProductDocument) -> Dict[str, Any]:
+        """Metadata stored alongside the product vector"""
+        return {
+            "product_id": product.id,
+            "sku": product.sku,
+            "category": product.category,
+            "brand": product.brand,
+        }
+    
     def _product_to_text(self, product: ProductDocument) -> str:
         """Convert product to searchable text"""
+        return f"{self._product_header(product)}\n{self._product_body(product)}".strip()
+    
+    def _product_header(self, product: ProductDocument) -> str:
+        """Identity lines of the product text, repeated at the top of every chunk"""
+        return "\n".join([
+            f"Product: {product.name}",
+            f"SKU: {product.sku}",
+            f"Category: {product.category} > {product.subcategory or 'General'}",
+            f"Brand: {product.brand or 'N/A'}",
+        ])
+    
+    def _product_body(self, product: ProductDocument) -> str:
+        """Free-text part of the product text (description, specs, tags)"""
+        return f"Description: {product.description}\n{self._specs_lines(product)}"
+    
+    def _specs_lines(self, product: ProductDocument) -> str:
+        """Specifications and tags lines of the product text"""
         specs_text = ", ".join([
             f"{k}: {v}" for k, v in product.specs.items()
         ]) if product.specs else ""
         
         tags_text = ", ".join(product.tags) if product.tags else ""
         
-        return f"""
-Product: {product.name}
-SKU: {product.sku}
-Category: {product.category} > {product.subcategory or 'General'}
-Brand: {product.brand or 'N/A'}
-Description: {product.description}
-Specifications: {specs_text}
-B2B Price: €{product.b2b_price:.2f} if product.b2b_price else 'Contact for pricing'
-Stock: {product.stock} units
-Tags: {tags_text}
-        """.strip()
+        return "\n".join([
+            f"Specifications: {specs_text}",
+            f"Tags: {tags_text}",
+        ])
+    
+    def _product_fields(self, product: ProductDocument) -> Dict[str, List[str]]:
+        """Render the texts embedded into each field group's vector column"""
+        return {
+            "description": self._product_chunks(product),
+            "name": ["\n".join([
+                f"Product: {product.name}",
+                f"SKU: {product.sku}",
+                f"Brand: {product.brand or 'N/A'}",
+            ])],
+            "specs": ["\n".join([
+                f"Category: {product.category} > {product.subcategory or 'General'}",
+                self._specs_lines(product),
+            ])],
+        }
+    
+    def _product_chunks(self, product: ProductDocument) -> List[str]:
+        """Render a product's description field as one or more chunk texts"""
+        header = self._product_header(product)
+        description = f"Description: {product.description}"
+        text = f"{header}\n{description}".strip()
+        max_tokens = self.config.product_chunk_tokens
+        model = self.request_limits.model
+        if max_tokens <= 0 or count_tokens(text, model) <= max_tokens:
+            return [text]
+        
+        budget = max(max_tokens - count_tokens(header, model), 1)
+        pieces = split_tokens(
+            description,
+            budget,
+            model,
+            overlap=min(self.config.product_chunk_overlap, budget // 2),
+        )
+        return [
+            f"{header}\n{piece}".strip()
+            for piece in pieces[:max(self.config.product_max_chunks, 1)]
+        ]
     
     def index_products(
         self,
-        products: List[ProductDocument],
-        batch_size: int = 100
+        products: ProductSource,
+        batch_size: int = 1000,
+        delete_missing: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        run_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Index products into the vector database.
         
         Args:
-            products: List of products to index
-            batch_size: Number of products per batch
-            
+            products: Iterable or async iterable of products to index
+            batch_size: Number of products per batch (table write and
+                checkpoint unit; embedding requests are packed by tokens)
+            delete_missing: Treat `products` as the full catalog and delete
+                indexed products that are not part of it
+            progress: Optional callback receiving run counters after each batch
+            run_id: Journal id for the run (generated when omitted)
+        
         Returns:
             Indexing statistics
+        
         """
         if not self._initialized:
             raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        self._check_schema()
+        
+        if isinstance(products, AsyncIterable):
+            return asyncio.run(self.index_products_async(
+                products,
+                batch_size=batch_size,
+                delete_missing=delete_missing,
+                progress=progress,
+                run_id=run_id,
+            ))
         
+        run = self.journal.start_run(
+            self.table_name, "products", batch_size, delete_missing, run_id=run_id
+        )
+        return self._index_stream(products, run, progress)
+    
+    def resume(
+        self,
+        run_id: str,
+        products: Optional[ProductSource] = None,
+        db_connection=None,
+        fetch_size: int = 1000,
+        max_in_flight: int = 4,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Continue an interrupted indexing run from its last committed batch.
+        
+        Args:
+            run_id: Run to resume
+            products: Products of the original run (not needed for database
+                runs)
+            db_connection: Optional psycopg2 connection for database runs
+            fetch_size: Rows fetched per database round trip
+            max_in_flight: Maximum concurrent embedding requests for async
+                iterables
+            progress: Optional callback receiving run counters after each batch
+        
+        Returns:
+            Indexing statistics of the resumed part of the run
+        
+        """
+        if not self._initialized:
+            raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        self._check_schema()
+        
+        run = self.journal.get_run(run_id)
+        if run is None:
+            raise ValueError(f"Unknown indexing run: {run_id}")
+        if run.table_name != self.table_name:
+            raise ValueError(
+                f"Run {run_id} indexed table {run.table_name}, not {self.table_name}"
+            )
+        if run.status == "completed":
+            return {"run_id": run.run_id, "run_status": run.status, **run.stats}
+        
+        self.journal.set_status(run, "running")
+        if run.source == "database":
+            return self._index_database_run(run, db_connection, fetch_size, progress)
+        if products is None:
+            raise ValueError(f"Run {run_id} indexed caller-supplied products; pass them again")
+        if isinstance(products, AsyncIterable):
+            return asyncio.run(self._index_pipeline(products, run, max_in_flight, progress))
+        return self._index_stream(products, run, progress)
+    
+    def _index_stream(
+        self,
+        products: Iterable[ProductDocument],
+        run: IndexingRun,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """Index a stream of products batch by batch"""
         start_time = datetime.now()
-        indexed_count = 0
-        error_count = 0
+        stats = self._new_stats()
+        # Only a run that deletes missing products needs every id it sees
+        seen_ids = set() if run.delete_missing else None
+        checkpoint = RunCheckpoint(self.journal, run)
+        metrics = IndexingMetrics(self.table_name)
+        cursor = run.cursor
         
-        # Process in batches
-        for i in range(0, len(products), batch_size):
-            batch = products[i:i + batch_size]
+        # Process in batches: token-packed embedding requests and one table write per batch
+        batches = batched(_skip_committed(products, run, seen_ids), run.batch_size)
+        for batch_no, batch in enumerate(batches, start=run.last_batch + 1):
+            cursor += len(batch)
+            checkpoint.register(batch_no, cursor, batch[-1].id)
+            if seen_ids is not None:
+                seen_ids.update(product.id for product in batch)
+            batch_stats = self._new_stats()
+            batch_stats["processed"] = len(batch)
+            
+            ok = False
+            try:
+                self._index_batch(batch, batch_stats, metrics)
+                ok = True
+            except Exception as e:
+                batch_stats["errors"] += len(batch)
+                print(f"Error indexing batch starting at {batch[0].sku}: {e}")
             
+            checkpoint.complete(batch_no, batch_stats, ok=ok)
+            metrics.observe_products(batch_stats)
+            _merge_stats(stats, batch_stats)
+            if progress:
+                progress(self._finish_stats(stats, start_time))
+        
+        if run.delete_missing:
+            stats["deleted"] = self._delete_missing(seen_ids)
+        
+        result = self._finish_stats(stats, start_time)
+        result.update(metrics.summary())
+        result.update(run_id=run.run_id, run_status=checkpoint.finish())
+        if stats["embedded"] or stats["deleted"]:
+            result.update(self.refresh_indices())
+        return result
+    
+    async def index_products_async(
+        self,
+        products: ProductSource,
+        batch_size: int = 1000,
+        max_in_flight: int = 4,
+        delete_missing: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        run_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Index products with an overlapping render → embed → write pipeline.
+        
+        Args:
+            products: Iterable or async iterable of products, consumed lazily
+            batch_size: Number of products per batch
+            max_in_flight: Maximum concurrent embedding requests
+            delete_missing: Treat `products` as the full catalog and delete
+                indexed products that are not part of it
+            progress: Optional callback receiving run counters after each
+                written batch
+            run_id: Journal id for the run (generated when omitted)
+        
+        Returns:
+            Indexing statistics (same shape as index_products)
+        
+        """
+        if not self._initialized:
+            raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        self._check_schema()
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        
+        run = self.journal.start_run(
+            self.table_name, "products", batch_size, delete_missing, run_id=run_id
+        )
+        return await self._index_pipeline(products, run, max_in_flight, progress)
+    
+    async def _index_pipeline(
+        self,
+        products: ProductSource,
+        run: IndexingRun,
+        max_in_flight: int,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """Run the render → embed → write pipeline of index_products_async"""
+        start_time = datetime.now()
+        stats = self._new_stats()
+        # Only a run that deletes missing products needs every id it sees
+        seen_ids = set() if run.delete_missing else None
+        # Up to 4 x max_in_flight batches are queued or in flight at once
+        checkpoint = RunCheckpoint(
+            self.journal, run, max_pending=max(MAX_PENDING_BATCHES, max_in_flight * 8)
+        )
+        metrics = IndexingMetrics(self.table_name)
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=max_in_flight * 2)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=max_in_flight * 2)
+        
+        if isinstance(products, AsyncIterable):
+            products = _askip_committed(products, run, seen_ids)
+        else:
+            products = _skip_committed(products, run, seen_ids)
+        
+        def finish_batch(batch_no: int, batch_stats: Dict[str, int], ok: bool = True) -> None:
+            checkpoint.complete(batch_no, batch_stats, ok=ok)
+            metrics.observe_products(batch_stats)
+        
+        async def render_stage() -> None:
+            cursor = run.cursor
+            batch_no = run.last_batch
+            async for batch in _abatched(products, run.batch_size):
+                batch_no += 1
+                cursor += len(batch)
+                checkpoint.register(batch_no, cursor, batch[-1].id)
+                if seen_ids is not None:
+                    seen_ids.update(product.id for product in batch)
+                # Each batch carries its own counters through the pipeline;
+                # they are merged into the run counters on the loop thread to
+                # avoid racing with the embed and write stages
+                batch_stats = self._new_stats()
+                batch_stats["processed"] = len(batch)
+                try:
+                    rendered, volatile_updates = await asyncio.to_thread(
+                        self._prepare_batch, batch, batch_stats, metrics
+                    )
+                except Exception as e:
+                    rendered, volatile_updates = None, []
+                    batch_stats["errors"] += len(batch)
+                    print(f"Error preparing batch starting at {batch[0].sku}: {e}")
+                _merge_stats(stats, batch_stats)
+                if rendered:
+                    await embed_queue.put((batch_no, rendered, batch_stats, volatile_updates))
+                    metrics.observe_queue_depth("embed", embed_queue.qsize())
+                elif volatile_updates:
+                    # Price / stock updates go through the writer like any
+                    # other table write
+                    await write_queue.put((batch_no, [], batch_stats, [], volatile_updates))
+                    metrics.observe_queue_depth("write", write_queue.qsize())
+                else:
+                    finish_batch(batch_no, batch_stats, ok=rendered is not None)
+            for _ in range(max_in_flight):
+                await embed_queue.put(None)
+        
+        async def embed_stage() -> None:
+            while True:
+                item = await embed_queue.get()
+                if item is None:
+                    break
+                batch_no, rendered, batch_stats, volatile_updates = item
+                try:
+                    vectors = await self._aembed(
+                        _pending_texts(rendered), metrics
+                    )
+                    await write_queue.put(
+                        (batch_no, rendered, batch_stats, vectors, volatile_updates)
+                    )
+                    metrics.observe_queue_depth("write", write_queue.qsize())
+                except Exception as e:
+                    stats["errors"] += len(rendered)
+                    batch_stats["errors"] += len(rendered)
+                    finish_batch(batch_no, batch_stats, ok=False)
+                    print(f"Error embedding batch starting at {rendered[0][0].sku}: {e}")
+        
+        async def write_stage() -> None:
+            while True:
+                item = await write_queue.get()
+                if item is None:
+                    break
+                batch_no, rendered, batch_stats, vectors, volatile_updates = item
+                try:
+                    updated = 0
+                    with metrics.time_stage("write"):
+                        if rendered:
+                            await asyncio.to_thread(self._write_batch, rendered, vectors)
+                        if volatile_updates:
+                            updated = await asyncio.to_thread(
+                                self._apply_volatile_updates, volatile_updates
+                            )
+                    stats["embedded"] += len(rendered)
+                    batch_stats["embedded"] += len(rendered)
+                    stats["updated"] += updated
+                    batch_stats["updated"] += updated
+                    finish_batch(batch_no, batch_stats)
+                except Exception as e:
+                    failed = len(rendered) + len(volatile_updates)
+                    stats["errors"] += failed
+                    batch_stats["errors"] += failed
+                    finish_batch(batch_no, batch_stats, ok=False)
+                    first = rendered[0][0].sku if rendered else volatile_updates[0]["sku"]
+                    print(f"Error writing batch starting at {first}: {e}")
+                if progress:
+                    progress(self._finish_stats(stats, start_time))
+        
+        writer = asyncio.create_task(write_stage())
+        await asyncio.gather(
+            render_stage(),
+            *(embed_stage() for _ in range(max_in_flight)),
+        )
+        await write_queue.put(None)
+        await writer
+        
+        if run.delete_missing:
+            stats["deleted"] = await asyncio.to_thread(self._delete_missing, seen_ids)
+        
+        result = self._finish_stats(stats, start_time)
+        result.update(metrics.summary())
+        result.update(run_id=run.run_id, run_status=checkpoint.finish())
+        if stats["embedded"] or stats["deleted"]:
+            result.update(await asyncio.to_thread(self.refresh_indices))
+        return result
+    
+    def _new_stats(self) -> Dict[str, int]:
+        """Counters for an indexing run"""
+        return {
+            "processed": 0,
+            "embedded": 0,
+            "skipped": 0,
+            "updated": 0,
+            "deleted": 0,
+            "errors": 0,
+        }
+    
+    def _finish_stats(
+        self,
+        stats: Dict[str, int],
+        start_time: datetime
+    ) -> Dict[str, Any]:
+        """Build the statistics reported for an indexing run (so far)"""
+        duration = (datetime.now() - start_time).total_seconds()
+        return {
+            "indexed": stats["embedded"],
+            **stats,
+            "total": stats["processed"],
+            "duration_seconds": duration,
+            "products_per_second": stats["embedded"] / duration if duration > 0 else 0.0,
+        }
+    
+    def _index_batch(
+        self,
+        batch: List[ProductDocument],
+        stats: Dict[str, int],
+        metrics: IndexingMetrics
+    ) -> None:
+        """Embed and write the changed products of a batch"""
+        rendered, volatile_updates = self._prepare_batch(batch, stats, metrics)
+        if volatile_updates:
+            with metrics.time_stage("write"):
+                stats["updated"] += self._apply_volatile_updates(volatile_updates)
+        if not rendered:
+            return
+        
+        vectors = self._embed(_pending_texts(rendered), metrics)
+        with metrics.time_stage("write"):
+            self._write_batch(rendered, vectors)
+        stats["embedded"] += len(rendered)
+    
+    def _embed(self, texts: List[str], metrics: IndexingMetrics) -> List[List[float]]:
+        """Embed a batch in token-packed requests, retrying failed ones with backoff"""
+        def send(inputs: List[str], tokens: int) -> List[List[float]]:
+            metrics.observe_request(len(inputs), tokens)
+            for attempt in range(self.config.embedding_max_retries + 1):
+                try:
+                    with metrics.time_stage("embed"):
+                        return embed_batch(self.embedder, inputs)
+                except Exception:
+                    if attempt == self.config.embedding_max_retries:
+                        raise
+                    metrics.observe_retry()
+                    time.sleep(EMBED_RETRY_BASE_SECONDS * 2 ** attempt)
+        
+        return embed_packed(self.embedder, texts, self.request_limits, send=send)
+    
+    async def _aembed(self, texts: List[str], metrics: IndexingMetrics) -> List[List[float]]:
+        """Async variant of _embed"""
+        async def send(inputs: List[str], tokens: int) -> List[List[float]]:
+            metrics.observe_request(len(inputs), tokens)
+            for attempt in range(self.config.embedding_max_retries + 1):
+                try:
+                    with metrics.time_stage("embed"):
+                        return await async_embed_batch(self.embedder, inputs)
+                except Exception:
+                    if attempt == self.config.embedding_max_retries:
+                        raise
+                    metrics.observe_retry()
+                    await asyncio.sleep(EMBED_RETRY_BASE_SECONDS * 2 ** attempt)
+        
+        return await async_embed_packed(self.embedder, texts, self.request_limits, send=send)
+    
+    def _prepare_batch(
+        self,
+        batch: List[ProductDocument],
+        stats: Dict[str, int],
+        metrics: IndexingMetrics
+    ) -> Tuple[List[tuple], List[Dict[str, Any]]]:
+        """Render a batch into the products to embed and price / stock updates of unchanged ones"""
+        rendered = []
+        with metrics.time_stage("render"):
             for product in batch:
                 try:
-                    text = self._product_to_text(product)
-                    metadata = {
-                        "product_id": product.id,
-                        "sku": product.sku,
-                        "category": product.category,
-                        "b2b_price": product.b2b_price,
-                        "stock": product.stock,
+                    fields = self._product_fields(product)
+                    hashes = {
+                        field: _content_hash("\n\n".join(texts))
+                        for field, texts in fields.items()
                     }
-                    self.vector_db.add(text=text, metadata=metadata)
-                    indexed_count += 1
+                    rendered.append((product, fields, hashes, {}))
                 except Exception as e:
-                    error_count += 1
-                    print(f"Error indexing product {product.sku}: {e}")
+                    stats["errors"] += 1
+                    print(f"Error rendering product {product.sku}: {e}")
+        
+        if not rendered:
+            return rendered, []
+        
+        with metrics.time_stage("lookup"):
+            stored = self._stored_state([item[0].id for item in rendered])
+        changed = []
+        partial = []
+        volatile_updates = []
+        for item in rendered:
+            product, _, hashes, _ = item
+            state = stored.get(product.id)
+            if state is None or state["content_hash"] != _product_hash(hashes):
+                changed.append(item)
+                if state is not None and any(
+                    state.get(HASH_COLUMNS[field]) == hashes[field] for field in VECTOR_COLUMNS
+                ):
+                    partial.append((item, state))
+            elif any(state[field] != value for field, value in self._volatile_fields(product).items()):
+                volatile_updates.append({"sku": product.sku, **self._volatile_fields(product)})
+        
+        if partial:
+            with metrics.time_stage("lookup"):
+                stored_vectors = self._stored_vectors([item[0].id for item, _ in partial])
+            for (product, _, hashes, vectors), state in partial:
+                for field, column in HASH_COLUMNS.items():
+                    if state.get(column) == hashes[field] and product.id in stored_vectors:
+                        vectors[field] = stored_vectors[product.id][field]
+        
+        stats["skipped"] += len(rendered) - len(changed) - len(volatile_updates)
+        return changed, volatile_updates
+    
+    def _stored_state(self, product_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up stored content hashes and volatile fields for product ids"""
+        rows = (
+            self.table.search()
+            .where(sql_in("product_id", product_ids))
+            .select(["product_id", "content_hash", *HASH_COLUMNS.values(), *VOLATILE_FIELDS])
+            .limit(len(product_ids) * max(self.config.product_max_chunks, 1))
+            .to_list()
+        )
+        return {row["product_id"]: row for row in rows}
+    
+    def _stored_vectors(self, product_ids: List[str]) -> Dict[str, Dict[str, List[List[float]]]]:
+        """Read the stored embedder outputs of products, per field group"""
+        columns = {field: self._embedded_column(field) for field in VECTOR_COLUMNS}
+        rows = (
+            self.table.search()
+            .where(sql_in("product_id", product_ids))
+            .select(["id", "product_id", *columns.values()])
+            .limit(len(product_ids) * max(self.config.product_max_chunks, 1))
+            .to_arrow()
+            .to_pylist()
+        )
+        rows.sort(key=lambda row: _chunk_number(row["id"]))
+        
+        vectors: Dict[str, Dict[str, List[List[float]]]] = {}
+        for row in rows:
+            product_vectors = vectors.setdefault(row["product_id"], {
+                field: [row[column]] for field, column in columns.items()
+            })
+            if _chunk_number(row["id"]) > 0:
+                product_vectors["description"].append(row[columns["description"]])
+        return vectors
+    
+    def _write_batch(
+        self,
+        rendered: List[tuple],
+        vectors: List[List[float]]
+    ) -> None:
+        """Upsert the rows of the given products in a single merge-insert"""
+        product_ids = [item[0].id for item in rendered]
+        # Stale chunk rows of the same products are removed, so re-running a
+        # batch never duplicates rows
+        (
+            self.table.merge_insert("id")
+            .when_matched_update_all()
+            .when_not_matched_insert_all()
+            .when_not_matched_by_source_delete(sql_in("product_id", product_ids))
+            .execute(self._to_arrow(rendered, vectors))
+        )
+    
+    def delete_products(
+        self,
+        product_ids: Optional[Iterable[str]] = None,
+        skus: Optional[Iterable[str]] = None,
+        batch_size: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Delete products (e.g. deactivated or discontinued) from the index.
         
-        end_time = datetime.now()
+        Args:
+            product_ids: Product ids to delete
+            skus: SKUs to delete
+            batch_size: Ids per delete statement
+        
+        Returns:
+            Deletion statistics
+        
+        """
+        if not self._initialized:
+            raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        self._check_schema()
+        
+        rows_before = self.table.count_rows()
+        requested = 0
+        for column, values in (("product_id", product_ids), ("sku", skus)):
+            for batch in batched(values or [], batch_size):
+                requested += len(batch)
+                self.table.delete(sql_in(column, batch))
         
         return {
-            "indexed": indexed_count,
-            "errors": error_count,
-            "total": len(products),
-            "duration_seconds": (end_time - start_time).total_seconds(),
-            "products_per_second": indexed_count / max((end_time - start_time).total_seconds(), 1),
+            "requested": requested,
+            "deleted_rows": rows_before - self.table.count_rows(),
         }
     
+    def compact(self, cleanup_older_than_days: int = 7) -> None:
+        """
+        Compact table fragments and drop tombstoned rows and old versions.
+        
+        Args:
+            cleanup_older_than_days: Keep table versions newer than this
+        """
+        if not self._initialized:
+            raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        
+        self.table.optimize(cleanup_older_than=timedelta(days=cleanup_older_than_days))
+    
+    def _delete_missing(self, seen_ids: set) -> int:
+        """Delete indexed products that were not part of the run; returns how many"""
+        indexed_ids = (
+            self.table.search()
+            .select(["product_id"])
+            .limit(self.table.count_rows())
+            .to_arrow()
+            .column("product_id")
+            .to_pylist()
+        )
+        missing = sorted(set(indexed_ids) - seen_ids)
+        
+        self.delete_products(product_ids=missing)
+        return len(missing)
+    
+    def _to_arrow(
+        self,
+        rendered: List[tuple],
+        vectors: List[List[float]]
+    ) -> pa.Table:
+        """Build the Arrow rows (one per description chunk) of rendered products"""
+        rows = []
+        _assign_vectors(rendered, vectors)
+        for product, fields, hashes, field_vectors in rendered:
+            metadata = self._product_metadata(product)
+            for n, chunk in enumerate(fields["description"]):
+                text = self._product_to_text(product) if n == 0 else chunk
+                payload = {
+                    "name": product.name,
+                    "meta_data": metadata,
+                    "content": text,
+                    "usage": None,
+                }
+                row_vectors = {}
+                for field, column in VECTOR_COLUMNS.items():
+                    vector = field_vectors[field][n if field == "description" else 0]
+                    row_vectors[column] = self._search_vector(vector)
+                    if self.matryoshka_rerank:
+                        row_vectors[self._embedded_column(field)] = vector
+                for column in self._binary_columns():
+                    row_vectors[binary_column(column)] = binary_quantize(row_vectors[column])
+                rows.append({
+                    **row_vectors,
+                    "id": _chunk_id(product.id, n),
+                    "payload": json.dumps(payload),
+                    "text": text,
+                    "content_hash": _product_hash(hashes),
+                    **{HASH_COLUMNS[field]: value for field, value in hashes.items()},
+                    **metadata,
+                    **self._volatile_fields(product),
+                })
+        return pa.Table.from_pylist(rows, schema=self._table_schema())
+    
     def index_from_database(
         self,
-        db_connection,
-        query: str = "SELECT * FROM products WHERE active = true",
-        batch_size: int = 100
+        db_connection=None,
+        query: str = DEFAULT_PRODUCT_QUERY,
+        batch_size: int = 1000,
+        fetch_size: int = 1000,
+        delete_missing: bool = False,
+        run_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Index products directly from PostgreSQL database.
         
         Args:
-            db_connection: Database connection
-            query: SQL query to fetch products
+            db_connection: Optional psycopg2 connection (borrowed from the
+                shared pool when omitted)
+            query: SQL query returning ProductDocument-shaped columns
             batch_size: Batch size for processing
-            
+            fetch_size: Rows fetched per database round trip
+            delete_missing: Treat the query result as the full catalog and
+                delete indexed products that are not part of it
+            run_id: Journal id for the run (generated when omitted)
+        
         Returns:
             Indexing statistics
+        
         """
-        # This would integrate with your existing database
-        # For now, return a placeholder
-        raise NotImplementedError("Database integration pending - use index_products() for now")
+        if not self._initialized:
+            raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        self._check_schema()
+        
+        run = self.journal.start_run(
+            self.table_name, "database", batch_size, delete_missing,
+            query=query, run_id=run_id,
+        )
+        return self._index_database_run(run, db_connection, fetch_size)
     
-    def search(
+    def _index_database_run(
         self,
-        query: str,
-        limit: int = 10,
-        min_score: float = 0.5
-    ) -> List[Dict[str, Any]]:
+        run: IndexingRun,
+        db_connection=None,
+        fetch_size: int = 1000,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """Stream the rows of a database run's query into _index_stream"""
+        if db_connection is None:
+            with pooled_connection() as conn:
+                return self._index_database_run(run, conn, fetch_size, progress)
+        
+        rows = stream_rows(db_connection, run.query, fetch_size=fetch_size)
+        return self._index_stream(self._rows_to_products(rows), run, progress)
+    
+    def _rows_to_products(
+        self,
+        rows: Iterable[Dict[str, Any]]
+    ) -> Iterator[ProductDocument]:
+        """Convert database rows to products, skipping rows that fail validation"""
+        for row in rows:
+            try:
+                values = {
+                    key: value for key, value in row.items()
+                    if key in ProductDocument.model_fields and value is not None
+                }
+                yield ProductDocument(**values)
+            except Exception as e:
+                print(f"Error converting product row {row.get('sku')}: {e}")
+    
+    def refresh_indices(self) -> Dict[str, Any]:
         """
-        Search for products using natural language.
+        Bring the table's search indices up to date after it changed.
+        
+        Returns:
+            Summary per index (vector_index, scalar_indices, and text_index
+            for keyword or hybrid search)
+        
+        """
+        summary = {"vector_index": self.ensure_vector_index()}
+        try:
+            summary["scalar_indices"] = ensure_scalar_indices(self.table)
+        except Exception as e:
+            print(f"Error building scalar indices for {self.table_name}: {e}")
+            summary["scalar_indices"] = {"action": "failed", "error": str(e)}
+        if self.search_type in ("keyword", "hybrid"):
+            try:
+                summary["text_index"] = ensure_text_index(self.table)
+            except Exception as e:
+                print(f"Error building text index for {self.table_name}: {e}")
+                summary["text_index"] = {"action": "failed", "error": str(e)}
+        try:
+            self.table.optimize()
+        except Exception as e:
+            print(f"Error optimizing indices for {self.table_name}: {e}")
+        return summary
+    
+    def ensure_vector_index(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Build or rebuild the ANN indices of the field vector columns (or of
+        their packed sign-bit columns with binary quantization) according
+        to the index policy.
         
         Args:
-            query: Natural language search query
-            limit: Maximum results to return
-            min_score: Minimum similarity score
-            
+            force: Rebuild regardless of thresholds
+        
         Returns:
-            List of matching products with scores
+            Summary of the action taken, per vector column
+        
         """
         if not self._initialized:
             raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        self._check_schema()
         
-        results = self.vector_db.search(query, limit=limit)
-        
-        return [
-            {
-                "text": r.text,
-                "metadata": r.metadata,
-                "score": r.score,
-            }
-            for r in results
-            if r.score >= min_score
-        ]
+        summary = {}
+        for column in self._index_columns():
+            try:
+                summary[column] = ensure_vector_index(
+                    self.table,
+                    self.dimensions,
+                    self.index_policy,
+                    force=force,
+                    column=column,
+                )
+            except Exception as e:
+                print(f"Error building vector index {column} for {self.table_name}: {e}")
+                summary[column] = {"action": "failed", "error": str(e)}
+        return summary
+    
+
+async def _abatched(items: ProductSource, size: int) -> AsyncIterator[List[Any]]:
+    """Yield lists of up to `size` items from a sync or async iterable"""
+    if not isinstance(items, AsyncIterable):
+        for batch in batched(items, size):
+            yield batch
+        return
+    
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _skip_committed(
+    products: Iterable[ProductDocument],
+    run: IndexingRun,
+    seen_ids: Optional[set]
+) -> Iterator[ProductDocument]:
+    """Skip the products consumed by a run's committed batches (still adding them to `seen_ids`)"""
+    iterator = iter(products)
+    position = 0
+    last_id = None
+    for product in itertools.islice(iterator, run.cursor):
+        position += 1
+        last_id = product.id
+        if seen_ids is not None:
+            seen_ids.add(last_id)
+    _check_resume_position(run, position, last_id)
+    yield from iterator
+
+
+async def _askip_committed(
+    products: AsyncIterable[ProductDocument],
+    run: IndexingRun,
+    seen_ids: Optional[set]
+) -> AsyncIterator[ProductDocument]:
+    """Async variant of _skip_committed"""
+    # The cursor keeps advancing while the pipeline commits, so read it once
+    cursor, last_product_id = run.cursor, run.last_product_id
+    position = 0
+    last_id = None
+    async for product in products:
+        if position < cursor:
+            position += 1
+            last_id = product.id
+            if seen_ids is not None:
+                seen_ids.add(last_id)
+            if position == cursor:
+                _check_resume_position(run, position, last_id, cursor, last_product_id)
+            continue
+        yield product
+    if position < cursor:
+        _check_resume_position(run, position, last_id, cursor, last_product_id)
+
+
+def _check_resume_position(
+    run: IndexingRun,
+    position: int,
+    last_id: Optional[str],
+    cursor: Optional[int] = None,
+    last_product_id: Optional[str] = None
+) -> None:
+    """Verify the skipped source ends on the run's last committed product"""
+    if cursor is None:
+        cursor, last_product_id = run.cursor, run.last_product_id
+    if position != cursor or last_id != last_product_id:
+        raise ValueError(
+            f"Source does not match indexing run {run.run_id}: expected product "
+            f"{last_product_id} at position {cursor}, got {last_id} at {position}"
+        )
+
+
+def _merge_stats(stats: Dict[str, int], batch_stats: Dict[str, int]) -> None:
+    """Add a batch's counters to the run counters"""
+    for key, value in batch_stats.items():
+        stats[key] += value
+
+
+def _pending_texts(rendered: List[tuple]) -> List[str]:
+    """Field texts of (product, fields, hashes, vectors) tuples that still need embedding"""
+    return [
+        text
+        for _, fields, _, vectors in rendered
+        for field, texts in fields.items() if field not in vectors
+        for text in texts
+    ]
+
+
+def _assign_vectors(rendered: List[tuple], vectors: List[List[float]]) -> None:
+    """Store the vectors of _pending_texts() back into the tuples' vector dicts"""
+    vectors = iter(vectors)
+    for _, fields, _, field_vectors in rendered:
+        for field, texts in fields.items():
+            if field not in field_vectors:
+                field_vectors[field] = [next(vectors) for _ in texts]
+
+
+def _chunk_id(product_id: str, n: int) -> str:
+    """Row id of a product's n-th chunk (the first chunk uses the product id)"""
+    return product_id if n == 0 else f"{product_id}{CHUNK_SEPARATOR}{n}"
+
+
+def _chunk_number(row_id: str) -> int:
+    """Chunk number of a row id (inverse of _chunk_id)"""
+    _, separator, n = row_id.rpartition(CHUNK_SEPARATOR)
+    return int(n) if separator and n.isdigit() else 0
+
+
+
+def _schema_mismatch(expected: pa.Schema, actual: pa.Schema) -> Optional[str]:
+    """Describe how a stored table's columns differ from the expected schema"""
+    expected_types = {field.name: field.type for field in expected}
+    actual_types = {field.name: field.type for field in actual}
+    problems = []
+    missing = [name for name in expected_types if name not in actual_types]
+    if missing:
+        problems.append(f"missing columns: {', '.join(missing)}")
+    changed = [
+        f"{name} is {actual_types[name]}, expected {expected_types[name]}"
+        for name in expected_types
+        if name in actual_types and actual_types[name] != expected_types[name]
+    ]
+    problems.extend(changed)
+    unexpected = [name for name in actual_types if name not in expected_types]
+    if unexpected:
+        problems.append(f"unexpected columns: {', '.join(unexpected)}")
+    return "; ".join(problems) or None
+
+
+def _content_hash(text: str) -> str:
+    """Stable hash of a product's rendered text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _product_hash(hashes: Dict[str, str]) -> str:
+    """Content hash of a product, combined from its field group hashes"""
+    return _content_hash("".join(hashes[field] for field in VECTOR_COLUMNS))
 
 
 # Convenience function
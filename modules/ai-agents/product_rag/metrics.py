@@ -0,0 +1,184 @@
+"""
+Product Catalog RAG - Indexing Metrics
+
+Per-stage instrumentation of indexing runs: stage timings (render, stored
+state lookup, embedding request, vector write), batch sizes, embedding
+retries, tokens sent and the depth of the queues between pipeline stages.
+
+Each run collects its own IndexingMetrics, summarised in the returned run
+statistics. When prometheus_client is installed the same observations are
+also exported as process-wide Prometheus metrics.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:  # optional dependency
+    Counter = Gauge = Histogram = None
+
+
+STAGES = ("render", "lookup", "embed", "write")
+
+_prometheus: Dict[str, Any] = {}
+_prometheus_lock = threading.Lock()
+
+
+def prometheus_enabled() -> bool:
+    """Whether prometheus_client is available"""
+    return Histogram is not None
+
+
+def _prometheus_metrics() -> Dict[str, Any]:
+    """Create the process-wide Prometheus collectors on first use"""
+    with _prometheus_lock:
+        if not _prometheus and prometheus_enabled():
+            _prometheus.update(
+                stage_seconds=Histogram(
+                    "product_rag_stage_seconds",
+                    "Time spent per indexing batch in each pipeline stage",
+                    ["table", "stage"],
+                    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+                ),
+                batch_size=Histogram(
+                    "product_rag_batch_size",
+                    "Texts per embedding request sent to the embedding provider",
+                    ["table"],
+                    buckets=(1, 10, 25, 50, 100, 250, 500, 1000, 2000),
+                ),
+                retries=Counter(
+                    "product_rag_embedding_retries_total",
+                    "Embedding requests retried after a failure",
+                    ["table"],
+                ),
+                tokens=Counter(
+                    "product_rag_embedding_tokens_total",
+                    "Tokens sent to the embedding provider",
+                    ["table"],
+                ),
+                products=Counter(
+                    "product_rag_products_total",
+                    "Products handled by indexing runs, by outcome",
+                    ["table", "outcome"],
+                ),
+                queue_depth=Gauge(
+                    "product_rag_queue_depth",
+                    "Batches waiting between indexing pipeline stages",
+                    ["table", "queue"],
+                ),
+            )
+        return _prometheus
+
+
+class IndexingMetrics:
+    """
+    Instrumentation of a single indexing run.
+    
+    Thread-safe: the async pipeline records from worker threads and the
+    event loop at the same time.
+    """
+    
+    def __init__(self, table_name: str):
+        """
+        Args:
+            table_name: Table being indexed (Prometheus label)
+        """
+        self.table_name = table_name
+        self.retries = 0
+        self.tokens_sent = 0
+        self._stages: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self._batch_sizes: List[int] = []
+        self._queue_depths: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self._prometheus = _prometheus_metrics()
+    
+    @contextmanager
+    def time_stage(self, stage: str):
+        """Time the enclosed block as one observation of a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - start)
+    
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        """Record the time one batch spent in a stage"""
+        with self._lock:
+            self._stages.setdefault(stage, []).append(seconds)
+        if self._prometheus:
+            self._prometheus["stage_seconds"].labels(self.table_name, stage).observe(seconds)
+    
+    def observe_request(self, inputs: int, tokens: int) -> None:
+        """Record an embedding request of `inputs` texts totalling `tokens` tokens"""
+        with self._lock:
+            self._batch_sizes.append(inputs)
+            self.tokens_sent += tokens
+        if self._prometheus:
+            self._prometheus["batch_size"].labels(self.table_name).observe(inputs)
+            self._prometheus["tokens"].labels(self.table_name).inc(tokens)
+    
+    def observe_retry(self) -> None:
+        """Record a retried embedding request"""
+        with self._lock:
+            self.retries += 1
+        if self._prometheus:
+            self._prometheus["retries"].labels(self.table_name).inc()
+    
+    def observe_queue_depth(self, queue: str, depth: int) -> None:
+        """Record the number of batches waiting in a pipeline queue"""
+        with self._lock:
+            self._queue_depths.setdefault(queue, []).append(depth)
+        if self._prometheus:
+            self._prometheus["queue_depth"].labels(self.table_name, queue).set(depth)
+    
+    def observe_products(self, stats: Dict[str, int]) -> None:
+        """Export a batch's product counters (embedded, skipped, ...)"""
+        if not self._prometheus:
+            return
+        for outcome in ("embedded", "skipped", "updated", "errors"):
+            if stats.get(outcome):
+                self._prometheus["products"].labels(self.table_name, outcome).inc(stats[outcome])
+    
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarise the run's observations.
+        
+        Returns:
+            Stage timings, batch sizes, retries, tokens and queue depths
+        """
+        with self._lock:
+            return {
+                "stages": {
+                    stage: _summarize(values) for stage, values in self._stages.items()
+                },
+                "batch_size": _summarize(self._batch_sizes),
+                "embedding_retries": self.retries,
+                "tokens_sent": self.tokens_sent,
+                "queue_depth": {
+                    queue: _summarize(values) for queue, values in self._queue_depths.items()
+                },
+            }
+
+
+def _summarize(values: List[float]) -> Dict[str, float]:
+    """Count, total, mean, p50, p95 and max of a list of observations"""
+    if not values:
+        return {"count": 0, "total": 0, "mean": 0, "p50": 0, "p95": 0, "max": 0}
+    
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "total": sum(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": _percentile(ordered, 0.50),
+        "p95": _percentile(ordered, 0.95),
+        "max": ordered[-1],
+    }
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted observations"""
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+    return ordered[index]
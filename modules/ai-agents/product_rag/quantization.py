@@ -0,0 +1,65 @@
+"""
+Product Catalog RAG - Vector Quantization
+
+Compact vectors for the first search pass, with the top candidates
+rescored against the full-precision float32 vectors kept on disk:
+
+- "int8": the ANN index stores scalar-quantized int8 codes (IVF_HNSW_SQ)
+  and LanceDB's refine step rescores candidates with the full vectors.
+  The first pass reads 4x less data than float32.
+- "binary": every vector column gets a companion column of packed sign
+  bits (one bit per dimension), searched by Hamming distance; candidates
+  are rescored with exact cosine similarity. 32x less first-pass data.
+"""
+from typing import List
+
+
+NONE = "none"
+INT8 = "int8"
+BINARY = "binary"
+
+# Packed sign-bit column of a vector column: f"{column}{BINARY_SUFFIX}"
+BINARY_SUFFIX = "_bin"
+
+
+def binary_column(column: str) -> str:
+    """Name of the packed sign-bit column of a vector column"""
+    return f"{column}{BINARY_SUFFIX}"
+
+
+def is_binary_column(column: str) -> bool:
+    """Whether a column holds packed sign bits"""
+    return column.endswith(BINARY_SUFFIX)
+
+
+def binary_bytes(dimensions: int) -> int:
+    """Bytes of a packed sign-bit vector (the last byte may be partly used)"""
+    return (dimensions + 7) // 8
+
+
+def binary_quantize(vector: List[float]) -> List[int]:
+    """
+    Pack the signs of a vector into bytes, most significant bit first.
+    
+    Args:
+        vector: Float vector
+        
+    Returns:
+        binary_bytes(len(vector)) byte values
+    """
+    packed = []
+    for start in range(0, len(vector), 8):
+        byte = 0
+        for value in vector[start:start + 8]:
+            byte = (byte << 1) | (value > 0)
+        packed.append(byte)
+    return packed
+
+
+def first_pass_bytes(dimensions: int, quantization: str) -> int:
+    """Bytes per vector read by the first search pass"""
+    if quantization == BINARY:
+        return binary_bytes(dimensions)
+    if quantization == INT8:
+        return dimensions
+    return dimensions * 4
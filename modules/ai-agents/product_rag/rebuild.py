@@ -0,0 +1,190 @@
+"""
+Product Catalog RAG - Table Rebuilds
+
+Full reindexes go into a versioned shadow table while readers keep using
+the live one. Once the shadow table validates, the logical table name's
+alias is switched to it atomically and older versions are dropped.
+"""
+import json
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from shared import list_tables, resolve_table, set_alias
+from .search import result_ids
+
+if TYPE_CHECKING:
+    from .indexer import ProductIndexer, ProductSource
+
+
+# Separates the logical table name from the version suffix of rebuilt tables
+VERSION_SEPARATOR = "__v"
+
+
+class TableRebuildMixin:
+    """Table aliasing and blue/green rebuilds of a ProductIndexer"""
+    
+    def _resolve_physical_name(self) -> str:
+        """Physical table currently behind the logical table name"""
+        if not self.resolve_alias:
+            return self.table_name
+        return resolve_table(self.config.lancedb_uri, self.table_name)
+    
+    def refresh_table(self) -> bool:
+        """
+        Switch to the current physical table if the alias has moved.
+        
+        Returns:
+            True if a different table was opened
+        """
+        physical_name = self._resolve_physical_name()
+        if physical_name == self.physical_table_name:
+            return False
+        self._open_table(physical_name)
+        return True
+    
+    def rebuild(
+        self,
+        products: "ProductSource",
+        batch_size: int = 1000,
+        sample_queries: Optional[List[str]] = None,
+        sample_size: int = 50,
+        min_recall: float = 0.9,
+        min_row_ratio: float = 0.95,
+        keep_previous: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Zero-downtime full reindex into a shadow table, swapped in if it validates.
+        
+        Args:
+            products: Full catalog (iterable or async iterable)
+            batch_size: Number of products per batch
+            sample_queries: Queries whose top results must agree between the
+                live and shadow tables; when omitted (or when the live table
+                has an outdated layout), product names sampled from the
+                shadow table must find their own product
+            sample_size: Number of product names sampled for the recall check
+            min_recall: Minimum recall@10 for the swap to happen
+            min_row_ratio: Minimum shadow/live product count ratio
+            keep_previous: Number of previous table versions to keep
+            
+        Returns:
+            Rebuild statistics, validation results and the swap outcome
+        """
+        if not self._initialized:
+            raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        
+        self.refresh_table()
+        shadow_name = f"{self.table_name}{VERSION_SEPARATOR}{datetime.now():%Y%m%d%H%M%S%f}"
+        shadow = type(self)(
+            table_name=shadow_name,
+            index_policy=self.index_policy,
+            search_type=self.search_type,
+            resolve_alias=False,
+            dimensions=self.dimensions,
+            matryoshka_rerank=self.matryoshka_rerank,
+        )
+        shadow.initialize()
+        index_stats = shadow.index_products(products, batch_size=batch_size)
+        
+        validation = self._validate_shadow(
+            shadow, sample_queries, sample_size, min_recall, min_row_ratio
+        )
+        if not validation["passed"]:
+            self.db.drop_table(shadow_name)
+            return {
+                "swapped": False,
+                "table": shadow_name,
+                "index_stats": index_stats,
+                "validation": validation,
+            }
+        
+        previous = self.physical_table_name
+        set_alias(self.config.lancedb_uri, self.table_name, shadow_name)
+        self.refresh_table()
+        
+        return {
+            "swapped": True,
+            "table": shadow_name,
+            "previous_table": previous,
+            "dropped_tables": self._drop_old_versions(keep_previous),
+            "index_stats": index_stats,
+            "validation": validation,
+        }
+    
+    def _validate_shadow(
+        self,
+        shadow: "ProductIndexer",
+        sample_queries: Optional[List[str]],
+        sample_size: int,
+        min_recall: float,
+        min_row_ratio: float
+    ) -> Dict[str, Any]:
+        """Check a shadow table's product count and search recall"""
+        live_products = _count_products(self.table)
+        shadow_products = _count_products(shadow.table)
+        row_ratio = shadow_products / live_products if live_products else 1.0
+        
+        hits = 0
+        checks = 0
+        # A live table with an outdated layout cannot be searched to compare with
+        if sample_queries and not self.schema_mismatch:
+            for query in sample_queries:
+                expected = result_ids(self.search(query, limit=10, min_score=0.0))
+                if not expected:
+                    continue
+                found = result_ids(shadow.search(query, limit=10, min_score=0.0))
+                hits += len(expected & found) / len(expected)
+                checks += 1
+        else:
+            rows = (
+                shadow.table.search()
+                .select(["product_id", "payload"])
+                .limit(sample_size)
+                .to_list()
+            )
+            for row in rows:
+                name = json.loads(row["payload"])["name"]
+                found = result_ids(shadow.search(name, limit=10, min_score=0.0))
+                hits += row["product_id"] in found
+                checks += 1
+        recall = hits / checks if checks else 1.0
+        
+        return {
+            "passed": row_ratio >= min_row_ratio and recall >= min_recall,
+            "live_products": live_products,
+            "shadow_products": shadow_products,
+            "row_ratio": row_ratio,
+            "recall_at_10": recall,
+            "recall_checks": checks,
+        }
+    
+    def _drop_old_versions(self, keep_previous: int) -> List[str]:
+        """Drop table versions older than the newest `keep_previous` ones"""
+        prefix = f"{self.table_name}{VERSION_SEPARATOR}"
+        table_names = list_tables(self.db)
+        versions = sorted(
+            name for name in table_names
+            if name.startswith(prefix) and name != self.physical_table_name
+        )
+        # The original un-versioned table is the oldest version of all
+        if self.table_name != self.physical_table_name and self.table_name in table_names:
+            versions.insert(0, self.table_name)
+        
+        stale = versions[:max(len(versions) - keep_previous, 0)]
+        for name in stale:
+            self.db.drop_table(name)
+        return stale
+
+
+def _count_products(table) -> int:
+    """Number of distinct products stored in a table (rows for tables without product_id)"""
+    if "product_id" not in table.schema.names:
+        return table.count_rows()
+    ids = (
+        table.search()
+        .select(["product_id"])
+        .limit(table.count_rows())
+        .to_arrow()
+        .column("product_id")
+    )
+    return len(set(ids.to_pylist()))
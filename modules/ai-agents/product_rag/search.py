@@ -0,0 +1,512 @@
+"""
+Product Catalog RAG - Search
+
+Name, specs and description are embedded into separate vector columns.
+A query is classified (SKU-like, spec-like or descriptive), each weighted
+column is searched and the per-field similarities are fused with that
+query type's weights; chunk rows are collapsed to one hit per product.
+In hybrid mode the fused vector ranking and the BM25 keyword ranking are
+combined with reciprocal-rank fusion.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pyarrow as pa
+
+from shared.batching import batched
+from shared.embeddings import embed_batch
+from .fields import VECTOR_COLUMNS, classify_query, field_weights
+from .filters import ProductFilters, sql_in
+from .quantization import BINARY, INT8, binary_column, binary_quantize, first_pass_bytes
+from .volatile import VOLATILE_FIELDS
+
+
+# Columns read back for search results (skips the vector column)
+RESULT_COLUMNS = ["id", "product_id", "payload", *VOLATILE_FIELDS]
+
+# Reciprocal-rank fusion constant; 60 is the value from the original RRF paper
+RRF_K = 60
+
+
+class ProductSearchMixin:
+    """Product search of a ProductIndexer"""
+    
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        min_score: float = 0.5,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        search_type: Optional[str] = None,
+        filters: Optional[ProductFilters] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for products using natural language.
+        
+        Args:
+            query: Natural language search query
+            limit: Maximum results to return
+            min_score: Minimum fused vector score (keyword hits are always kept)
+            nprobes: IVF partitions to probe (higher = better recall, slower)
+            refine_factor: Re-rank `limit * refine_factor` candidates with
+                full vectors to recover precision lost to quantization
+            search_type: "vector" or "hybrid" (defaults to the indexer's)
+            filters: Optional structured filters (category, brand, price
+                range, in-stock only)
+            
+        Returns:
+            List of matching products with scores
+        """
+        if not self._initialized:
+            raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        
+        self.refresh_table()
+        self._check_schema()
+        query_vector = self.embedder.get_embedding(query)
+        return self._search_with_vector(
+            query,
+            query_vector,
+            limit=limit,
+            min_score=min_score,
+            nprobes=nprobes,
+            refine_factor=refine_factor,
+            search_type=search_type,
+            filters=filters,
+        )
+    
+    def search_many(
+        self,
+        queries: List[str],
+        limit: int = 10,
+        filters: Optional[ProductFilters] = None,
+        min_score: float = 0.5,
+        search_type: Optional[str] = None,
+        embed_batch_size: int = 256,
+        max_workers: int = 8
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for many queries with batched embedding and parallel table searches.
+        
+        Args:
+            queries: Natural language search queries
+            limit: Maximum results per query
+            filters: Optional structured filters applied to every query
+            min_score: Minimum similarity score
+            search_type: "vector" or "hybrid" (defaults to the indexer's)
+            embed_batch_size: Queries per embedding request
+            max_workers: Concurrent table searches
+            
+        Returns:
+            One result list per query, aligned with `queries`
+        """
+        if not self._initialized:
+            raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        if not queries:
+            return []
+        
+        self.refresh_table()
+        self._check_schema()
+        vectors: List[List[float]] = []
+        for batch in batched(queries, embed_batch_size):
+            if hasattr(self.embedder, "embed_queries"):
+                vectors.extend(self.embedder.embed_queries(batch))
+            else:
+                vectors.extend(embed_batch(self.embedder, batch))
+        
+        def run(i: int) -> List[Dict[str, Any]]:
+            return self._search_with_vector(
+                queries[i],
+                vectors[i],
+                limit=limit,
+                min_score=min_score,
+                search_type=search_type,
+                filters=filters,
+            )
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as pool:
+            return list(pool.map(run, range(len(queries))))
+    
+    def measure_recall(
+        self,
+        queries: List[str],
+        limit: int = 10,
+        filters: Optional[ProductFilters] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Measure the recall@k lost to ANN indices and vector quantization.
+        
+        Args:
+            queries: Sample of representative search queries
+            limit: k
+            filters: Optional structured filters applied to every query
+            nprobes: IVF partitions to probe
+            refine_factor: Refine factor of the approximate search
+            
+        Returns:
+            Mean and minimum recall@k, and bytes per vector read by the
+            first pass vs. full precision
+        """
+        if not self._initialized:
+            raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        
+        self.refresh_table()
+        self._check_schema()
+        vectors: List[List[float]] = []
+        for batch in batched(queries, 256):
+            vectors.extend(embed_batch(self.embedder, batch))
+        
+        recalls = []
+        for query, vector in zip(queries, vectors):
+            search = dict(
+                query=query,
+                query_vector=vector,
+                limit=limit,
+                min_score=-1.0,
+                search_type="vector",
+                filters=filters,
+            )
+            expected = result_ids(self._search_with_vector(**search, exact=True))
+            if not expected:
+                continue
+            found = result_ids(self._search_with_vector(
+                **search, nprobes=nprobes, refine_factor=refine_factor
+            ))
+            recalls.append(len(expected & found) / len(expected))
+        
+        dimensions = self.dimensions
+        return {
+            "quantization": self.index_policy.quantization,
+            "k": limit,
+            "queries": len(recalls),
+            "recall": sum(recalls) / len(recalls) if recalls else None,
+            "min_recall": min(recalls) if recalls else None,
+            "first_pass_bytes_per_vector": first_pass_bytes(dimensions, self.index_policy.quantization),
+            "full_bytes_per_vector": dimensions * 4,
+        }
+    
+    def _search_with_vector(
+        self,
+        query: str,
+        query_vector: List[float],
+        limit: int,
+        min_score: float,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        search_type: Optional[str] = None,
+        filters: Optional[ProductFilters] = None,
+        exact: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Run search() for an already embedded query (`exact` bypasses indices and quantization)"""
+        hybrid = (search_type or self.search_type) == "hybrid"
+        candidates = limit * 2 if hybrid else limit
+        pool = candidates
+        if self.matryoshka_rerank:
+            pool = candidates * max(self.config.vector_rescore_factor, 1)
+        search_vector = self._search_vector(query_vector)
+        # Chunk rows are collapsed per product, so fetch a fixed multiple
+        overfetch = 1
+        if self.config.product_chunk_tokens > 0:
+            overfetch = max(self.config.product_chunk_overfetch, 1)
+        where = filters.to_where() if filters else None
+        
+        weights = {
+            field: weight
+            for field, weight in field_weights(
+                classify_query(query), self.config.product_field_weights
+            ).items()
+            if weight > 0 and field in VECTOR_COLUMNS
+        }
+        legs = {
+            field: self._aggregate_field(
+                field,
+                self._field_hits(
+                    field,
+                    search_vector,
+                    pool * (overfetch if field == "description" else 1),
+                    where,
+                    nprobes,
+                    refine_factor,
+                    exact,
+                    score_fields=[other for other in weights if other != field],
+                ),
+            )[:pool]
+            for field in weights
+        }
+        
+        fused = self._fuse_fields(legs, weights)
+        if self.matryoshka_rerank and fused:
+            fused = self._rerank_full(query_vector, fused, weights)
+        vector_hits = [
+            (row, score) for row, score in fused if score >= min_score
+        ][:candidates]
+        
+        if not hybrid:
+            return [self._to_result(row, score) for row, score in vector_hits]
+        
+        keyword_builder = (
+            self.table.search(query, query_type="fts")
+            .select([*RESULT_COLUMNS, "_score"])
+            .limit(candidates * overfetch)
+        )
+        if where:
+            keyword_builder = keyword_builder.where(where, prefilter=True)
+        try:
+            keyword_hits = keyword_builder.to_list()
+        except ValueError as e:
+            # No full-text index yet (table built for vector search only)
+            if "INVERTED index" not in str(e):
+                raise
+            return [self._to_result(row, score) for row, score in vector_hits[:limit]]
+        keyword_rows = [
+            row for row, _ in _aggregate_chunks([(row, 0.0) for row in keyword_hits])
+        ][:candidates]
+        rankings = [[row for row, _ in vector_hits], keyword_rows]
+        return [
+            self._to_result(row, score)
+            for row, score in _reciprocal_rank_fusion(rankings)[:limit]
+        ]
+    
+    def _field_hits(
+        self,
+        field: str,
+        query_vector: List[float],
+        limit: int,
+        where: Optional[str],
+        nprobes: Optional[int],
+        refine_factor: Optional[int],
+        exact: bool,
+        score_fields: Sequence[str] = ()
+    ) -> List[tuple]:
+        """Nearest (row, cosine similarity) pairs of one field group's vector column"""
+        column = VECTOR_COLUMNS[field]
+        score_columns = {other: VECTOR_COLUMNS[other] for other in score_fields}
+        quantization = self.index_policy.quantization
+        rescore_factor = max(self.config.vector_rescore_factor, 1)
+        binary = quantization == BINARY and not exact
+        
+        if binary:
+            # Hamming first pass over the packed sign bits; the candidates are
+            # rescored with exact cosine similarity below
+            builder = (
+                self.table.search(
+                    binary_quantize(query_vector), vector_column_name=binary_column(column)
+                )
+                .metric("hamming")
+                .select([*RESULT_COLUMNS, column, *score_columns.values(), "_distance"])
+                .limit(limit * rescore_factor)
+            )
+        else:
+            builder = (
+                self.table.search(query_vector, vector_column_name=column)
+                .metric("cosine")
+                .select([*RESULT_COLUMNS, *score_columns.values(), "_distance"])
+                .limit(limit)
+            )
+            if exact:
+                builder = builder.bypass_vector_index()
+            elif quantization == INT8 and not refine_factor:
+                # The index holds int8 codes; refine rescores with the full vectors
+                refine_factor = rescore_factor
+        if where:
+            builder = builder.where(where, prefilter=True)
+        if nprobes and not exact:
+            builder = builder.nprobes(nprobes)
+        if refine_factor and not exact:
+            builder = builder.refine_factor(refine_factor)
+        
+        found = builder.to_arrow()
+        if binary:
+            scores = _cosine_scores(query_vector, _vector_array(found.column(column)))
+        else:
+            scores = 1.0 - found.column("_distance").to_numpy()
+        # Other fields' vectors come back with the hits so _fuse_fields can
+        # score every candidate on every field without reading the table again
+        other_scores = {
+            other: _cosine_scores(query_vector, _vector_array(found.column(other_column)))
+            for other, other_column in score_columns.items()
+        }
+        
+        order = np.argsort(-scores, kind="stable")[:limit]
+        rows = found.select(RESULT_COLUMNS).to_pylist()
+        hits = []
+        for i in order:
+            row = rows[i]
+            row["_scores"] = {other: float(values[i]) for other, values in other_scores.items()}
+            hits.append((row, float(scores[i])))
+        return hits
+    
+    def _aggregate_field(self, field: str, hits: List[tuple]) -> List[tuple]:
+        """Collapse one field group's hits to one per product"""
+        if field != "description":
+            return _aggregate_chunks(hits)
+        return _aggregate_chunks(
+            hits,
+            self.config.product_chunk_aggregation,
+            self.config.product_chunk_top_m,
+        )
+    
+    def _fuse_fields(
+        self,
+        legs: Dict[str, List[tuple]],
+        weights: Dict[str, float]
+    ) -> List[tuple]:
+        """Fuse per-field (row, score) hits into one weighted score per product"""
+        rows: Dict[str, Dict[str, Any]] = {}
+        scores: Dict[str, Dict[str, float]] = {}
+        returned: Dict[str, Dict[str, float]] = {}
+        for field, hits in legs.items():
+            for row, score in hits:
+                product_id = row["product_id"]
+                rows.setdefault(product_id, row)
+                scores.setdefault(product_id, {})[field] = score
+                best = returned.setdefault(product_id, {})
+                for other, other_score in row.get("_scores", {}).items():
+                    best[other] = max(best.get(other, other_score), other_score)
+        
+        # A candidate missed by a leg takes that field's score from the vectors
+        # returned with it by the other legs (a lower bound for chunked fields)
+        total = sum(weights[field] for field in legs) or 1.0
+        fused = [
+            (
+                rows[product_id],
+                sum(
+                    weights[field] * field_scores.get(
+                        field, returned[product_id].get(field, 0.0)
+                    )
+                    for field in legs
+                ) / total,
+            )
+            for product_id, field_scores in scores.items()
+        ]
+        fused.sort(key=lambda hit: hit[1], reverse=True)
+        return fused
+    
+    def _rerank_full(
+        self,
+        query_vector: List[float],
+        hits: List[tuple],
+        weights: Dict[str, float]
+    ) -> List[tuple]:
+        """Rescore fused hits with the full-size vectors (Matryoshka rerank)"""
+        scores = self._field_scores(
+            query_vector, [row["product_id"] for row, _ in hits], list(weights), full=True
+        )
+        total = sum(weights.values()) or 1.0
+        reranked = [
+            (
+                row,
+                sum(
+                    weight * scores.get(row["product_id"], {}).get(field, 0.0)
+                    for field, weight in weights.items()
+                ) / total,
+            )
+            for row, _ in hits
+        ]
+        reranked.sort(key=lambda hit: hit[1], reverse=True)
+        return reranked
+    
+    def _field_scores(
+        self,
+        query_vector: List[float],
+        product_ids: List[str],
+        fields: List[str],
+        full: bool = False
+    ) -> Dict[str, Dict[str, float]]:
+        """Exact cosine similarity of products' stored field vectors to a query"""
+        columns = {
+            field: self._embedded_column(field) if full else VECTOR_COLUMNS[field]
+            for field in fields
+        }
+        stored = (
+            self.table.search()
+            .where(sql_in("product_id", product_ids))
+            .select(["product_id", *columns.values()])
+            .limit(len(product_ids) * max(self.config.product_max_chunks, 1))
+            .to_arrow()
+        )
+        rows = [{"product_id": product_id} for product_id in stored.column("product_id").to_pylist()]
+        
+        scores: Dict[str, Dict[str, float]] = {}
+        for field in fields:
+            field_scores = _cosine_scores(query_vector, _vector_array(stored.column(columns[field])))
+            order = np.argsort(-field_scores, kind="stable")
+            field_hits = [(rows[i], float(field_scores[i])) for i in order]
+            for row, score in self._aggregate_field(field, field_hits):
+                scores.setdefault(row["product_id"], {})[field] = score
+        return scores
+    
+    def _to_result(self, row: Dict[str, Any], score: float) -> Dict[str, Any]:
+        """Convert a table row to a search result"""
+        payload = json.loads(row["payload"])
+        metadata = dict(payload["meta_data"])
+        for field in VOLATILE_FIELDS:
+            metadata[field] = row.get(field)
+        return {
+            "text": payload["content"],
+            "metadata": metadata,
+            "score": score,
+        }
+
+
+def _aggregate_chunks(
+    hits: List[tuple],
+    mode: str = "max",
+    top_m: int = 2
+) -> List[tuple]:
+    """Collapse chunk hits to one per product, scored by its best chunk or best `top_m` chunks"""
+    by_product: Dict[str, List[tuple]] = {}
+    for row, score in hits:
+        by_product.setdefault(row["product_id"], []).append((row, score))
+    
+    aggregated = []
+    for product_hits in by_product.values():
+        if mode == "top_m":
+            score = sum(score for _, score in product_hits[:top_m])
+        else:
+            score = product_hits[0][1]
+        aggregated.append((product_hits[0][0], score))
+    aggregated.sort(key=lambda hit: hit[1], reverse=True)
+    return aggregated
+
+
+def _vector_array(column: Union[pa.Array, pa.ChunkedArray]) -> np.ndarray:
+    """A vector column as a (rows, dimensions) float32 array"""
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    values = column.flatten().to_numpy(zero_copy_only=False).astype(np.float32, copy=False)
+    return values.reshape(len(column), -1) if len(column) else values.reshape(0, 0)
+
+
+def _cosine_scores(query_vector: List[float], vectors: np.ndarray) -> np.ndarray:
+    """Cosine similarity of each row of `vectors` to a query vector"""
+    if not len(vectors):
+        return np.zeros(0, dtype=np.float32)
+    query = np.asarray(query_vector, dtype=np.float32)
+    dots = vectors @ query
+    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
+
+def _reciprocal_rank_fusion(rankings: List[List[Dict[str, Any]]]) -> List[tuple]:
+    """Fuse ranked row lists by product_id (a product first in every list scores 1.0)"""
+    scores: Dict[str, float] = {}
+    rows: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            key = row["product_id"]
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+            rows.setdefault(key, row)
+    
+    best = len(rankings) / (RRF_K + 1)
+    ordered = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(rows[key], score / best) for key, score in ordered]
+
+
+def result_ids(results: List[Dict[str, Any]]) -> set:
+    """Product ids of a list of search results"""
+    return {result["metadata"]["product_id"] for result in results}
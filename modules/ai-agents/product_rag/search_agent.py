@@ -5,16 +5,19 @@ Natural language search for products using RAG.
 Supports complex queries like "LED panels for office, 60x60, warm white, under €50"
 """
 from textwrap import dedent
-from typing import List, Dict, Any, Optional
+from typing import Dict, Any, Optional
 from pydantic import BaseModel
 
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
 from agno.models.google import Gemini
 from agno.tools.reasoning import ReasoningTools
+from agno.vectordb.lancedb import SearchType
 
 from config import get_config
 from shared import create_knowledge_base
+from .filters import ProductFilters
+from .indexer import ProductIndexer
 
 
 class ProductSearchResult(BaseModel):
@@ -40,13 +43,18 @@ class ProductSearchAgent:
         self.config = get_config()
         self.use_gemini = use_gemini
         self.knowledge = None
+        self.indexer = None
         self.agent = None
         self._initialized = False
     
     def initialize(self) -> None:
         """Initialize the search agent"""
+        # Direct access to the catalog table for filtered retrieval
+        self.indexer = ProductIndexer(table_name="product_catalog")
+        self.indexer.initialize()
+        
         # Use existing product catalog knowledge base
-        self.knowledge = create_knowledge_base(table_name="product_catalog")
+        self.knowledge = self._create_knowledge()
         
         # Select model
         if self.use_gemini and self.config.has_google:
@@ -92,21 +100,46 @@ class ProductSearchAgent:
         
         self._initialized = True
     
+    def _create_knowledge(self):
+        """Knowledge base over the table currently behind product_catalog"""
+        # Hybrid search by default so SKUs and exact terms like "IP65"
+        # match by keyword
+        return create_knowledge_base(
+            table_name="product_catalog",
+            search_type=SearchType(self.config.product_search_type),
+            dimensions=self.indexer.dimensions,
+        )
+    
+    def _refresh_catalog(self) -> None:
+        """Follow a blue/green catalog rebuild that swapped the live table"""
+        if self.indexer.refresh_table():
+            self.knowledge = self._create_knowledge()
+            self.agent.knowledge = self.knowledge
+    
     def search(
         self,
         query: str,
         max_results: int = 10,
         price_max: Optional[float] = None,
-        category: Optional[str] = None
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        price_min: Optional[float] = None,
+        in_stock_only: bool = False
     ) -> Dict[str, Any]:
         """
         Search for products using natural language.
         
+        Structured filters are applied by LanceDB on the stored metadata
+        columns; the agent only ranks and explains the matching products.
+        
         Args:
             query: Natural language search query
             max_results: Maximum results to return
             price_max: Optional maximum price filter
             category: Optional category filter
+            brand: Optional brand filter
+            price_min: Optional minimum price filter
+            in_stock_only: Only return products with stock
             
         Returns:
             Search results with products and reasoning
@@ -114,13 +147,29 @@ class ProductSearchAgent:
         if not self._initialized:
             raise RuntimeError("Agent not initialized. Call initialize() first.")
         
-        # Build enhanced query with filters
-        enhanced_query = query
-        if price_max:
-            enhanced_query += f" with maximum price €{price_max}"
-        if category:
-            enhanced_query += f" in category {category}"
-        enhanced_query += f". Return up to {max_results} products."
+        self._refresh_catalog()
+        filters = ProductFilters(
+            category=category,
+            brand=brand,
+            price_min=price_min,
+            price_max=price_max,
+            in_stock_only=in_stock_only,
+        )
+        products = self.indexer.search(
+            query, limit=max_results, min_score=0.0, filters=filters
+        )
+        
+        # Hand the pre-filtered candidates to the agent for ranking
+        candidates = "\n\n".join(
+            _candidate_text(product) for product in products
+        )
+        enhanced_query = (
+            f"{query}\n\n"
+            "Candidate products (already filtered to match the constraints):\n\n"
+            f"{candidates or '(no matching products)'}\n\n"
+            "Rank these products and explain why each matches. "
+            "Only recommend products from this list."
+        )
         
         # Run agent
         response = self.agent.run(enhanced_query, stream=False)
@@ -128,6 +177,8 @@ class ProductSearchAgent:
         return {
             "query": query,
             "enhanced_query": enhanced_query,
+            "filters": filters.model_dump(exclude_defaults=True),
+            "products": products,
             "results": response.content,
             "max_results": max_results,
         }
@@ -137,10 +188,23 @@ class ProductSearchAgent:
         if not self._initialized:
             raise RuntimeError("Agent not initialized. Call initialize() first.")
         
+        self._refresh_catalog()
         response = self.agent.run(query, stream=False)
         return response.content
 
 
+def _candidate_text(product: Dict[str, Any]) -> str:
+    """Product text plus the live price and stock columns"""
+    metadata = product["metadata"]
+    price = metadata.get("b2b_price")
+    price_text = f"€{price:.2f}" if price is not None else "Contact for pricing"
+    return (
+        f"{product['text']}\n"
+        f"B2B Price: {price_text}\n"
+        f"Stock: {metadata.get('stock', 0)} units"
+    )
+
+
 # Convenience function
 def create_search_agent(use_gemini: bool = True) -> ProductSearchAgent:
     """Create and initialize a product search agent"""
@@ -0,0 +1,313 @@
+"""
+Product Catalog RAG - Synthetic Catalog
+
+Deterministic generator of realistic LED-lighting ProductDocuments for
+benchmarks and tests: category mix, brand popularity, power / lumen /
+colour temperature / IP specs, log-normal prices, sparse stock, and
+Romanian or English names and descriptions (a few long enough to be
+chunked). Product i is the same for a given seed regardless of how many
+products are generated, so catalogs of 10k, 100k and 1M share a prefix.
+"""
+import random
+from typing import Any, Dict, Iterator, List
+
+from .indexer import ProductDocument
+
+
+# Category, SKU code, share of the catalog, product noun (ro, en), typical
+# power ratings, IP ratings, category-specific specs and median retail price (RON)
+CATEGORIES: List[Dict[str, Any]] = [
+    {
+        "category": "Panouri LED", "code": "PNL", "share": 0.18,
+        "subcategories": ["Incastrate", "Aparente", "Backlit"],
+        "noun": ("Panou LED", "LED panel"),
+        "power": [18, 24, 36, 40, 48, 60], "ip": ["IP20", "IP40", "IP44"],
+        "extra": {("Dimensiuni", "Size"): ["60x60 cm", "30x120 cm", "30x30 cm", "60x120 cm"]},
+        "price": 85.0,
+    },
+    {
+        "category": "Becuri LED", "code": "BEC", "share": 0.24,
+        "subcategories": ["Standard", "Filament", "Smart"],
+        "noun": ("Bec LED", "LED bulb"),
+        "power": [4, 5, 7, 9, 10, 12, 15], "ip": ["IP20"],
+        "extra": {
+            ("Soclu", "Socket"): ["E27", "E14", "GU10", "G9", "GU5.3"],
+            ("Forma", "Shape"): ["A60", "C37", "G45", "R50", "ST64"],
+        },
+        "price": 14.0,
+    },
+    {
+        "category": "Benzi LED", "code": "BND", "share": 0.14,
+        "subcategories": ["Monocolor", "RGB", "RGBW", "COB"],
+        "noun": ("Banda LED", "LED strip"),
+        "power": [4.8, 7.2, 9.6, 14.4, 19.2], "ip": ["IP20", "IP65", "IP67"],
+        "extra": {
+            ("Tensiune", "Voltage"): ["12V", "24V"],
+            ("LED-uri pe metru", "LEDs per metre"): ["60", "120", "240"],
+        },
+        "price": 38.0,
+    },
+    {
+        "category": "Proiectoare LED", "code": "PRO", "share": 0.12,
+        "subcategories": ["Slim", "Cu senzor", "Industriale"],
+        "noun": ("Proiector LED", "LED floodlight"),
+        "power": [10, 20, 30, 50, 100, 150, 200], "ip": ["IP65", "IP66"],
+        "extra": {("Unghi fascicul", "Beam angle"): ["90°", "100°", "120°"]},
+        "price": 120.0,
+    },
+    {
+        "category": "Spoturi LED", "code": "SPT", "share": 0.14,
+        "subcategories": ["Incastrate", "Aplicate", "Pe sina"],
+        "noun": ("Spot LED", "LED spotlight"),
+        "power": [5, 7, 10, 15, 20, 30], "ip": ["IP20", "IP44", "IP65"],
+        "extra": {("Unghi fascicul", "Beam angle"): ["24°", "36°", "60°"]},
+        "price": 45.0,
+    },
+    {
+        "category": "Corpuri liniare", "code": "LIN", "share": 0.08,
+        "subcategories": ["Etanse", "Suspendate", "Profile aluminiu"],
+        "noun": ("Corp liniar LED", "LED linear luminaire"),
+        "power": [18, 36, 40, 50, 60], "ip": ["IP20", "IP65"],
+        "extra": {("Lungime", "Length"): ["60 cm", "120 cm", "150 cm"]},
+        "price": 95.0,
+    },
+    {
+        "category": "Iluminat stradal", "code": "STR", "share": 0.04,
+        "subcategories": ["Stradal", "Parcuri", "Solar"],
+        "noun": ("Lampa stradala LED", "LED street light"),
+        "power": [30, 50, 80, 100, 150, 200], "ip": ["IP66"],
+        "extra": {("Diametru brat", "Arm diameter"): ["48 mm", "60 mm"]},
+        "price": 450.0,
+    },
+    {
+        "category": "Surse de alimentare", "code": "SRS", "share": 0.06,
+        "subcategories": ["Interior", "Exterior", "Dimabile"],
+        "noun": ("Sursa alimentare LED", "LED driver"),
+        "power": [36, 60, 100, 150, 200, 350], "ip": ["IP20", "IP67"],
+        "extra": {("Tensiune iesire", "Output voltage"): ["12V", "24V"]},
+        "price": 70.0,
+        "driver": True,
+    },
+]
+
+# Brand, SKU prefix, relative popularity, price factor
+BRANDS = [
+    ("V-TAC", "VTC", 30, 0.85),
+    ("Optonica", "OPT", 18, 0.80),
+    ("Ledvance", "LDV", 14, 1.10),
+    ("Philips", "PHL", 12, 1.30),
+    ("Osram", "OSR", 9, 1.25),
+    ("Kanlux", "KNL", 7, 1.00),
+    ("Aca Lighting", "ACA", 5, 1.05),
+    ("Braytron", "BRY", 3, 0.90),
+    ("Eglo", "EGL", 2, 1.40),
+]
+
+COLOR_TEMPERATURES = [("2700K", 0.2), ("3000K", 0.25), ("4000K", 0.35), ("6500K", 0.2)]
+
+USES = {
+    "ro": ["birouri", "spatii comerciale", "depozite", "hale industriale", "locuinte",
+           "scoli", "parcari", "fatade", "magazine", "hoteluri"],
+    "en": ["offices", "retail spaces", "warehouses", "industrial halls", "homes",
+           "schools", "car parks", "facades", "shops", "hotels"],
+}
+
+SENTENCES = {
+    "ro": [
+        "{noun} {brand} de {power}, ideal pentru {use}.",
+        "Ofera un flux luminos de {lumens} si o temperatura de culoare de {cct}.",
+        "Gradul de protectie {ip} permite utilizarea in {use}.",
+        "Consum redus de energie si durata de viata de pana la {life} ore.",
+        "Indice de redare a culorilor {cri}, lumina uniforma fara palpaire.",
+        "Carcasa din aluminiu asigura o disipare eficienta a caldurii.",
+        "Montaj rapid, compatibil cu instalatiile existente.",
+        "Beneficiaza de garantie {warranty} ani de la producator.",
+        "Produsul respecta standardele europene CE si RoHS.",
+        "Recomandat pentru proiecte de modernizare a iluminatului in {use}.",
+    ],
+    "en": [
+        "{brand} {noun} rated at {power}, ideal for {use}.",
+        "Delivers {lumens} of luminous flux at a colour temperature of {cct}.",
+        "The {ip} protection rating makes it suitable for {use}.",
+        "Low energy consumption and a lifetime of up to {life} hours.",
+        "Colour rendering index {cri}, uniform flicker-free light.",
+        "The aluminium housing provides efficient heat dissipation.",
+        "Quick installation, compatible with existing fittings.",
+        "Covered by a {warranty}-year manufacturer warranty.",
+        "Compliant with European CE and RoHS standards.",
+        "Recommended for lighting retrofit projects in {use}.",
+    ],
+}
+
+SPEC_NAMES = {
+    "power": ("Putere", "Power"),
+    "lumens": ("Flux luminos", "Luminous flux"),
+    "cct": ("Temperatura culoare", "Colour temperature"),
+    "ip": ("Grad protectie", "IP rating"),
+    "cri": ("CRI", "CRI"),
+    "life": ("Durata de viata", "Lifetime"),
+}
+
+
+def generate_product(
+    index: int,
+    seed: int = 42,
+    english_share: float = 0.3,
+    long_share: float = 0.05
+) -> ProductDocument:
+    """
+    Generate the `index`-th product of a synthetic catalog.
+    
+    Args:
+        index: Position in the catalog (also makes id and SKU unique)
+        seed: Catalog seed
+        english_share: Fraction of products written in English
+        long_share: Fraction of products with a long description
+        
+    Returns:
+        Product document
+    """
+    rng = random.Random(f"{seed}:{index}")
+    lang = "en" if rng.random() < english_share else "ro"
+    li = 0 if lang == "ro" else 1
+    
+    spec = rng.choices(CATEGORIES, weights=[c["share"] for c in CATEGORIES])[0]
+    brand, brand_code, _, brand_factor = rng.choices(BRANDS, weights=[b[2] for b in BRANDS])[0]
+    power = rng.choice(spec["power"])
+    unit = "W/m" if spec["code"] == "BND" else "W"
+    power_text = f"{power:g}{unit}"
+    cct = rng.choices(
+        [c for c, _ in COLOR_TEMPERATURES], weights=[w for _, w in COLOR_TEMPERATURES]
+    )[0]
+    ip = rng.choice(spec["ip"])
+    lumens = f"{int(power * rng.gauss(110, 18)):d} lm"
+    cri = ">90" if rng.random() < 0.15 else ">80"
+    life = rng.choice(["25000", "30000", "50000"])
+    warranty = rng.choice(["2", "3", "5"])
+    use = rng.choice(USES[lang])
+    
+    specs: Dict[str, Any] = {
+        SPEC_NAMES["power"][li]: power_text,
+        SPEC_NAMES["ip"][li]: ip,
+    }
+    if not spec.get("driver"):
+        specs[SPEC_NAMES["lumens"][li]] = lumens
+        specs[SPEC_NAMES["cct"][li]] = cct
+        specs[SPEC_NAMES["cri"][li]] = cri
+        specs[SPEC_NAMES["life"][li]] = f"{life} h"
+    extras = []
+    for names, values in spec["extra"].items():
+        value = rng.choice(values)
+        specs[names[li]] = value
+        extras.append(value)
+    
+    noun = spec["noun"][li]
+    name_parts = [noun, brand, power_text, *extras[:1]]
+    if not spec.get("driver"):
+        name_parts.append(cct)
+    name_parts.append(ip)
+    
+    fields = dict(
+        noun=noun, brand=brand, power=power_text,
+        use=use, lumens=lumens, cct=cct, ip=ip, life=life, cri=cri, warranty=warranty,
+    )
+    sentences = SENTENCES[lang]
+    length = rng.randint(15, 40) if rng.random() < long_share else rng.randint(2, 6)
+    if length <= len(sentences):
+        picked = rng.sample(sentences, k=length)
+    else:
+        picked = rng.choices(sentences, k=length)
+    description = " ".join(sentence.format(**fields) for sentence in picked)
+    
+    retail = (
+        spec["price"]
+        * (power / sorted(spec["power"])[len(spec["power"]) // 2]) ** 0.6
+        * brand_factor
+        * rng.lognormvariate(0, 0.35)
+    )
+    stock = 0 if rng.random() < 0.15 else min(int(rng.paretovariate(1.2) * 10), 5000)
+    
+    tags = [spec["code"].lower(), ip.lower(), use]
+    if not spec.get("driver"):
+        tags.append(cct)
+    if rng.random() < 0.2:
+        tags.append("dimabil" if lang == "ro" else "dimmable")
+    if rng.random() < 0.05:
+        tags.append("smart")
+    
+    return ProductDocument(
+        id=f"syn-{index:07d}",
+        sku=f"{spec['code']}-{brand_code}-{power:g}W-{index:06d}",
+        name=" ".join(name_parts),
+        description=description,
+        category=spec["category"],
+        subcategory=rng.choice(spec["subcategories"]),
+        specs=specs,
+        b2b_price=round(retail * rng.uniform(0.68, 0.85), 2),
+        retail_price=round(retail, 2),
+        stock=stock,
+        brand=brand,
+        tags=tags,
+    )
+
+
+def generate_catalog(
+    count: int,
+    seed: int = 42,
+    start: int = 0,
+    english_share: float = 0.3,
+    long_share: float = 0.05
+) -> Iterator[ProductDocument]:
+    """
+    Lazily generate a synthetic LED catalog.
+    
+    Args:
+        count: Number of products
+        seed: Catalog seed
+        start: Index of the first product (for shards or appends)
+        english_share: Fraction of products written in English
+        long_share: Fraction of products with a long description
+        
+    Yields:
+        Product documents
+    """
+    for index in range(start, start + count):
+        yield generate_product(index, seed, english_share, long_share)
+
+
+def generate_queries(
+    count: int,
+    catalog_size: int,
+    seed: int = 42,
+    english_share: float = 0.3
+) -> List[str]:
+    """
+    Generate search queries against a synthetic catalog.
+    
+    A mix of SKU lookups, spec queries and descriptive questions, built
+    from products that exist in the catalog of the given size.
+    
+    Args:
+        count: Number of queries
+        catalog_size: Size of the generated catalog
+        seed: Catalog seed
+        english_share: Fraction of products written in English
+        
+    Returns:
+        Search queries
+    """
+    rng = random.Random(f"{seed}:queries")
+    queries = []
+    for _ in range(count):
+        product = generate_product(rng.randrange(catalog_size), seed, english_share)
+        kind = rng.random()
+        if kind < 0.2:
+            queries.append(product.sku)
+        elif kind < 0.6:
+            values = [str(v) for v in product.specs.values()]
+            picked = rng.sample(values, k=min(len(values), rng.randint(1, 3)))
+            queries.append(" ".join([product.name.split(" ")[0], *picked]).lower())
+        else:
+            sentence = rng.choice(product.description.split(". "))
+            queries.append(sentence.rstrip("."))
+    return queries
@@ -0,0 +1,260 @@
+"""
+Product Catalog RAG - Vector Index Lifecycle
+
+Builds and maintains the ANN index of a LanceDB product table. Index
+parameters are derived from the row count, and the index is rebuilt once
+too many rows have been appended since it was last updated (smaller
+appends are folded in by table.optimize()). Also builds the scalar
+indices behind search filters and the full-text index used by hybrid
+search.
+"""
+import math
+from typing import Any, Dict, List, Optional
+
+from lancedb.index import FTS, Bitmap, BTree, HnswSq, IvfFlat, IvfPq
+from pydantic import BaseModel
+
+from .quantization import INT8, NONE, is_binary_column
+
+
+# IVF/PQ training needs at least this many vectors
+MIN_TRAINING_ROWS = 256
+
+# Index type storing scalar-quantized (int8) vectors
+INT8_INDEX_TYPE = "IVF_HNSW_SQ"
+
+# LanceDB index configs of the supported vector index types
+VECTOR_INDEX_CONFIGS = {"IVF_PQ": IvfPq, "IVF_HNSW_SQ": HnswSq, "IVF_FLAT": IvfFlat}
+
+
+class VectorIndexPolicy(BaseModel):
+    """When and how to build the ANN index of a product table"""
+    index_type: str = "IVF_PQ"  # or "IVF_HNSW_SQ"
+    metric: str = "cosine"
+    quantization: str = NONE  # "int8" or "binary" (see quantization.py)
+    min_rows: int = 10_000  # brute force is fast enough below this
+    rebuild_unindexed_fraction: float = 0.1
+
+
+def index_params(
+    row_count: int,
+    dimensions: int,
+    policy: VectorIndexPolicy,
+    column: str = "vector"
+) -> Dict[str, Any]:
+    """
+    Derive vector index parameters from the table size.
+    
+    IVF partitions scale with sqrt(rows) so each partition holds a few
+    hundred to a few thousand vectors; PQ uses one sub-vector per 16
+    dimensions (adjusted down to a divisor of the dimension count).
+    int8 quantization forces an IVF_HNSW_SQ index, and packed binary
+    columns get an IVF_FLAT index over Hamming distance.
+    
+    Args:
+        row_count: Number of rows in the table
+        dimensions: Vector dimension count
+        policy: Index policy
+        column: Vector column to index
+        
+    Returns:
+        Index type and its config options (see index_config)
+    """
+    params: Dict[str, Any] = {
+        "index_type": INT8_INDEX_TYPE if policy.quantization == INT8 else policy.index_type,
+        "distance_type": policy.metric,
+    }
+    
+    if is_binary_column(column):
+        params["distance_type"] = "hamming"
+        params["index_type"] = "IVF_FLAT"
+        params["num_partitions"] = min(max(int(math.sqrt(row_count)), 1), 4096)
+        return params
+    
+    if params["index_type"] == INT8_INDEX_TYPE:
+        # The HNSW graph does the heavy lifting; partitions only bound memory
+        params["num_partitions"] = max(1, row_count // 1_000_000)
+        params["m"] = 20
+        params["ef_construction"] = 300
+        return params
+    
+    params["num_partitions"] = min(max(int(math.sqrt(row_count)), 1), 4096)
+    
+    num_sub_vectors = max(dimensions // 16, 1)
+    while dimensions % num_sub_vectors:
+        num_sub_vectors -= 1
+    params["num_sub_vectors"] = num_sub_vectors
+    return params
+
+
+def index_config(params: Dict[str, Any]) -> Any:
+    """
+    LanceDB index config (IvfPq, HnswSq, IvfFlat) for index_params() output.
+    
+    Raises:
+        ValueError: If the index type is not supported
+    """
+    options = dict(params)
+    index_type = options.pop("index_type")
+    if index_type not in VECTOR_INDEX_CONFIGS:
+        raise ValueError(
+            f"Unsupported vector index type {index_type!r}; "
+            f"expected one of {sorted(VECTOR_INDEX_CONFIGS)}"
+        )
+    return VECTOR_INDEX_CONFIGS[index_type](**options)
+
+
+def find_vector_index(table, column: str = "vector") -> Optional[Any]:
+    """Return the index config on a vector column, if one exists"""
+    for index in table.list_indices():
+        if column in index.columns:
+            return index
+    return None
+
+
+def unindexed_fraction(table, column: str = "vector") -> float:
+    """Fraction of rows not covered by a vector index (1.0 when there is none)"""
+    index = find_vector_index(table, column)
+    if index is None:
+        return 1.0
+    
+    stats = table.index_stats(index.name)
+    total = stats.num_indexed_rows + stats.num_unindexed_rows
+    return stats.num_unindexed_rows / total if total else 0.0
+
+
+# LanceDB index configs of the scalar index types
+SCALAR_INDEX_CONFIGS = {"BTREE": BTree, "BITMAP": Bitmap}
+
+# Metadata columns backing search filters and lookups by id
+SCALAR_INDICES = {
+    "product_id": "BTREE",
+    "sku": "BTREE",
+    "category": "BITMAP",
+    "brand": "BITMAP",
+    "b2b_price": "BTREE",
+    "stock": "BTREE",
+}
+
+
+# Index type of the full-text index, as reported by list_indices()
+TEXT_INDEX_TYPE = "FTS"
+
+
+def _column_indices(table) -> Dict[str, List[Any]]:
+    """Column → configs of the single-column indices on it"""
+    indices: Dict[str, List[Any]] = {}
+    for index in table.list_indices():
+        if len(index.columns) == 1:
+            indices.setdefault(index.columns[0], []).append(index)
+    return indices
+
+
+def index_types(table) -> Dict[str, List[str]]:
+    """Column → types (upper case, e.g. BTREE, BITMAP, FTS) of its single-column indices"""
+    return {
+        column: [str(index.index_type).upper() for index in indices]
+        for column, indices in _column_indices(table).items()
+    }
+
+
+def _ensure_index(table, column: str, index_type: str, config: Any) -> str:
+    """
+    Create an index of `index_type` (built from `config`) on a column
+    unless it already has one.
+    
+    Indices of another type on the column are dropped first (LanceDB would
+    otherwise keep them next to the new one).
+    
+    Returns:
+        "none", "built" or "rebuilt"
+    """
+    indices = _column_indices(table).get(column, [])
+    if any(str(index.index_type).upper() == index_type for index in indices):
+        return "none"
+    for index in indices:
+        table.drop_index(index.name)
+    table.create_index(column, config=config, replace=True)
+    return "rebuilt" if indices else "built"
+
+
+def ensure_scalar_indices(table) -> Dict[str, Any]:
+    """
+    Build the missing scalar indices on the filterable metadata columns.
+    
+    Existing indices are kept; rows added since they were built are folded
+    in by table.optimize(). An index is only rebuilt when its type differs
+    from SCALAR_INDICES.
+    
+    Args:
+        table: LanceDB table
+    
+    Returns:
+        Summary of the action taken
+    """
+    columns = set(table.schema.names)
+    summary: Dict[str, Any] = {"action": "none", "built": [], "rebuilt": []}
+    for column, index_type in SCALAR_INDICES.items():
+        if column not in columns:
+            continue
+        action = _ensure_index(table, column, index_type, SCALAR_INDEX_CONFIGS[index_type]())
+        if action != "none":
+            summary[action].append(column)
+            summary["action"] = "built"
+    return summary
+
+
+def ensure_text_index(table, column: str = "text") -> Dict[str, Any]:
+    """
+    Build the full-text (BM25) index used by keyword and hybrid search,
+    unless the column already has one.
+    
+    Args:
+        table: LanceDB table
+        column: Text column to index
+        
+    Returns:
+        Summary of the action taken
+    """
+    action = _ensure_index(table, column, TEXT_INDEX_TYPE, FTS())
+    return {"action": action, "column": column}
+
+
+def ensure_vector_index(
+    table,
+    dimensions: int,
+    policy: VectorIndexPolicy,
+    force: bool = False,
+    column: str = "vector"
+) -> Dict[str, Any]:
+    """
+    Build or rebuild the vector index when the policy calls for it.
+    
+    Args:
+        table: LanceDB table
+        dimensions: Vector dimension count
+        policy: Index policy
+        force: Rebuild regardless of thresholds
+        column: Vector column to index
+        
+    Returns:
+        Summary of the action taken
+    """
+    row_count = table.count_rows()
+    if row_count < max(policy.min_rows, MIN_TRAINING_ROWS) and not (
+        force and row_count >= MIN_TRAINING_ROWS
+    ):
+        return {"action": "none", "reason": "below_min_rows", "rows": row_count}
+    
+    fraction = unindexed_fraction(table, column)
+    if fraction <= policy.rebuild_unindexed_fraction and not force:
+        return {"action": "none", "unindexed_fraction": fraction, "rows": row_count}
+    
+    params = index_params(row_count, dimensions, policy, column)
+    table.create_index(column, config=index_config(params), replace=True)
+    return {
+        "action": "built",
+        "unindexed_fraction": fraction,
+        "rows": row_count,
+        "params": params,
+    }
@@ -0,0 +1,98 @@
+"""
+Product Catalog RAG - Price and Stock Updates
+
+Price and stock change far more often than product content. They are kept
+out of the embedded text and stored as plain columns, so they can be
+patched in place without re-embedding.
+"""
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List
+
+import pyarrow as pa
+
+from shared.batching import batched
+from .filters import sql_in
+
+if TYPE_CHECKING:
+    from .indexer import ProductDocument
+
+
+# Fields updated in place without re-embedding (never part of the text)
+VOLATILE_FIELDS = ("b2b_price", "stock")
+
+
+class VolatileUpdatesMixin:
+    """Price and stock updates of a ProductIndexer"""
+    
+    def _volatile_fields(self, product: "ProductDocument") -> Dict[str, Any]:
+        """Frequently changing fields, stored as plain columns only"""
+        return {field: getattr(product, field) for field in VOLATILE_FIELDS}
+    
+    def update_prices_and_stock(
+        self,
+        updates: Iterable[Dict[str, Any]],
+        batch_size: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Update price and stock in place by SKU, without re-embedding.
+        
+        Args:
+            updates: Dicts with a "sku" and any of "b2b_price" / "stock"
+            batch_size: Updates applied per table write
+            
+        Returns:
+            Update statistics
+        """
+        if not self._initialized:
+            raise RuntimeError("Indexer not initialized. Call initialize() first.")
+        self._check_schema()
+        
+        start_time = datetime.now()
+        requested = 0
+        updated = 0
+        for batch in batched(updates, batch_size):
+            requested += len(batch)
+            try:
+                updated += self._apply_volatile_updates(batch)
+            except Exception as e:
+                print(f"Error updating batch starting at {batch[0].get('sku')}: {e}")
+        
+        return {
+            "requested": requested,
+            "updated": updated,
+            "not_found": requested - updated,
+            "duration_seconds": (datetime.now() - start_time).total_seconds(),
+        }
+    
+    def _apply_volatile_updates(self, updates: List[Dict[str, Any]]) -> int:
+        """Patch the volatile columns of the rows matching the given SKUs (returns SKUs updated)"""
+        by_sku = {update["sku"]: update for update in updates}
+        where = sql_in("sku", list(by_sku))
+        # Only ids and volatile columns are read and merged back, so vectors
+        # and text are neither read nor rewritten
+        rows = (
+            self.table.search()
+            .where(where)
+            .select(["id", "sku", *VOLATILE_FIELDS])
+            .limit(self.table.count_rows(where))
+            .to_arrow()
+        )
+        if rows.num_rows == 0:
+            return 0
+        
+        skus = rows.column("sku").to_pylist()
+        for field in VOLATILE_FIELDS:
+            current = rows.column(field).to_pylist()
+            patched = [
+                by_sku[sku].get(field, value) for sku, value in zip(skus, current)
+            ]
+            rows = rows.set_column(
+                rows.schema.get_field_index(field),
+                rows.schema.field(field),
+                pa.array(patched, type=rows.schema.field(field).type),
+            )
+        
+        self.table.merge_insert("id").when_matched_update_all().execute(
+            rows.select(["id", *VOLATILE_FIELDS])
+        )
+        return len(set(skus))
@@ -1,12 +1,58 @@
 """Shared utilities for AI agents"""
 from .knowledge_base import (
+    create_embedder,
     create_knowledge_base,
     load_urls_to_knowledge,
     load_text_to_knowledge,
 )
+from .embedder_registry import register_embedder, get_embedder_backend, available_embedders
+from .onnx_embedder import OnnxEmbedder
+from .hashing_embedder import HashingEmbedder
+from .embeddings import embed_batch, async_embed_batch, truncate_embedding
+from .batching import RequestLimits, embed_packed, async_embed_packed
+from .tokenizer import count_tokens
+from .embedding_cache import EmbeddingCache, CachedEmbedder, get_embedding_cache
+from .query_cache import QueryEmbeddingCache, QueryCachingEmbedder, get_query_cache
+from .rate_limiter import (
+    INTERACTIVE,
+    BULK,
+    ModelRateLimiter,
+    RateLimitedEmbedder,
+    RateLimitedModel,
+    get_rate_limiter,
+)
+from .table_alias import list_tables, resolve_table, set_alias
 
 __all__ = [
+    "create_embedder",
     "create_knowledge_base",
     "load_urls_to_knowledge", 
     "load_text_to_knowledge",
+    "register_embedder",
+    "get_embedder_backend",
+    "available_embedders",
+    "OnnxEmbedder",
+    "HashingEmbedder",
+    "embed_batch",
+    "async_embed_batch",
+    "truncate_embedding",
+    "RequestLimits",
+    "embed_packed",
+    "async_embed_packed",
+    "count_tokens",
+    "EmbeddingCache",
+    "CachedEmbedder",
+    "get_embedding_cache",
+    "QueryEmbeddingCache",
+    "QueryCachingEmbedder",
+    "get_query_cache",
+    "INTERACTIVE",
+    "BULK",
+    "ModelRateLimiter",
+    "RateLimitedEmbedder",
+    "RateLimitedModel",
+    "get_rate_limiter",
+    "list_tables",
+    "resolve_table",
+    "set_alias",
 ]
@@ -0,0 +1,192 @@
+"""
+Token-aware packing of embedding requests.
+Texts are counted with the local tokenizer and packed into as few provider
+requests as the per-request limits allow; texts over the per-input limit
+are truncated or split according to the configured policy.
+"""
+import itertools
+import math
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, Iterator, List, Optional
+
+from agno.knowledge.embedder.base import Embedder
+
+from config import get_config
+from .embeddings import embed_batch, async_embed_batch
+from .tokenizer import count_tokens, split_tokens
+
+
+TRUNCATE = "truncate"
+SPLIT = "split"
+
+# Sends one packed request: (inputs, their token count) → one vector per input
+RequestSender = Callable[[List[str], int], List[List[float]]]
+AsyncRequestSender = Callable[[List[str], int], Awaitable[List[List[float]]]]
+
+
+@dataclass
+class RequestLimits:
+    """Provider limits for one embedding request"""
+    max_input_tokens: int = 8191
+    max_request_tokens: int = 300_000
+    max_items: int = 2048
+    oversize: str = TRUNCATE  # or SPLIT: embed every piece and average them
+    model: Optional[str] = None
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of up to `size` items from an iterable"""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def default_request_limits() -> RequestLimits:
+    """Request limits configured in AIConfig"""
+    config = get_config()
+    return RequestLimits(
+        max_input_tokens=config.embedding_max_input_tokens,
+        max_request_tokens=config.embedding_max_request_tokens,
+        max_items=config.embedding_max_request_items,
+        oversize=config.embedding_oversize_policy,
+        model=config.openai_embedding_model,
+    )
+
+
+@dataclass
+class EmbeddingPlan:
+    """Inputs to send for a list of texts, and how they are packed into requests"""
+    count: int
+    inputs: List[str] = field(default_factory=list)
+    owners: List[int] = field(default_factory=list)  # source text of each input
+    tokens: List[int] = field(default_factory=list)
+    requests: List[List[int]] = field(default_factory=list)  # input indices per request
+    
+    def combine(self, vectors: List[List[float]]) -> List[List[float]]:
+        """
+        Map input vectors back to one vector per source text.
+        
+        Split texts get the token-weighted mean of their pieces,
+        re-normalised to unit length.
+        
+        Args:
+            vectors: One vector per input, in input order
+            
+        Returns:
+            One vector per source text
+        """
+        pieces: List[List[int]] = [[] for _ in range(self.count)]
+        for i, owner in enumerate(self.owners):
+            pieces[owner].append(i)
+        
+        combined = []
+        for indices in pieces:
+            if len(indices) == 1:
+                combined.append(vectors[indices[0]])
+                continue
+            total = sum(self.tokens[i] for i in indices)
+            mean = [
+                sum(vectors[i][d] * self.tokens[i] for i in indices) / total
+                for d in range(len(vectors[indices[0]]))
+            ]
+            norm = math.sqrt(sum(v * v for v in mean)) or 1.0
+            combined.append([v / norm for v in mean])
+        return combined
+
+
+def plan_embeddings(texts: List[str], limits: Optional[RequestLimits] = None) -> EmbeddingPlan:
+    """
+    Plan the provider requests for a list of texts.
+    
+    Inputs are packed greedily in order: a request is closed when the next
+    input would exceed the token or item limit.
+    
+    Args:
+        texts: Texts to embed
+        limits: Provider request limits (defaults from AIConfig)
+        
+    Returns:
+        Embedding plan
+    """
+    limits = limits or default_request_limits()
+    plan = EmbeddingPlan(count=len(texts))
+    
+    for owner, text in enumerate(texts):
+        tokens = count_tokens(text, limits.model)
+        if tokens <= limits.max_input_tokens:
+            pieces = [(text, tokens)]
+        else:
+            split = split_tokens(text, limits.max_input_tokens, limits.model)
+            if limits.oversize != SPLIT:
+                split = split[:1]
+            pieces = [(piece, count_tokens(piece, limits.model)) for piece in split]
+        for piece, piece_tokens in pieces:
+            plan.inputs.append(piece)
+            plan.owners.append(owner)
+            plan.tokens.append(min(piece_tokens, limits.max_input_tokens))
+    
+    request: List[int] = []
+    request_tokens = 0
+    for i, tokens in enumerate(plan.tokens):
+        if request and (
+            request_tokens + tokens > limits.max_request_tokens
+            or len(request) >= limits.max_items
+        ):
+            plan.requests.append(request)
+            request, request_tokens = [], 0
+        request.append(i)
+        request_tokens += tokens
+    if request:
+        plan.requests.append(request)
+    return plan
+
+
+def embed_packed(
+    embedder: Embedder,
+    texts: List[str],
+    limits: Optional[RequestLimits] = None,
+    send: Optional[RequestSender] = None
+) -> List[List[float]]:
+    """
+    Embed texts in token-packed requests.
+    
+    Args:
+        embedder: agno embedder instance
+        texts: Texts to embed
+        limits: Provider request limits (defaults from AIConfig)
+        send: Sends one request (e.g. with retries and metrics); defaults
+            to embed_batch with `embedder`
+        
+    Returns:
+        One embedding per input text, in input order
+    """
+    plan = plan_embeddings(texts, limits)
+    vectors: List[List[float]] = []
+    for request in plan.requests:
+        inputs = [plan.inputs[i] for i in request]
+        if send is None:
+            vectors.extend(embed_batch(embedder, inputs))
+        else:
+            vectors.extend(send(inputs, sum(plan.tokens[i] for i in request)))
+    return plan.combine(vectors)
+
+
+async def async_embed_packed(
+    embedder: Embedder,
+    texts: List[str],
+    limits: Optional[RequestLimits] = None,
+    send: Optional[AsyncRequestSender] = None
+) -> List[List[float]]:
+    """Async variant of embed_packed"""
+    plan = plan_embeddings(texts, limits)
+    vectors: List[List[float]] = []
+    for request in plan.requests:
+        inputs = [plan.inputs[i] for i in request]
+        if send is None:
+            vectors.extend(await async_embed_batch(embedder, inputs))
+        else:
+            vectors.extend(await send(inputs, sum(plan.tokens[i] for i in request)))
+    return plan.combine(vectors)
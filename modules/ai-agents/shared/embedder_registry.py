@@ -0,0 +1,85 @@
+"""
+Embedder registry for AI agents.
+Maps the EMBEDDING_PROVIDER setting to the backend that builds the base
+embedder; create_embedder() wraps it in the rate limiter and caches.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from agno.knowledge.embedder.base import Embedder
+from agno.knowledge.embedder.openai import OpenAIEmbedder
+
+from config import AIConfig
+from .hashing_embedder import HashingEmbedder
+from .onnx_embedder import OnnxEmbedder
+
+
+# Builds a base embedder from the configuration and the requested dimensions
+EmbedderFactory = Callable[[AIConfig, Optional[int]], Embedder]
+
+
+@dataclass
+class EmbedderBackend:
+    """Registered embedding backend"""
+    factory: EmbedderFactory
+    remote: bool = True  # calls go through the provider rate limiter
+
+
+_backends: Dict[str, EmbedderBackend] = {}
+
+
+def register_embedder(name: str, factory: EmbedderFactory, remote: bool = True) -> None:
+    """
+    Register (or replace) an embedding backend.
+    
+    Args:
+        name: Value of EMBEDDING_PROVIDER selecting the backend
+        factory: Builds the embedder from (config, dimensions)
+        remote: Whether calls should be rate limited
+    """
+    _backends[name] = EmbedderBackend(factory=factory, remote=remote)
+
+
+def get_embedder_backend(name: str) -> EmbedderBackend:
+    """Look up a registered embedding backend"""
+    if name not in _backends:
+        raise ValueError(
+            f"Unknown embedding provider: {name} (available: {', '.join(available_embedders())})"
+        )
+    return _backends[name]
+
+
+def available_embedders() -> List[str]:
+    """Names of the registered embedding backends"""
+    return sorted(_backends)
+
+
+def _openai_embedder(config: AIConfig, dimensions: Optional[int]) -> Embedder:
+    # With rate limiting on, 429s must reach the limiter instead of being
+    # retried inside the OpenAI client
+    return OpenAIEmbedder(
+        id=config.openai_embedding_model,
+        api_key=config.openai_api_key,
+        dimensions=dimensions,
+        client_params={"max_retries": 0} if config.rate_limit_enabled else None,
+    )
+
+
+def _onnx_embedder(config: AIConfig, dimensions: Optional[int]) -> Embedder:
+    return OnnxEmbedder(
+        model_path=config.local_embedding_model_path,
+        dimensions=dimensions,
+        batch_size=config.local_embedding_batch_size,
+        threads=config.local_embedding_threads,
+        max_length=config.local_embedding_max_length,
+        pooling=config.local_embedding_pooling,
+    )
+
+
+def _hashing_embedder(config: AIConfig, dimensions: Optional[int]) -> Embedder:
+    return HashingEmbedder(dimensions=dimensions or config.hashing_embedding_dimensions)
+
+
+register_embedder("openai", _openai_embedder)
+register_embedder("onnx", _onnx_embedder, remote=False)
+register_embedder("hashing", _hashing_embedder, remote=False)
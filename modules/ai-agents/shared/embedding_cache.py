@@ -0,0 +1,274 @@
+"""
+Persistent embedding cache for AI agents.
+Stores embeddings in a local SQLite file keyed by (model, dimensions, text hash)
+so the same text is never sent to the embedding provider twice.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from agno.knowledge.embedder.base import Embedder
+
+from config import get_config
+from .embeddings import async_embed_batch, embed_batch, embedder_model_id
+
+
+class EmbeddingCache:
+    """
+    Size-capped, LRU-evicted embedding store backed by SQLite.
+    
+    Safe to share between threads and between processes using the same file.
+    """
+    
+    def __init__(self, path: str, max_bytes: int):
+        """
+        Open (or create) the cache file.
+        
+        Args:
+            path: SQLite file path
+            max_bytes: Maximum total size of stored vectors
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()[0]
+    
+    @staticmethod
+    def make_key(model: str, dimensions: Optional[int], text: str) -> str:
+        """Cache key for a text embedded by a given model and dimension count"""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model}:{dimensions}:{digest}"
+    
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Fetch cached vectors and mark them as recently used.
+        
+        Args:
+            keys: Cache keys to look up
+            
+        Returns:
+            Mapping of found keys to vectors
+        """
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+        
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+    
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        """
+        Store vectors, evicting least recently used entries over the size cap.
+        
+        Args:
+            items: Mapping of cache keys to vectors
+        """
+        if not items:
+            return
+        
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = array("f", vector).tobytes()
+            rows.append((key, blob, len(blob), now))
+        
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._total_bytes += sum(row[2] for row in rows)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+    
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is at 90% of its cap"""
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_used LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+            
+            evicted = []
+            for key, size in rows:
+                evicted.append((key,))
+                self._total_bytes -= size
+                if self._total_bytes <= target:
+                    break
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+        self._conn.commit()
+    
+    def stats(self) -> Dict[str, int]:
+        """Entry count and stored size"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+@dataclass
+class CachedEmbedder(Embedder):
+    """
+    agno embedder that serves repeated texts from an EmbeddingCache.
+    
+    Identical texts within a batch are collapsed into a single provider
+    request; texts already in the cache cost no request at all.
+    """
+    
+    embedder: Optional[Embedder] = None
+    cache: Optional[EmbeddingCache] = None
+    
+    def __post_init__(self):
+        if self.embedder is None:
+            raise ValueError("CachedEmbedder requires an embedder to wrap")
+        if self.cache is None:
+            self.cache = get_embedding_cache()
+        self.dimensions = self.embedder.dimensions
+        self.enable_batch = True
+    
+    @property
+    def model_id(self) -> str:
+        """Identifier of the wrapped embedding model"""
+        return embedder_model_id(self.embedder)
+    
+    def _lookup(self, texts: List[str]) -> Tuple[List[str], Dict[str, List[float]], List[str]]:
+        """Return (keys per text, cached vectors, unique texts that are not cached)"""
+        keys = [self.cache.make_key(self.model_id, self.dimensions, t) for t in texts]
+        cached = self.cache.get_many(list(dict.fromkeys(keys)))
+        
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        return keys, cached, list(missing.values())
+    
+    def _store(self, texts: List[str], vectors: List[List[float]]) -> Dict[str, List[float]]:
+        """
+        Cache freshly computed vectors and return them by key.
+        
+        Only complete vectors are cached: some agno versions return an
+        empty vector when the provider call failed, and caching it (or a
+        vector of the wrong size) would keep serving it after the provider
+        recovered.
+        """
+        fresh = {
+            self.cache.make_key(self.model_id, self.dimensions, text): vector
+            for text, vector in zip(texts, vectors)
+        }
+        self.cache.put_many({
+            key: vector for key, vector in fresh.items()
+            if vector and (not self.dimensions or len(vector) == self.dimensions)
+        })
+        return fresh
+    
+    def get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            found.update(self._store(missing, embed_batch(self.embedder, missing)))
+        return [found[key] for key in keys], [None] * len(texts)
+    
+    async def async_get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            vectors = await async_embed_batch(self.embedder, missing)
+            found.update(self._store(missing, vectors))
+        return [found[key] for key in keys], [None] * len(texts)
+    
+    def get_embedding(self, text: str) -> List[float]:
+        # Single-text calls are passed on as such so the wrapped embedder can
+        # tell search queries from document batches
+        key = self.cache.make_key(self.model_id, self.dimensions, text)
+        found = self.cache.get_many([key])
+        if key not in found:
+            found = self._store([text], [self.embedder.get_embedding(text)])
+        return found[key]
+    
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return self.get_embedding(text), None
+    
+    async def async_get_embedding(self, text: str) -> List[float]:
+        key = self.cache.make_key(self.model_id, self.dimensions, text)
+        found = self.cache.get_many([key])
+        if key not in found:
+            found = self._store([text], [await self.embedder.async_get_embedding(text)])
+        return found[key]
+    
+    async def async_get_embedding_and_usage(
+        self, text: str
+    ) -> Tuple[List[float], Optional[Dict]]:
+        return await self.async_get_embedding(text), None
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide embedding cache configured in AIConfig"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            config = get_config()
+            _cache = EmbeddingCache(
+                path=config.embedding_cache_path,
+                max_bytes=config.embedding_cache_max_mb * 1024 * 1024,
+            )
+        return _cache
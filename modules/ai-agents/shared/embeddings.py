@@ -0,0 +1,195 @@
+"""
+Shared embedding helpers for AI agents.
+Provides batched (sync and async) embedding calls on top of agno embedders.
+"""
+import asyncio
+import math
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from agno.knowledge.embedder.base import Embedder
+from agno.knowledge.embedder.openai import OpenAIEmbedder
+
+
+# Rough token estimate for rate limiting and metrics (English and Romanian text)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text"""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def embedder_model_id(embedder: Embedder) -> str:
+    """
+    Identifier of the embedding model behind an embedder.
+    
+    Wrapper embedders (rate limiting, caching) are followed through their
+    `embedder` attribute down to the provider embedder, whose `id` (or
+    class name) is returned.
+    """
+    while getattr(embedder, "embedder", None) is not None:
+        embedder = embedder.embedder
+    return getattr(embedder, "id", None) or type(embedder).__name__
+
+
+def truncate_embedding(vector: List[float], dimensions: int) -> List[float]:
+    """
+    Shorten a Matryoshka embedding (e.g. text-embedding-3) to its leading
+    dimensions, re-normalised to unit length.
+    
+    This is what the provider returns when asked for fewer dimensions, so
+    shortened and full vectors can be derived from a single request.
+    
+    Args:
+        vector: Full embedding
+        dimensions: Dimensions to keep
+        
+    Returns:
+        Shortened embedding
+    """
+    head = vector[:dimensions]
+    norm = math.sqrt(sum(v * v for v in head)) or 1.0
+    return [v / norm for v in head]
+
+
+def _openai_request(embedder: OpenAIEmbedder, texts: List[str]) -> Dict[str, Any]:
+    """embeddings.create() arguments for a list of texts, as OpenAIEmbedder builds them"""
+    request: Dict[str, Any] = {"input": texts, "model": embedder.id, "encoding_format": "float"}
+    if embedder.user is not None:
+        request["user"] = embedder.user
+    if embedder.id.startswith("text-embedding-3") or embedder.base_url is not None:
+        request["dimensions"] = embedder.dimensions
+    if embedder.request_params:
+        request.update(embedder.request_params)
+    return request
+
+
+def _openai_vectors(response) -> List[List[float]]:
+    """Embeddings of an OpenAI response, in input order"""
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+def request_size(embedder: Embedder) -> Optional[int]:
+    """
+    Texts embed_batch sends per provider request.
+    
+    Returns:
+        `batch_size` for OpenAI embedders, None (the whole list) for other
+        embedders with a batch endpoint, and 1 for per-text embedders
+    """
+    if isinstance(embedder, OpenAIEmbedder):
+        return embedder.batch_size
+    if hasattr(embedder, "get_embeddings_batch_and_usage"):
+        return None
+    return 1
+
+
+def embed_request(
+    embedder: Embedder, texts: List[str]
+) -> Tuple[List[List[float]], Mapping[str, str]]:
+    """
+    Embed texts that fit in a single provider request (see request_size).
+    
+    Args:
+        embedder: agno embedder instance
+        texts: Texts to embed
+        
+    Returns:
+        (one embedding per text, response headers); the headers carry the
+        x-ratelimit-* quota for OpenAI embedders and are empty otherwise
+    """
+    if isinstance(embedder, OpenAIEmbedder):
+        raw = embedder.client.embeddings.with_raw_response.create(**_openai_request(embedder, texts))
+        return _openai_vectors(raw.parse()), raw.headers
+    if len(texts) == 1 and request_size(embedder) == 1:
+        return [embedder.get_embedding(texts[0])], {}
+    return embed_batch(embedder, texts), {}
+
+
+async def async_embed_request(
+    embedder: Embedder, texts: List[str]
+) -> Tuple[List[List[float]], Mapping[str, str]]:
+    """Async variant of embed_request"""
+    if isinstance(embedder, OpenAIEmbedder):
+        raw = await embedder.aclient.embeddings.with_raw_response.create(
+            **_openai_request(embedder, texts)
+        )
+        return _openai_vectors(raw.parse()), raw.headers
+    if len(texts) == 1 and request_size(embedder) == 1:
+        return [await embedder.async_get_embedding(texts[0])], {}
+    return await async_embed_batch(embedder, texts), {}
+
+
+def embed_batch(embedder: Embedder, texts: List[str]) -> List[List[float]]:
+    """
+    Embed a list of texts with as few provider requests as possible.
+    
+    OpenAI embedders send `embedder.batch_size` texts per request through
+    the client (agno's OpenAIEmbedder has no sync batch method). Other
+    embedders use their batch endpoint when they have one (a single
+    request for the whole list) and fall back to one call per text
+    otherwise.
+    
+    Args:
+        embedder: agno embedder instance
+        texts: Texts to embed
+        
+    Returns:
+        One embedding per input text, in input order
+    """
+    if not texts:
+        return []
+    
+    if isinstance(embedder, OpenAIEmbedder):
+        embeddings = []
+        for start in range(0, len(texts), embedder.batch_size):
+            vectors, _ = embed_request(embedder, texts[start:start + embedder.batch_size])
+            embeddings.extend(vectors)
+    elif hasattr(embedder, "get_embeddings_batch_and_usage"):
+        embeddings, _ = embedder.get_embeddings_batch_and_usage(texts)
+    else:
+        embeddings = [embedder.get_embedding(text) for text in texts]
+    
+    if len(embeddings) != len(texts):
+        raise ValueError(
+            f"Embedder returned {len(embeddings)} vectors for {len(texts)} texts"
+        )
+    return embeddings
+
+
+async def async_embed_batch(embedder: Embedder, texts: List[str]) -> List[List[float]]:
+    """
+    Async variant of embed_batch.
+    
+    OpenAI embedders are batched through the async client like in
+    embed_batch. Other embedders use their async batch endpoint when
+    available; otherwise the blocking embed_batch runs in a worker thread
+    so the event loop is not held up by the HTTP round trip.
+    
+    Args:
+        embedder: agno embedder instance
+        texts: Texts to embed
+        
+    Returns:
+        One embedding per input text, in input order
+    """
+    if not texts:
+        return []
+    
+    if isinstance(embedder, OpenAIEmbedder):
+        embeddings = []
+        for start in range(0, len(texts), embedder.batch_size):
+            vectors, _ = await async_embed_request(
+                embedder, texts[start:start + embedder.batch_size]
+            )
+            embeddings.extend(vectors)
+    elif hasattr(embedder, "async_get_embeddings_batch_and_usage"):
+        embeddings, _ = await embedder.async_get_embeddings_batch_and_usage(texts)
+    else:
+        return await asyncio.to_thread(embed_batch, embedder, texts)
+    
+    if len(embeddings) != len(texts):
+        raise ValueError(
+            f"Embedder returned {len(embeddings)} vectors for {len(texts)} texts"
+        )
+    return embeddings
@@ -0,0 +1,84 @@
+"""
+Deterministic hashing embedder for AI agents.
+Embeds text by feature hashing words and word bigrams into a fixed number
+of dimensions. Needs no model, network or API key and always returns the
+same vector for the same text, so indexing and search can be benchmarked
+and tested anywhere.
+"""
+import asyncio
+import hashlib
+import math
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from agno.knowledge.embedder.base import Embedder
+
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(text: str) -> List[str]:
+    """Lower-cased words (diacritics folded) and adjacent word bigrams"""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    words = _WORD_PATTERN.findall(folded)
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+@dataclass
+class HashingEmbedder(Embedder):
+    """
+    agno embedder mapping text to a signed feature-hashing vector.
+    
+    Each token is hashed (BLAKE2b, stable across processes) to a dimension
+    and a sign; counts are damped with log(1 + tf) and the vector is
+    L2-normalised, so cosine similarity reflects shared vocabulary.
+    """
+    
+    id: str = "hashing"
+    dimensions: Optional[int] = 1536
+    
+    def __post_init__(self):
+        self.enable_batch = True
+    
+    def _embed(self, text: str) -> List[float]:
+        counts: Dict[int, float] = {}
+        for token in _tokens(text):
+            digest = int.from_bytes(
+                hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little"
+            )
+            index = digest % self.dimensions
+            sign = 1.0 if (digest >> 63) & 1 else -1.0
+            counts[index] = counts.get(index, 0.0) + sign
+        
+        vector = [0.0] * self.dimensions
+        for index, count in counts.items():
+            vector[index] = math.copysign(math.log1p(abs(count)), count)
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+    
+    def get_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
+    
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return self._embed(text), None
+    
+    def get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        return [self._embed(text) for text in texts], [None] * len(texts)
+    
+    async def async_get_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
+    
+    async def async_get_embedding_and_usage(
+        self, text: str
+    ) -> Tuple[List[float], Optional[Dict]]:
+        return self._embed(text), None
+    
+    async def async_get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        return await asyncio.to_thread(self.get_embeddings_batch_and_usage, texts)
@@ -4,34 +4,76 @@ Provides common functions for loading and querying knowledge bases.
 """
 from typing import List, Optional
 from agno.knowledge.knowledge import Knowledge
-from agno.knowledge.embedder.openai import OpenAIEmbedder
+from agno.knowledge.embedder.base import Embedder
 from agno.vectordb.lancedb import LanceDb, SearchType
 
 from config import get_config
+from .embedder_registry import get_embedder_backend
+from .embedding_cache import CachedEmbedder
+from .query_cache import QueryCachingEmbedder
+from .rate_limiter import RateLimitedEmbedder
+from .table_alias import resolve_table
+
+
+def create_embedder(dimensions: Optional[int] = None) -> Embedder:
+    """
+    Create the embedder used by knowledge bases and the product indexer.
+    
+    The base embedder comes from the backend registered under
+    EMBEDDING_PROVIDER (OpenAI by default, or the local ONNX backend).
+    Remote provider calls go through the shared rate limiter (queries in the
+    interactive lane, documents in the bulk lane). The embedder is wrapped
+    in the persistent embedding cache unless it is disabled, so text that
+    has been embedded once is never sent to the provider again, and in the
+    in-process query cache so repeated searches skip even the disk lookup.
+    
+    Args:
+        dimensions: Shortened output size for models that support it
+            (text-embedding-3); None or 0 for the model default
+    
+    Returns:
+        Embedder instance
+    """
+    config = get_config()
+    backend = get_embedder_backend(config.embedding_provider)
+    embedder = backend.factory(config, dimensions or None)
+    if backend.remote and config.rate_limit_enabled:
+        embedder = RateLimitedEmbedder(embedder=embedder)
+    if config.embedding_cache_enabled:
+        embedder = CachedEmbedder(embedder=embedder)
+    return QueryCachingEmbedder(embedder=embedder)
 
 
 def create_knowledge_base(
     table_name: str,
-    uri: Optional[str] = None
+    uri: Optional[str] = None,
+    search_type: Optional[SearchType] = None,
+    dimensions: Optional[int] = None
 ) -> Knowledge:
     """
     Create a knowledge base with LanceDB vector store.
     
     Args:
-        table_name: Name of the LanceDB table
+        table_name: Name of the LanceDB table (aliases set by a blue/green
+            rebuild are resolved to the current physical table)
         uri: Optional custom URI for the database
-        
+        search_type: Vector, keyword or hybrid (BM25 + vector) search;
+            defaults to KNOWLEDGE_SEARCH_TYPE
+        dimensions: Embedding dimensions of the table; defaults to
+            KNOWLEDGE_EMBEDDING_DIMENSIONS (0 = model default)
+            
     Returns:
         Knowledge instance ready for content loading
     """
     config = get_config()
+    uri = uri or config.lancedb_uri
     
     return Knowledge(
         vector_db=LanceDb(
-            uri=uri or config.lancedb_uri,
-            table_name=table_name,
-            search_type=SearchType.vector,
-            embedder=OpenAIEmbedder(api_key=config.openai_api_key),
+            uri=uri,
+            table_name=resolve_table(uri, table_name),
+            search_type=search_type or SearchType(config.knowledge_search_type),
+            embedder=create_embedder(dimensions or config.knowledge_embedding_dimensions),
         ),
     )
 
@@ -0,0 +1,120 @@
+"""
+Local CPU embedder for AI agents.
+Runs a sentence-embedding model exported to ONNX with ONNX Runtime, so
+indexing is bounded by local cores instead of a remote API quota and
+works without network access.
+"""
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+except ImportError:  # optional dependency
+    np = ort = Tokenizer = None
+
+from agno.knowledge.embedder.base import Embedder
+
+
+MODEL_FILE = "model.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+@dataclass
+class OnnxEmbedder(Embedder):
+    """
+    agno embedder running a local model with ONNX Runtime on CPU.
+    
+    The model directory holds the exported model (model.onnx) and its
+    Hugging Face tokenizer (tokenizer.json). Batches are tokenized in
+    parallel, run through the model with one intra-op thread per core,
+    pooled and L2-normalised. Setting `dimensions` below the model's
+    output size keeps the leading dimensions (Matryoshka-trained models).
+    """
+    
+    id: str = ""
+    model_path: str = ""
+    dimensions: Optional[int] = None
+    batch_size: int = 64
+    threads: int = 0  # 0 = all cores
+    max_length: int = 512
+    pooling: str = "mean"  # or "cls"
+    
+    def __post_init__(self):
+        if ort is None:
+            raise ImportError(
+                "onnxruntime and tokenizers are required for the local embedder"
+            )
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.threads or os.cpu_count() or 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(self.model_path, MODEL_FILE),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.model_path, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(self.max_length)
+        self.tokenizer.enable_padding()
+        
+        self.id = self.id or f"local:{os.path.basename(os.path.normpath(self.model_path))}"
+        native_dimensions = self._run(["dimension probe"]).shape[1]
+        self.dimensions = min(self.dimensions or native_dimensions, native_dimensions)
+        self.enable_batch = True
+    
+    def _run(self, texts: List[str]):
+        """Pooled model outputs for a batch of texts"""
+        encodings = self.tokenizer.encode_batch(texts)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        output = self.session.run(
+            None, {name: value for name, value in feeds.items() if name in self.input_names}
+        )[0]
+        if output.ndim == 2:  # model exported with pooling
+            return output
+        if self.pooling == "cls":
+            return output[:, 0]
+        weights = mask[..., None].astype(output.dtype)
+        return (output * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+    
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batches of `batch_size`"""
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            output = self._run(texts[start:start + self.batch_size])[:, :self.dimensions]
+            norms = np.clip(np.linalg.norm(output, axis=1, keepdims=True), 1e-12, None)
+            vectors.extend((output / norms).astype(np.float32).tolist())
+        return vectors
+    
+    def get_embedding(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+    
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return self.get_embedding(text), None
+    
+    def get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        return self._embed(texts), [None] * len(texts)
+    
+    async def async_get_embedding(self, text: str) -> List[float]:
+        return await asyncio.to_thread(self.get_embedding, text)
+    
+    async def async_get_embedding_and_usage(
+        self, text: str
+    ) -> Tuple[List[float], Optional[Dict]]:
+        return await self.async_get_embedding(text), None
+    
+    async def async_get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        return await asyncio.to_thread(self.get_embeddings_batch_and_usage, texts)
@@ -0,0 +1,211 @@
+"""
+In-process query embedding cache for AI agents.
+Keeps recently embedded search queries in memory so repeated queries
+("panou led 60x60", "banda led 24v") skip the remote embedding call.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from agno.knowledge.embedder.base import Embedder
+
+from config import get_config
+from .embeddings import async_embed_batch, embed_batch, embedder_model_id
+
+
+def normalize_query(query: str) -> str:
+    """Normalise a query for cache lookup (case and whitespace insensitive)"""
+    return " ".join(query.lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    Size-bounded LRU cache with a TTL for query embeddings.
+    
+    Thread-safe; keeps hit/miss counters for monitoring.
+    """
+    
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 3600.0):
+        """
+        Create an empty cache.
+        
+        Args:
+            max_entries: Maximum number of cached queries
+            ttl_seconds: Time after which an entry is considered stale
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, model: str, query: str) -> Optional[List[float]]:
+        """
+        Return the cached embedding for a query, if fresh.
+        
+        Args:
+            model: Embedding model identifier
+            query: Query text
+            
+        Returns:
+            Embedding, or None on a miss
+        """
+        key = (model, normalize_query(query))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, model: str, query: str, embedding: List[float]) -> None:
+        """
+        Store a query embedding, evicting the least recently used entry if full.
+        
+        Args:
+            model: Embedding model identifier
+            query: Query text
+            embedding: Query embedding
+        """
+        key = (model, normalize_query(query))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+@dataclass
+class QueryCachingEmbedder(Embedder):
+    """
+    agno embedder that serves single-text (query) embeddings from a
+    QueryEmbeddingCache.
+    
+    agno vector stores embed search queries through get_embedding() and
+    documents through the *_and_usage / batch methods, so only the former
+    are cached here; everything else is passed through to the wrapped
+    embedder.
+    """
+    
+    embedder: Optional[Embedder] = None
+    cache: Optional[QueryEmbeddingCache] = None
+    
+    def __post_init__(self):
+        if self.embedder is None:
+            raise ValueError("QueryCachingEmbedder requires an embedder to wrap")
+        if self.cache is None:
+            self.cache = get_query_cache()
+        self.dimensions = self.embedder.dimensions
+        self.enable_batch = getattr(self.embedder, "enable_batch", False)
+    
+    @property
+    def model_id(self) -> str:
+        """Identifier of the wrapped embedding model and dimension count"""
+        return f"{embedder_model_id(self.embedder)}:{self.dimensions}"
+    
+    def get_embedding(self, text: str) -> List[float]:
+        embedding = self.cache.get(self.model_id, text)
+        if embedding is None:
+            embedding = self.embedder.get_embedding(text)
+            self.cache.put(self.model_id, text, embedding)
+        return embedding
+    
+    async def async_get_embedding(self, text: str) -> List[float]:
+        embedding = self.cache.get(self.model_id, text)
+        if embedding is None:
+            embedding = await self.embedder.async_get_embedding(text)
+            self.cache.put(self.model_id, text, embedding)
+        return embedding
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed many queries, serving cached ones and batching the rest.
+        
+        Args:
+            queries: Query texts
+        
+        Returns:
+            One embedding per query, in input order
+        """
+        embeddings: List[Optional[List[float]]] = [
+            self.cache.get(self.model_id, query) for query in queries
+        ]
+        
+        missing: Dict[str, List[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(normalize_query(queries[i]), []).append(i)
+        
+        if missing:
+            texts = [queries[positions[0]] for positions in missing.values()]
+            for text, embedding, positions in zip(
+                texts, embed_batch(self.embedder, texts), missing.values()
+            ):
+                self.cache.put(self.model_id, text, embedding)
+                for i in positions:
+                    embeddings[i] = embedding
+        return embeddings
+    
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return self.embedder.get_embedding_and_usage(text)
+    
+    async def async_get_embedding_and_usage(
+        self, text: str
+    ) -> Tuple[List[float], Optional[Dict]]:
+        return await self.embedder.async_get_embedding_and_usage(text)
+    
+    def get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        return embed_batch(self.embedder, texts), [None] * len(texts)
+    
+    async def async_get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        return await async_embed_batch(self.embedder, texts), [None] * len(texts)
+
+
+_cache: Optional[QueryEmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """Get the process-wide query embedding cache configured in AIConfig"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            config = get_config()
+            _cache = QueryEmbeddingCache(
+                max_entries=config.query_cache_max_entries,
+                ttl_seconds=config.query_cache_ttl_seconds,
+            )
+        return _cache
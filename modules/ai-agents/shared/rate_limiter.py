@@ -0,0 +1,600 @@
+"""
+Client-side rate limiting for AI provider calls.
+Token buckets sized by requests and tokens per minute for each model, with
+adaptive backoff on 429 responses and a priority lane so interactive
+traffic (chatbot, search queries) preempts bulk indexing.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from agno.exceptions import ModelRateLimitError
+from agno.knowledge.embedder.base import Embedder
+
+from config import get_config
+from .embeddings import async_embed_request, embed_request, embedder_model_id, request_size
+from .tokenizer import count_tokens
+
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# How often waiting bulk callers re-check while interactive calls are queued
+PRIORITY_POLL_SECONDS = 0.05
+
+# Longest single sleep, so waiters notice blocks lifted or rates restored
+MAX_SLEEP_SECONDS = 1.0
+
+# Adaptive rate: halved on every 429, recovered step by step on success
+MIN_RATE_FACTOR = 0.1
+RATE_RECOVERY_STEP = 0.05
+
+# Backoff after a 429 without a usable retry-after header (doubles per 429 in a row)
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Bucket refilled continuously up to `capacity` at `per_minute` units a minute"""
+    
+    def __init__(self, capacity: float, per_minute: float):
+        self.capacity = float(capacity)
+        self.rate = per_minute / 60.0
+        self.level = float(capacity)
+        self._updated = time.monotonic()
+    
+    def refill(self, now: float, factor: float = 1.0) -> None:
+        """Add what has accrued since the last refill, scaled by `factor`"""
+        elapsed = max(0.0, now - self._updated)
+        self.level = min(self.capacity, self.level + elapsed * self.rate * factor)
+        self._updated = now
+    
+    def wait_time(self, amount: float, floor: float = 0.0, factor: float = 1.0) -> float:
+        """Seconds until `amount` can be taken while leaving `floor` in the bucket"""
+        amount = min(amount, self.capacity - floor)
+        missing = amount + floor - self.level
+        if missing <= 0:
+            return 0.0
+        return missing / (self.rate * factor) if self.rate > 0 else MAX_SLEEP_SECONDS
+    
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+    
+    def drain_to(self, level: float) -> None:
+        """Lower the level to what the provider reports as remaining"""
+        self.level = min(self.level, float(level))
+
+
+class ModelRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits of one model.
+    
+    Interactive callers may drain the buckets completely; bulk callers must
+    leave `interactive_reserve` of each bucket untouched and wait while any
+    interactive caller is queued, so live traffic is served first without
+    starving bulk jobs when it is idle.
+    
+    Thread-safe, and usable from both threads and the event loop.
+    """
+    
+    def __init__(
+        self,
+        model: str,
+        rpm: int,
+        tpm: int,
+        interactive_reserve: float = 0.2
+    ):
+        """
+        Args:
+            model: Model identifier
+            rpm: Requests per minute
+            tpm: Tokens per minute
+            interactive_reserve: Fraction of each bucket reserved for
+                interactive calls
+        """
+        self.model = model
+        self.requests = TokenBucket(rpm, rpm)
+        self.tokens = TokenBucket(tpm, tpm)
+        self.interactive_reserve = interactive_reserve
+        self.rate_factor = 1.0
+        self.blocked_until = 0.0
+        self.counters = {
+            "requests": 0,
+            "tokens": 0,
+            "rate_limited": 0,
+            "waited_seconds": 0.0,
+        }
+        self._consecutive_limited = 0
+        self._interactive_waiting = 0
+        self._lock = threading.Lock()
+    
+    def _try_acquire(self, tokens: int, priority: str) -> float:
+        """Take one request and `tokens` tokens, or return the seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if priority == BULK and self._interactive_waiting:
+                return PRIORITY_POLL_SECONDS
+            
+            self.requests.refill(now, self.rate_factor)
+            self.tokens.refill(now, self.rate_factor)
+            reserve = 0.0 if priority == INTERACTIVE else self.interactive_reserve
+            wait = max(
+                self.requests.wait_time(1, reserve * self.requests.capacity, self.rate_factor),
+                self.tokens.wait_time(tokens, reserve * self.tokens.capacity, self.rate_factor),
+            )
+            if wait > 0:
+                return wait
+            
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.counters["requests"] += 1
+            self.counters["tokens"] += tokens
+            return 0.0
+    
+    def acquire(self, tokens: int, priority: str = BULK) -> float:
+        """
+        Block until a request of `tokens` tokens may be sent.
+        
+        Args:
+            tokens: Estimated tokens of the request
+            priority: INTERACTIVE or BULK
+            
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.monotonic()
+        self._enter(priority)
+        try:
+            while True:
+                wait = self._try_acquire(tokens, priority)
+                if wait <= 0:
+                    break
+                time.sleep(min(wait, MAX_SLEEP_SECONDS))
+        finally:
+            self._leave(priority)
+        return self._waited(start)
+    
+    async def acquire_async(self, tokens: int, priority: str = BULK) -> float:
+        """Async variant of acquire() that sleeps without blocking the event loop"""
+        start = time.monotonic()
+        self._enter(priority)
+        try:
+            while True:
+                wait = self._try_acquire(tokens, priority)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, MAX_SLEEP_SECONDS))
+        finally:
+            self._leave(priority)
+        return self._waited(start)
+    
+    def _enter(self, priority: str) -> None:
+        if priority == INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting += 1
+    
+    def _leave(self, priority: str) -> None:
+        if priority == INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting -= 1
+    
+    def _waited(self, start: float) -> float:
+        waited = time.monotonic() - start
+        with self._lock:
+            self.counters["waited_seconds"] += waited
+        return waited
+    
+    def record_success(self, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Note a successful call; the rate recovers gradually after 429s"""
+        with self._lock:
+            self._consecutive_limited = 0
+            self.rate_factor = min(1.0, self.rate_factor + RATE_RECOVERY_STEP)
+        if headers:
+            self.record_headers(headers)
+    
+    def record_usage(self, estimated: int, actual: int) -> None:
+        """
+        Correct the tokens taken for a call once its actual usage is known.
+        
+        Args:
+            estimated: Tokens acquired before the call
+            actual: Tokens the provider billed
+        """
+        extra = actual - estimated
+        with self._lock:
+            if extra > 0:
+                self.tokens.take(extra)
+            else:
+                self.tokens.level = min(self.tokens.capacity, self.tokens.level - extra)
+            self.counters["tokens"] += extra
+    
+    def record_rate_limited(self, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Back off after a 429 response.
+        
+        All callers are blocked for the retry-after / reset time the provider
+        reports (exponential backoff when it reports none), and the refill
+        rate is halved until calls succeed again.
+        
+        Args:
+            headers: Response headers of the 429
+            
+        Returns:
+            Backoff delay in seconds
+        """
+        delay = _retry_after(headers or {})
+        with self._lock:
+            if delay is None:
+                delay = min(
+                    BACKOFF_BASE_SECONDS * 2 ** self._consecutive_limited,
+                    BACKOFF_MAX_SECONDS,
+                )
+            self._consecutive_limited += 1
+            self.counters["rate_limited"] += 1
+            self.rate_factor = max(MIN_RATE_FACTOR, self.rate_factor / 2)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        if headers:
+            self.record_headers(headers)
+        return delay
+    
+    def record_headers(self, headers: Mapping[str, str]) -> None:
+        """Sync the buckets with the remaining quota reported by the provider"""
+        headers = {key.lower(): value for key, value in headers.items()}
+        with self._lock:
+            for header, bucket in (
+                ("x-ratelimit-remaining-requests", self.requests),
+                ("x-ratelimit-remaining-tokens", self.tokens),
+            ):
+                try:
+                    bucket.drain_to(float(headers[header]))
+                except (KeyError, ValueError):
+                    pass
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters and current bucket levels"""
+        with self._lock:
+            return {
+                "model": self.model,
+                **self.counters,
+                "rate_factor": self.rate_factor,
+                "requests_available": self.requests.level,
+                "tokens_available": self.tokens.level,
+            }
+
+
+def _error_chain(error: Optional[BaseException]) -> Iterator[BaseException]:
+    """An exception followed by the ones it wraps (agno re-raises provider errors)"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an exception is, or wraps, a provider 429 response"""
+    for e in _error_chain(error):
+        if isinstance(e, ModelRateLimitError):
+            return True
+        # agno's EmbeddingError keeps the provider's code in provider_status_code
+        # (status_code defaults to 502 when the provider reported none)
+        codes = (
+            getattr(e, "provider_status_code", None),
+            getattr(e, "status_code", None),
+            getattr(getattr(e, "response", None), "status_code", None),
+        )
+        if 429 in codes:
+            return True
+    return False
+
+
+def error_headers(error: BaseException) -> Mapping[str, str]:
+    """Response headers carried by a provider exception or the error it wraps"""
+    for e in _error_chain(error):
+        headers = getattr(getattr(e, "response", None), "headers", None)
+        if headers:
+            return headers
+    return {}
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait according to retry-after / x-ratelimit-reset-* headers"""
+    headers = {key.lower(): value for key, value in headers.items()}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    
+    resets = [
+        _parse_duration(headers[header])
+        for header in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if header in headers
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse durations such as "20ms", "1s" or "6m0s" to seconds"""
+    units = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", value)
+    if not parts:
+        return None
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+
+@dataclass
+class RateLimitedEmbedder(Embedder):
+    """
+    agno embedder that schedules provider calls through a ModelRateLimiter.
+    
+    Single-text get_embedding() calls are search queries and use the
+    interactive lane; document and batch embeddings use the bulk lane. Every
+    provider request takes its own limiter slot (a batch is split the way
+    embed_batch would send it), its response headers resync the buckets,
+    and 429 responses are retried after the limiter's backoff.
+    """
+    
+    embedder: Optional[Embedder] = None
+    limiter: Optional[ModelRateLimiter] = None
+    max_retries: int = 5
+    
+    def __post_init__(self):
+        if self.embedder is None:
+            raise ValueError("RateLimitedEmbedder requires an embedder to wrap")
+        if self.limiter is None:
+            self.limiter = get_rate_limiter(self.model_id)
+        self.dimensions = self.embedder.dimensions
+        self.enable_batch = True
+    
+    @property
+    def model_id(self) -> str:
+        """Identifier of the wrapped embedding model"""
+        return embedder_model_id(self.embedder)
+    
+    def _call(
+        self,
+        texts: List[str],
+        priority: str,
+        fn: Callable[[], Tuple[T, Mapping[str, str]]]
+    ) -> T:
+        tokens = sum(count_tokens(text, self.model_id) for text in texts)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(tokens, priority)
+            try:
+                result, headers = fn()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                self.limiter.record_rate_limited(error_headers(e))
+                continue
+            self.limiter.record_success(headers)
+            return result
+    
+    async def _acall(
+        self,
+        texts: List[str],
+        priority: str,
+        fn: Callable[[], Awaitable[Tuple[T, Mapping[str, str]]]]
+    ) -> T:
+        tokens = sum(count_tokens(text, self.model_id) for text in texts)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire_async(tokens, priority)
+            try:
+                result, headers = await fn()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                self.limiter.record_rate_limited(error_headers(e))
+                continue
+            self.limiter.record_success(headers)
+            return result
+    
+    def _requests(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into the provider requests embed_batch would send"""
+        size = request_size(self.embedder) or len(texts)
+        return [texts[start:start + size] for start in range(0, len(texts), size)]
+    
+    def _embed(self, text: str, priority: str) -> List[float]:
+        vectors = self._call([text], priority, lambda: embed_request(self.embedder, [text]))
+        return vectors[0]
+    
+    async def _aembed(self, text: str, priority: str) -> List[float]:
+        vectors = await self._acall(
+            [text], priority, lambda: async_embed_request(self.embedder, [text])
+        )
+        return vectors[0]
+    
+    def get_embedding(self, text: str) -> List[float]:
+        return self._embed(text, INTERACTIVE)
+    
+    async def async_get_embedding(self, text: str) -> List[float]:
+        return await self._aembed(text, INTERACTIVE)
+    
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return self._embed(text, BULK), None
+    
+    async def async_get_embedding_and_usage(
+        self, text: str
+    ) -> Tuple[List[float], Optional[Dict]]:
+        return await self._aembed(text, BULK), None
+    
+    def get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        vectors = []
+        for request in self._requests(texts):
+            vectors.extend(self._call(
+                request, BULK, lambda request=request: embed_request(self.embedder, request)
+            ))
+        return vectors, [None] * len(texts)
+    
+    async def async_get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        vectors = []
+        for request in self._requests(texts):
+            vectors.extend(await self._acall(
+                request, BULK, lambda request=request: async_embed_request(self.embedder, request)
+            ))
+        return vectors, [None] * len(texts)
+
+
+class RateLimitedModel:
+    """
+    Mixin for agno models that schedules every provider request through
+    the model's ModelRateLimiter (when RATE_LIMIT_ENABLED is set).
+    
+    An agent run with tool calls sends several requests; each takes its
+    own interactive slot sized by its messages, tool definitions and a
+    completion reserve, is trued up with the usage the provider reports
+    (also for streams) and backs off the limiter on 429s.
+    
+    Usage: `class LimitedChat(RateLimitedModel, OpenAIChat): pass`
+    """
+    
+    def _request_limiter(self) -> Optional[ModelRateLimiter]:
+        if not get_config().rate_limit_enabled:
+            return None
+        return get_rate_limiter(self.id)
+    
+    def _request_tokens(self, args: tuple, kwargs: Dict[str, Any]) -> int:
+        """Estimated tokens of one request: prompt, tools and completion reserve"""
+        messages = kwargs.get("messages", args[0] if args else [])
+        prompt = [message.get_content_string() for message in messages]
+        prompt.extend(json.dumps(message.tool_calls) for message in messages if message.tool_calls)
+        if kwargs.get("tools"):
+            prompt.append(json.dumps(kwargs["tools"], default=str))
+        completion = (
+            getattr(self, "max_completion_tokens", None)
+            or getattr(self, "max_tokens", None)
+            or get_config().rate_limit_completion_tokens
+        )
+        return count_tokens("\n".join(prompt), self.id) + completion
+    
+    @staticmethod
+    def _settle(limiter: ModelRateLimiter, estimate: int, usage: Any) -> None:
+        limiter.record_success()
+        if usage is not None and getattr(usage, "total_tokens", 0):
+            limiter.record_usage(estimate, usage.total_tokens)
+    
+    @staticmethod
+    def _failed(limiter: ModelRateLimiter, error: Exception) -> None:
+        if is_rate_limit_error(error):
+            limiter.record_rate_limited(error_headers(error))
+    
+    def invoke(self, *args, **kwargs):
+        limiter = self._request_limiter()
+        if limiter is None:
+            return super().invoke(*args, **kwargs)
+        estimate = self._request_tokens(args, kwargs)
+        limiter.acquire(estimate, INTERACTIVE)
+        try:
+            response = super().invoke(*args, **kwargs)
+        except Exception as e:
+            self._failed(limiter, e)
+            raise
+        self._settle(limiter, estimate, response.response_usage)
+        return response
+    
+    async def ainvoke(self, *args, **kwargs):
+        limiter = self._request_limiter()
+        if limiter is None:
+            return await super().ainvoke(*args, **kwargs)
+        estimate = self._request_tokens(args, kwargs)
+        await limiter.acquire_async(estimate, INTERACTIVE)
+        try:
+            response = await super().ainvoke(*args, **kwargs)
+        except Exception as e:
+            self._failed(limiter, e)
+            raise
+        self._settle(limiter, estimate, response.response_usage)
+        return response
+    
+    def invoke_stream(self, *args, **kwargs) -> Iterator[Any]:
+        limiter = self._request_limiter()
+        if limiter is None:
+            yield from super().invoke_stream(*args, **kwargs)
+            return
+        estimate = self._request_tokens(args, kwargs)
+        limiter.acquire(estimate, INTERACTIVE)
+        usage = None
+        try:
+            for response in super().invoke_stream(*args, **kwargs):
+                usage = response.response_usage or usage
+                yield response
+        except Exception as e:
+            self._failed(limiter, e)
+            raise
+        self._settle(limiter, estimate, usage)
+    
+    async def ainvoke_stream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        limiter = self._request_limiter()
+        if limiter is None:
+            async for response in super().ainvoke_stream(*args, **kwargs):
+                yield response
+            return
+        estimate = self._request_tokens(args, kwargs)
+        await limiter.acquire_async(estimate, INTERACTIVE)
+        usage = None
+        try:
+            async for response in super().ainvoke_stream(*args, **kwargs):
+                usage = response.response_usage or usage
+                yield response
+        except Exception as e:
+            self._failed(limiter, e)
+            raise
+        self._settle(limiter, estimate, usage)
+
+
+_limiters: Dict[str, ModelRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> ModelRateLimiter:
+    """
+    Get the process-wide rate limiter of a model.
+    
+    Limits come from RATE_LIMITS (JSON mapping model ids to {"rpm", "tpm"})
+    and fall back to RATE_LIMIT_DEFAULT_RPM / RATE_LIMIT_DEFAULT_TPM.
+    
+    Args:
+        model: Model identifier
+        
+    Returns:
+        Shared ModelRateLimiter
+    """
+    with _limiters_lock:
+        if model not in _limiters:
+            config = get_config()
+            limits = json.loads(config.rate_limits or "{}").get(model, {})
+            _limiters[model] = ModelRateLimiter(
+                model,
+                rpm=limits.get("rpm", config.rate_limit_default_rpm),
+                tpm=limits.get("tpm", config.rate_limit_default_tpm),
+                interactive_reserve=config.rate_limit_interactive_reserve,
+            )
+        return _limiters[model]
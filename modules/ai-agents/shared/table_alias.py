@@ -0,0 +1,142 @@
+"""
+Table aliases for LanceDB knowledge bases.
+Maps a logical table name (e.g. "product_catalog") to the physical table
+readers should open, so a rebuilt table can be swapped in atomically.
+
+Aliases live in a small LanceDB table next to the data tables, so they
+work with every URI LanceDB supports (local directories and object
+stores alike).
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import lancedb
+import pyarrow as pa
+
+ALIAS_TABLE = "_table_aliases"
+# Readers check the alias table for a newer version at most this often;
+# swaps made in the same process are seen immediately
+ALIAS_CHECK_SECONDS = 1.0
+
+_ALIAS_SCHEMA = pa.schema([
+    pa.field("table_name", pa.string()),
+    pa.field("physical_name", pa.string()),
+])
+
+
+@dataclass
+class _AliasState:
+    """Alias table of one database, and the last alias map read from it"""
+    db: Any
+    table: Any = None
+    version: Optional[int] = None
+    checked: float = float("-inf")
+    aliases: Dict[str, str] = field(default_factory=dict)
+
+
+_lock = threading.Lock()
+_states: Dict[str, _AliasState] = {}
+
+
+def list_tables(db) -> List[str]:
+    """
+    Names of all tables of a LanceDB connection.
+    
+    Follows the page tokens of list_tables(); older LanceDB versions
+    without it fall back to table_names().
+    """
+    if not hasattr(db, "list_tables"):
+        return list(db.table_names())
+    
+    names: List[str] = []
+    page_token = None
+    while True:
+        response = db.list_tables(page_token=page_token)
+        names.extend(response.tables)
+        page_token = response.page_token
+        if not page_token:
+            return names
+
+
+def _state(uri: str) -> _AliasState:
+    state = _states.get(uri)
+    if state is None:
+        state = _states[uri] = _AliasState(db=lancedb.connect(uri))
+    return state
+
+
+def _refresh(state: _AliasState) -> None:
+    """Re-read the alias map if the alias table has a newer version"""
+    state.checked = time.monotonic()
+    if state.table is None:
+        try:
+            state.table = state.db.open_table(ALIAS_TABLE)
+        except ValueError:
+            return
+    else:
+        state.table.checkout_latest()
+    
+    if state.table.version != state.version:
+        rows = state.table.to_arrow().to_pylist()
+        state.aliases = {row["table_name"]: row["physical_name"] for row in rows}
+        state.version = state.table.version
+
+
+def resolve_table(uri: str, table_name: str) -> str:
+    """
+    Resolve a logical table name to the physical table to open.
+    
+    Args:
+        uri: LanceDB URI
+        table_name: Logical table name
+        
+    Returns:
+        Physical table name (the logical name itself when no alias is set)
+    """
+    with _lock:
+        state = _state(uri)
+        if time.monotonic() - state.checked >= ALIAS_CHECK_SECONDS:
+            _refresh(state)
+        return state.aliases.get(table_name, table_name)
+
+
+def set_alias(uri: str, table_name: str, physical_name: Optional[str]) -> None:
+    """
+    Atomically point a logical table name at a physical table.
+    
+    The alias row is upserted (or deleted) in a single commit of the alias
+    table, so readers always see either the old or the new mapping.
+    
+    Args:
+        uri: LanceDB URI
+        table_name: Logical table name
+        physical_name: Physical table to point at (None removes the alias)
+    """
+    with _lock:
+        state = _state(uri)
+        if physical_name is None or physical_name == table_name:
+            _refresh(state)
+            if state.table is not None:
+                state.table.delete(f"table_name = '{_quote(table_name)}'")
+        else:
+            if state.table is None:
+                state.table = state.db.create_table(
+                    ALIAS_TABLE, schema=_ALIAS_SCHEMA, exist_ok=True
+                )
+            (
+                state.table.merge_insert("table_name")
+                .when_matched_update_all()
+                .when_not_matched_insert_all()
+                .execute(pa.Table.from_pylist(
+                    [{"table_name": table_name, "physical_name": physical_name}],
+                    schema=_ALIAS_SCHEMA,
+                ))
+            )
+        _refresh(state)
+
+
+def _quote(value: str) -> str:
+    """Escape a string literal for a LanceDB filter"""
+    return value.replace("'", "''")
@@ -0,0 +1,104 @@
+"""
+Local tokenizer for AI agents.
+Counts, truncates and splits text by model tokens with tiktoken when it is
+installed, and falls back to a character-based estimate otherwise.
+"""
+import functools
+from typing import List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+from .embeddings import CHARS_PER_TOKEN, estimate_tokens
+
+
+# Encoding of the OpenAI text-embedding-3 / gpt-4 model families
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model: Optional[str] = None):
+    """
+    tiktoken encoding of a model.
+    
+    Args:
+        model: Model id (unknown models use DEFAULT_ENCODING)
+        
+    Returns:
+        Encoding, or None when tiktoken is not installed or its encoding
+        files cannot be loaded (e.g. offline without a TIKTOKEN_CACHE_DIR)
+    """
+    if tiktoken is None:
+        return None
+    if model:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            pass
+        except Exception:
+            return None
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of tokens in a text"""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    Cut a text to at most `max_tokens` tokens.
+    
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+        model: Model id
+        
+    Returns:
+        The text itself if it fits, otherwise its leading `max_tokens` tokens
+    """
+    return split_tokens(text, max_tokens, model)[0]
+
+
+def split_tokens(
+    text: str,
+    max_tokens: int,
+    model: Optional[str] = None,
+    overlap: int = 0
+) -> List[str]:
+    """
+    Split a text into consecutive pieces of at most `max_tokens` tokens.
+    
+    Args:
+        text: Text to split
+        max_tokens: Token budget per piece
+        model: Model id
+        overlap: Tokens repeated at the start of each following piece
+        
+    Returns:
+        Pieces in order (a single piece if the text fits)
+    """
+    step = max(1, max_tokens - overlap)
+    encoding = get_encoding(model)
+    if encoding is None:
+        size = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= size:
+            return [text]
+        stride = step * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text) - size + stride, stride)]
+    
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return [text]
+    return [
+        encoding.decode(tokens[i:i + max_tokens])
+        for i in range(0, len(tokens) - max_tokens + step, step)
+    ]
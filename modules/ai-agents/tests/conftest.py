@@ -0,0 +1,104 @@
+"""
+Shared fixtures for the AI agents tests.
+
+Tests run offline: embeddings come from the deterministic hashing embedder
+and every store (LanceDB, embedding cache, indexing journal) lives in a
+per-test temporary directory.
+"""
+import json
+import os
+import sys
+
+import httpx
+import pytest
+from agno.knowledge.embedder.openai import OpenAIEmbedder
+from openai import AsyncOpenAI, OpenAI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import get_config  # noqa: E402
+
+
+class FakeOpenAI:
+    """OpenAI embeddings endpoint served from an httpx mock transport"""
+    
+    def __init__(self):
+        self.requests = []
+        self.headers = {}
+        # Responses returned (in order) before requests start succeeding
+        self.failures = []
+    
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        if self.failures:
+            return self.failures.pop(0)
+        dimensions = body.get("dimensions", 8)
+        data = [
+            {"object": "embedding", "index": i, "embedding": [float(len(text))] * dimensions}
+            for i, text in enumerate(body["input"])
+        ]
+        return httpx.Response(200, json={
+            "object": "list",
+            "data": data,
+            "model": body["model"],
+            "usage": {"prompt_tokens": 1, "total_tokens": 1},
+        }, headers=self.headers)
+    
+    def embedder(self, **kwargs) -> OpenAIEmbedder:
+        transport = httpx.MockTransport(self.handle)
+        return OpenAIEmbedder(
+            openai_client=OpenAI(
+                api_key="test", max_retries=0, http_client=httpx.Client(transport=transport)
+            ),
+            async_client=AsyncOpenAI(
+                api_key="test", max_retries=0, http_client=httpx.AsyncClient(transport=transport)
+            ),
+            **kwargs,
+        )
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """The AIConfig singleton pointed at temporary stores, restored after the test"""
+    from product_rag import checkpoint
+    from shared import embedding_cache, query_cache, rate_limiter
+    
+    config = get_config()
+    overrides = {
+        "embedding_provider": "hashing",
+        "hashing_embedding_dimensions": 64,
+        "product_embedding_dimensions": 0,
+        "product_matryoshka_rerank": False,
+        "vector_quantization": "none",
+        "product_search_type": "hybrid",
+        "lancedb_uri": str(tmp_path / "lancedb"),
+        "embedding_cache_enabled": False,
+        "embedding_cache_path": str(tmp_path / "embedding_cache.sqlite"),
+        "indexing_journal_path": str(tmp_path / "indexing_journal.sqlite"),
+        "rate_limit_enabled": False,
+        "embedding_max_retries": 0,
+    }
+    for name, value in overrides.items():
+        monkeypatch.setattr(config, name, value)
+    monkeypatch.setattr(checkpoint, "_journal", None)
+    monkeypatch.setattr(embedding_cache, "_cache", None)
+    monkeypatch.setattr(query_cache, "_cache", None)
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    return config
+
+
+@pytest.fixture
+def indexer(config):
+    """Initialized ProductIndexer on an empty table"""
+    from product_rag import ProductIndexer
+    
+    indexer = ProductIndexer()
+    indexer.initialize()
+    return indexer
+
+
+@pytest.fixture
+def openai_provider():
+    """Fake OpenAI embeddings endpoint recording the requests it receives"""
+    return FakeOpenAI()
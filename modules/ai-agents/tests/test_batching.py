@@ -0,0 +1,66 @@
+"""Token-packed embedding requests"""
+import asyncio
+
+import pytest
+
+from product_rag import generate_catalog
+from shared.batching import (
+    SPLIT,
+    RequestLimits,
+    async_embed_packed,
+    embed_packed,
+    plan_embeddings,
+)
+from shared.hashing_embedder import HashingEmbedder
+from shared.tokenizer import count_tokens
+
+
+LIMITS = RequestLimits(max_input_tokens=20, max_request_tokens=50, max_items=4, oversize=SPLIT)
+
+
+def _texts():
+    return ["surub inox M8 " * 12, "becuri LED E27", "cablu cupru 3x2.5 mm", "priza dubla"] * 3
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_packed_requests_respect_the_limits(run_async):
+    embedder = HashingEmbedder(dimensions=16)
+    texts = _texts()
+    sent = []
+    
+    def send(inputs, tokens):
+        sent.append((inputs, tokens))
+        return [embedder.get_embedding(text) for text in inputs]
+    
+    async def asend(inputs, tokens):
+        return send(inputs, tokens)
+    
+    if run_async:
+        vectors = asyncio.run(async_embed_packed(embedder, texts, LIMITS, send=asend))
+    else:
+        vectors = embed_packed(embedder, texts, LIMITS, send=send)
+    
+    assert len(vectors) == len(texts)
+    for inputs, tokens in sent:
+        assert len(inputs) <= LIMITS.max_items
+        assert tokens == sum(count_tokens(text) for text in inputs) <= LIMITS.max_request_tokens
+        assert all(count_tokens(text) <= LIMITS.max_input_tokens for text in inputs)
+    # The oversize text was split into chunks and the short ones sent as-is
+    assert len(sent) == len(plan_embeddings(texts, LIMITS).requests)
+    assert vectors[1] == embedder.get_embedding(texts[1])
+    assert vectors[0] != embedder.get_embedding(texts[0])
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_indexer_embeds_in_packed_requests(indexer, run_async):
+    indexer.request_limits = LIMITS
+    products = list(generate_catalog(10))
+    
+    if run_async:
+        stats = asyncio.run(indexer.index_products_async(products))
+    else:
+        stats = indexer.index_products(products)
+    
+    assert stats["embedded"] == 10
+    assert stats["batch_size"]["max"] <= LIMITS.max_items
+    assert stats["stages"]["embed"]["count"] == stats["batch_size"]["count"]
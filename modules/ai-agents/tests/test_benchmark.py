@@ -0,0 +1,38 @@
+"""Benchmark regression gate"""
+from product_rag.benchmark import compare, median_summary
+
+
+def _results(products_per_second, p99_ms):
+    return {"sizes": {"1000": {
+        "index": {"products_per_second": products_per_second, "peak_rss_mb": 100.0},
+        "search": {"brute_force": {"unfiltered": {"p50_ms": 1.0, "p95_ms": 1.5, "p99_ms": p99_ms}}},
+    }}}
+
+
+def test_latency_changes_under_the_noise_floor_are_ignored():
+    baseline = _results(1000.0, p99_ms=2.0)
+    
+    assert compare(_results(1000.0, p99_ms=3.9), baseline, 10, min_change_ms=2.0) == []
+    regressions = compare(_results(1000.0, p99_ms=4.5), baseline, 10, min_change_ms=2.0)
+    assert [r["metric"] for r in regressions] == ["1000.search.brute_force.unfiltered.p99_ms"]
+
+
+def test_p99_has_its_own_allowance():
+    baseline = _results(1000.0, p99_ms=40.0)
+    
+    assert compare(_results(1000.0, p99_ms=48.0), baseline, 10, max_tail_regression=25) == []
+    regressions = compare(_results(1000.0, p99_ms=52.0), baseline, 10, max_tail_regression=25)
+    assert [r["metric"] for r in regressions] == ["1000.search.brute_force.unfiltered.p99_ms"]
+
+
+def test_throughput_regressions_are_reported():
+    regressions = compare(_results(800.0, p99_ms=2.0), _results(1000.0, p99_ms=2.0), 10)
+    
+    assert [r["metric"] for r in regressions] == ["1000.index.products_per_second"]
+    assert regressions[0]["change_percent"] == -20.0
+
+
+def test_repeated_runs_are_summarised_by_their_median():
+    runs = [{"p50_ms": 1.0, "p99_ms": 9.0}, {"p50_ms": 3.0, "p99_ms": 2.0}, {"p50_ms": 2.0, "p99_ms": 3.0}]
+    
+    assert median_summary(runs) == {"p50_ms": 2.0, "p99_ms": 3.0}
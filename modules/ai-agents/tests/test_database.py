@@ -0,0 +1,82 @@
+"""Streaming products out of PostgreSQL through a named cursor"""
+from psycopg2.extras import RealDictCursor
+
+from product_rag import generate_catalog
+from product_rag.database import stream_rows
+
+
+class FakeCursor:
+    """Server-side cursor serving rows in fetchmany pages"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.position = 0
+        self.itersize = 2000
+        self.executed = []
+        self.fetches = []
+        self.closed = False
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.closed = True
+    
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+    
+    def fetchmany(self, size):
+        self.fetches.append(size)
+        page = self.rows[self.position:self.position + size]
+        self.position += len(page)
+        return page
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.cursor_args = []
+        self.last_cursor = FakeCursor(rows)
+    
+    def cursor(self, **kwargs):
+        self.cursor_args.append(kwargs)
+        return self.last_cursor
+
+
+def _rows(count):
+    return [{"id": f"p{i}", "sku": f"SKU-{i}"} for i in range(count)]
+
+
+def test_rows_are_fetched_in_pages_through_a_named_cursor():
+    conn = FakeConnection(_rows(5))
+    
+    rows = list(stream_rows(conn, "SELECT 1", params=("x",), fetch_size=2))
+    
+    assert rows == _rows(5)
+    assert conn.cursor_args == [{"name": "product_rag_stream", "cursor_factory": RealDictCursor}]
+    cursor = conn.last_cursor
+    assert cursor.executed == [("SELECT 1", ("x",))]
+    assert cursor.itersize == 2
+    assert cursor.fetches == [2, 2, 2, 2]
+    assert cursor.closed
+
+
+def test_pages_are_fetched_lazily_and_the_cursor_closed_early():
+    conn = FakeConnection(_rows(10))
+    
+    rows = stream_rows(conn, fetch_size=3)
+    assert next(rows) == {"id": "p0", "sku": "SKU-0"}
+    assert conn.last_cursor.fetches == [3]
+    rows.close()
+    
+    assert conn.last_cursor.closed
+
+
+def test_index_from_database_streams_rows_into_the_index(indexer):
+    products = list(generate_catalog(25))
+    conn = FakeConnection([product.model_dump() for product in products])
+    
+    stats = indexer.index_from_database(conn, batch_size=10, fetch_size=4)
+    
+    assert stats["embedded"] == 25
+    assert conn.last_cursor.fetches == [4] * 8
+    assert indexer.table.count_rows() == 25
@@ -0,0 +1,86 @@
+"""Persistent embedding cache"""
+from dataclasses import dataclass
+from typing import List
+
+from agno.knowledge.embedder.base import Embedder
+
+from shared.embedding_cache import CachedEmbedder, EmbeddingCache
+
+
+@dataclass
+class FlakyEmbedder(Embedder):
+    """Returns empty or short vectors while `broken` is set, like agno on a provider error"""
+    
+    dimensions: int = 4
+    broken: str = ""
+    calls: int = 0
+    
+    def get_embedding(self, text: str) -> List[float]:
+        self.calls += 1
+        if self.broken == "empty":
+            return []
+        if self.broken == "short":
+            return [1.0] * (self.dimensions - 1)
+        return [float(len(text))] * self.dimensions
+
+
+def _cached(tmp_path):
+    embedder = FlakyEmbedder()
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_bytes=1 << 20)
+    return embedder, CachedEmbedder(embedder=embedder, cache=cache)
+
+
+def test_repeated_texts_are_served_from_the_cache(tmp_path):
+    embedder, cached = _cached(tmp_path)
+    
+    first, _ = cached.get_embeddings_batch_and_usage(["a", "bb", "a"])
+    second, _ = cached.get_embeddings_batch_and_usage(["bb", "a"])
+    
+    assert first == [[1.0] * 4, [2.0] * 4, [1.0] * 4]
+    assert second == [[2.0] * 4, [1.0] * 4]
+    assert embedder.calls == 2
+
+
+def test_failed_embeddings_are_not_cached(tmp_path):
+    embedder, cached = _cached(tmp_path)
+    for broken in ("empty", "short"):
+        embedder.broken = broken
+        cached.get_embeddings_batch_and_usage(["panel"])
+        cached.get_embedding("bulb")
+    
+    embedder.broken = ""
+    vectors, _ = cached.get_embeddings_batch_and_usage(["panel"])
+    
+    assert vectors == [[5.0] * 4]
+    assert cached.get_embedding("bulb") == [4.0] * 4
+    assert cached.cache.stats()["entries"] == 2
+
+
+def test_models_behind_wrappers_do_not_share_cache_entries(config, monkeypatch, openai_provider):
+    from shared import create_embedder
+    from shared.embeddings import embedder_model_id
+    
+    monkeypatch.setattr(config, "embedding_provider", "openai")
+    monkeypatch.setattr(config, "openai_api_key", "test")
+    monkeypatch.setattr(config, "rate_limit_enabled", True)
+    monkeypatch.setattr(config, "embedding_cache_enabled", True)
+    
+    def embed(model: str) -> List[float]:
+        monkeypatch.setattr(config, "openai_embedding_model", model)
+        embedder = create_embedder(8)
+        base = embedder
+        while getattr(base, "embedder", None) is not None:
+            base = base.embedder
+        base.openai_client = openai_provider.embedder().openai_client
+        assert embedder_model_id(embedder) == model
+        return embedder.get_embedding("panou led 60x60")
+    
+    embed("text-embedding-3-small")
+    embed("text-embedding-3-small")
+    assert len(openai_provider.requests) == 1
+    
+    embed("text-embedding-3-large")
+    assert [request["model"] for request in openai_provider.requests] == [
+        "text-embedding-3-small",
+        "text-embedding-3-large",
+    ]
@@ -0,0 +1,47 @@
+"""Batched embedding calls"""
+import asyncio
+import math
+
+from product_rag import generate_catalog
+from shared.embeddings import async_embed_batch, embed_batch
+
+
+def test_embed_batch_sends_one_request_per_batch(openai_provider):
+    texts = [f"text {'x' * i}" for i in range(250)]
+    
+    vectors = embed_batch(openai_provider.embedder(dimensions=16), texts)
+    
+    assert [len(request["input"]) for request in openai_provider.requests] == [100, 100, 50]
+    assert all(request["dimensions"] == 16 for request in openai_provider.requests)
+    assert [vector[0] for vector in vectors] == [float(len(text)) for text in texts]
+
+
+def test_async_embed_batch_sends_one_request_per_batch(openai_provider):
+    texts = [f"text {i}" for i in range(120)]
+    
+    vectors = asyncio.run(async_embed_batch(openai_provider.embedder(batch_size=50), texts))
+    
+    assert [len(request["input"]) for request in openai_provider.requests] == [50, 50, 20]
+    assert len(vectors) == 120
+
+
+def test_indexing_sync_and_async_use_the_same_number_of_requests(indexer, openai_provider):
+    products = list(generate_catalog(200))
+    
+    indexer.embedder = openai_provider.embedder(dimensions=indexer.dimensions)
+    indexer.index_products(products, batch_size=100)
+    sync_requests = len(openai_provider.requests)
+    indexer.table.delete("true")
+    openai_provider.requests.clear()
+    asyncio.run(indexer.index_products_async(products, batch_size=100))
+    
+    # One request per 100 field texts of each batch of 100 products
+    expected = sum(
+        math.ceil(sum(
+            len(texts) for product in products[start:start + 100]
+            for texts in indexer._product_fields(product).values()
+        ) / 100)
+        for start in (0, 100)
+    )
+    assert sync_requests == expected
+    assert len(openai_provider.requests) == expected
@@ -0,0 +1,50 @@
+"""Content-hash incremental reindexing"""
+import asyncio
+
+import pytest
+
+from product_rag import generate_catalog
+
+
+def _index(indexer, products, run_async, **kwargs):
+    if run_async:
+        return asyncio.run(indexer.index_products_async(products, batch_size=10, **kwargs))
+    return indexer.index_products(products, batch_size=10, **kwargs)
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_unchanged_products_are_skipped(indexer, run_async):
+    products = list(generate_catalog(30))
+    _index(indexer, products, run_async)
+    
+    changed = [
+        product.model_copy(update={"description": f"{product.description} Nou."})
+        if i < 3 else product
+        for i, product in enumerate(products)
+    ]
+    stats = _index(indexer, changed, run_async)
+    
+    assert (stats["embedded"], stats["skipped"], stats["deleted"]) == (3, 27, 0)
+    assert stats["processed"] == 30
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_delete_missing_removes_products_left_out_of_the_catalog(indexer, run_async):
+    products = list(generate_catalog(30))
+    _index(indexer, products, run_async)
+    
+    stats = _index(indexer, products[:25], run_async, delete_missing=True)
+    
+    assert (stats["embedded"], stats["skipped"], stats["deleted"]) == (0, 25, 5)
+    rows = indexer.table.search().select(["product_id"]).limit(100).to_list()
+    assert {row["product_id"] for row in rows} == {product.id for product in products[:25]}
+
+
+def test_products_left_out_are_kept_without_delete_missing(indexer):
+    products = list(generate_catalog(30))
+    indexer.index_products(products, batch_size=10)
+    
+    stats = indexer.index_products(products[:25], batch_size=10)
+    
+    assert stats["deleted"] == 0
+    assert indexer.table.count_rows() == 30
@@ -0,0 +1,41 @@
+"""Scalar and full-text index maintenance"""
+from lancedb.index import BTree
+
+from product_rag import generate_catalog
+from product_rag.vector_index import SCALAR_INDICES, ensure_scalar_indices, index_types
+
+
+def _indices(table):
+    return sorted(index.name for index in table.list_indices())
+
+
+def test_refresh_keeps_existing_indices_and_indexes_new_rows(indexer):
+    products = list(generate_catalog(200))
+    indexer.index_products(products[:100])
+    built = _indices(indexer.table)
+    assert index_types(indexer.table) == {
+        **{column: [index_type] for column, index_type in SCALAR_INDICES.items()},
+        "text": ["FTS"],
+    }
+    
+    summary = indexer.index_products(products[100:])
+    
+    assert summary["scalar_indices"]["action"] == "none"
+    assert summary["text_index"]["action"] == "none"
+    assert _indices(indexer.table) == built
+    # optimize() folded the new rows into the existing indices
+    for name in built:
+        stats = indexer.table.index_stats(name)
+        assert (stats.num_indexed_rows, stats.num_unindexed_rows) == (indexer.table.count_rows(), 0)
+
+
+def test_index_of_the_wrong_type_is_rebuilt(indexer):
+    indexer.index_products(generate_catalog(50))
+    # A table indexed with an older index configuration
+    indexer.table.drop_index("category_idx")
+    indexer.table.create_index("category", config=BTree())
+    
+    summary = ensure_scalar_indices(indexer.table)
+    
+    assert summary == {"action": "built", "built": [], "rebuilt": ["category"]}
+    assert index_types(indexer.table)["category"] == [SCALAR_INDICES["category"]]
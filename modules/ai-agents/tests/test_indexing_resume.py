@@ -0,0 +1,101 @@
+"""Checkpointed, resumable indexing runs"""
+import asyncio
+
+import pytest
+
+from product_rag import generate_catalog
+from product_rag.checkpoint import RunCheckpoint
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _products(count, fail_after=None):
+    for i, product in enumerate(generate_catalog(count)):
+        if fail_after is not None and i == fail_after:
+            raise Interrupted()
+        yield product
+
+
+async def _aproducts(count, fail_after=None):
+    for i, product in enumerate(generate_catalog(count)):
+        if fail_after is not None and i == fail_after:
+            # Let the batches read so far drain through the pipeline
+            await asyncio.sleep(1.0)
+            raise Interrupted()
+        yield product
+
+
+def _indexed_ids(indexer):
+    rows = indexer.table.search().select(["product_id"]).limit(100_000).to_list()
+    return {row["product_id"] for row in rows}
+
+
+def test_resume_sync_source(indexer):
+    with pytest.raises(Interrupted):
+        indexer.index_products(_products(600, fail_after=250), batch_size=100, run_id="sync")
+    run = indexer.journal.get_run("sync")
+    assert run.cursor == 200
+    
+    stats = indexer.resume("sync", products=_products(600))
+    
+    assert stats["run_status"] == "completed"
+    assert stats["processed"] == 400
+    assert len(_indexed_ids(indexer)) == 600
+
+
+def test_resume_async_source(indexer):
+    with pytest.raises(Interrupted):
+        asyncio.run(indexer.index_products_async(
+            _aproducts(600, fail_after=250), batch_size=100, run_id="async"
+        ))
+    run = indexer.journal.get_run("async")
+    assert run.cursor == 200
+    
+    stats = indexer.resume("async", products=_aproducts(600))
+    
+    assert stats["run_status"] == "completed"
+    assert stats["errors"] == 0
+    assert stats["processed"] == 400
+    assert len(_indexed_ids(indexer)) == 600
+    assert indexer.journal.get_run("async").cursor == 600
+
+
+def test_resume_rejects_changed_source(indexer):
+    with pytest.raises(Interrupted):
+        indexer.index_products(_products(300, fail_after=150), batch_size=100, run_id="changed")
+    
+    shifted = list(generate_catalog(300))[1:]
+    with pytest.raises(ValueError, match="Source does not match"):
+        indexer.resume("changed", products=shifted)
+
+
+def _checkpoint(indexer, **kwargs):
+    run = indexer.journal.start_run(indexer.table_name, "products", 10)
+    return run, RunCheckpoint(indexer.journal, run, **kwargs)
+
+
+def test_checkpoint_drops_batches_behind_a_failed_one(indexer):
+    run, checkpoint = _checkpoint(indexer)
+    for batch_no in range(100):
+        checkpoint.register(batch_no, (batch_no + 1) * 10, f"p{batch_no}")
+    checkpoint.complete(0, {"processed": 10})
+    checkpoint.complete(1, {"processed": 10}, ok=False)
+    for batch_no in range(2, 100):
+        checkpoint.complete(batch_no, {"processed": 10})
+    
+    assert checkpoint.pending == 0
+    assert run.cursor == 10
+    assert checkpoint.finish() == "incomplete"
+
+
+def test_checkpoint_gives_up_behind_a_stuck_batch(indexer):
+    run, checkpoint = _checkpoint(indexer, max_pending=8)
+    with pytest.raises(RuntimeError, match="waiting for batch 0"):
+        for batch_no in range(20):
+            checkpoint.register(batch_no, (batch_no + 1) * 10, f"p{batch_no}")
+            if batch_no > 0:
+                checkpoint.complete(batch_no, {"processed": 10})
+    assert checkpoint.pending == 8
+    assert run.cursor == 0
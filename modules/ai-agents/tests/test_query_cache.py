@@ -0,0 +1,91 @@
+"""In-process query embedding cache"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from agno.knowledge.embedder.base import Embedder
+
+from shared import query_cache
+from shared.query_cache import QueryCachingEmbedder, QueryEmbeddingCache
+
+
+@dataclass
+class CountingEmbedder(Embedder):
+    """Records every single-text and batch call it receives"""
+    
+    id: str = "counting"
+    dimensions: Optional[int] = 2
+    calls: List[List[str]] = field(default_factory=list)
+    
+    def get_embedding(self, text: str) -> List[float]:
+        self.calls.append([text])
+        return [float(len(text)), 1.0]
+    
+    def get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts], [None] * len(texts)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_hits_are_counted_and_queries_normalised():
+    cache = QueryEmbeddingCache(max_entries=10)
+    cache.put("m", "Panou LED  60x60", [1.0])
+    
+    assert cache.get("m", "panou led 60x60") == [1.0]
+    assert cache.get("other-model", "panou led 60x60") is None
+    assert cache.get("m", "banda led") is None
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 2,
+        "hit_rate": 1 / 3,
+        "entries": 1,
+        "max_entries": 10,
+        "ttl_seconds": 3600.0,
+    }
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(query_cache.time, "monotonic", clock)
+    cache = QueryEmbeddingCache(ttl_seconds=60)
+    cache.put("m", "spot", [1.0])
+    
+    clock.now += 59
+    assert cache.get("m", "spot") == [1.0]
+    clock.now += 2
+    assert cache.get("m", "spot") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.put("m", "a", [1.0])
+    cache.put("m", "b", [2.0])
+    cache.get("m", "a")
+    
+    cache.put("m", "c", [3.0])
+    
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0]
+    assert cache.get("m", "c") == [3.0]
+
+
+def test_embed_queries_batches_the_misses_once():
+    embedder = CountingEmbedder()
+    cached = QueryCachingEmbedder(embedder=embedder, cache=QueryEmbeddingCache())
+    cached.get_embedding("spot")
+    
+    vectors = cached.embed_queries(["bec", "spot", "Bec ", "panou"])
+    
+    assert vectors == [[3.0, 1.0], [4.0, 1.0], [3.0, 1.0], [5.0, 1.0]]
+    assert embedder.calls == [["spot"], ["bec", "panou"]]
+    assert cached.embed_queries(["panou", "bec"]) == [[5.0, 1.0], [3.0, 1.0]]
+    assert len(embedder.calls) == 2
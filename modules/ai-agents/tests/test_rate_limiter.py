@@ -0,0 +1,192 @@
+"""Provider rate limiting of embedding and chat calls"""
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import List, Optional
+
+import httpx
+import openai
+import pytest
+from agno.agent import Agent
+from agno.exceptions import EmbeddingError, ModelRateLimitError
+from agno.knowledge.embedder.base import Embedder, raise_embedding_error
+
+from b2b_chatbot.agent import RateLimitedOpenAIChat
+from shared.hashing_embedder import HashingEmbedder
+from shared.rate_limiter import (
+    ModelRateLimiter,
+    RateLimitedEmbedder,
+    error_headers,
+    get_rate_limiter,
+    is_rate_limit_error,
+)
+
+
+def _too_many_requests(headers=None) -> httpx.Response:
+    return httpx.Response(
+        429,
+        json={"error": {"message": "Rate limit reached", "type": "requests"}},
+        headers=headers or {},
+        request=httpx.Request("POST", "https://api.openai.com/v1/embeddings"),
+    )
+
+
+def _embedding_error(response: httpx.Response) -> EmbeddingError:
+    """A 429 wrapped the way agno embedders re-raise provider errors"""
+    error = openai.RateLimitError("Rate limit reached", response=response, body=None)
+    try:
+        raise_embedding_error(error, model_id="text-embedding-3-small", provider="OpenAI")
+    except EmbeddingError as e:
+        return e
+
+
+@dataclass
+class PerTextEmbedder(Embedder):
+    """Embedder without a batch endpoint: one provider call per text"""
+    
+    dimensions: Optional[int] = 16
+    
+    def get_embedding(self, text: str) -> List[float]:
+        return HashingEmbedder(dimensions=self.dimensions).get_embedding(text)
+
+
+def test_wrapped_provider_errors_are_recognised():
+    wrapped = _embedding_error(_too_many_requests({"retry-after": "3"}))
+    
+    assert wrapped.provider_status_code == 429
+    assert is_rate_limit_error(wrapped)
+    assert error_headers(wrapped)["retry-after"] == "3"
+    assert is_rate_limit_error(ModelRateLimitError("Too many requests"))
+    assert is_rate_limit_error(EmbeddingError("limited", status_code=429))
+    # agno reports 502 when the provider gave no status code
+    assert not is_rate_limit_error(EmbeddingError("connection reset"))
+
+
+def test_rate_limited_requests_are_retried_after_backoff(openai_provider):
+    openai_provider.failures.append(_too_many_requests({"retry-after-ms": "10"}))
+    limiter = ModelRateLimiter("test", rpm=1000, tpm=1_000_000)
+    embedder = RateLimitedEmbedder(
+        embedder=openai_provider.embedder(dimensions=8), limiter=limiter
+    )
+    
+    vector = embedder.get_embedding("becuri LED E27")
+    
+    assert len(vector) == 8
+    assert len(openai_provider.requests) == 2
+    assert limiter.counters["rate_limited"] == 1
+
+
+def test_response_headers_resync_the_buckets(openai_provider):
+    openai_provider.headers = {
+        "x-ratelimit-remaining-requests": "7",
+        "x-ratelimit-remaining-tokens": "500",
+    }
+    limiter = ModelRateLimiter("test", rpm=1000, tpm=1_000_000)
+    embedder = RateLimitedEmbedder(embedder=openai_provider.embedder(), limiter=limiter)
+    
+    asyncio.run(embedder.async_get_embeddings_batch_and_usage(["a", "b"]))
+    
+    assert limiter.requests.level <= 7
+    assert limiter.tokens.level <= 500
+
+
+def test_each_provider_request_takes_a_slot(openai_provider):
+    limiter = ModelRateLimiter("test", rpm=1000, tpm=1_000_000)
+    batched = RateLimitedEmbedder(
+        embedder=openai_provider.embedder(batch_size=10), limiter=limiter
+    )
+    batched.get_embeddings_batch_and_usage([f"text {i}" for i in range(25)])
+    assert limiter.counters["requests"] == len(openai_provider.requests) == 3
+    
+    limiter = ModelRateLimiter("test", rpm=1000, tpm=1_000_000)
+    per_text = RateLimitedEmbedder(embedder=PerTextEmbedder(), limiter=limiter)
+    vectors, _ = per_text.get_embeddings_batch_and_usage([f"text {i}" for i in range(5)])
+    assert len(vectors) == 5
+    assert limiter.counters["requests"] == 5
+
+
+@pytest.mark.parametrize("actual", [200, 5000])
+def test_record_usage_trues_up_the_token_estimate(actual):
+    limiter = ModelRateLimiter("chat", rpm=100, tpm=10_000)
+    limiter.acquire(1000)
+    
+    limiter.record_usage(1000, actual)
+    
+    assert limiter.counters["tokens"] == actual
+    assert limiter.tokens.level == pytest.approx(10_000 - actual, abs=5)
+
+
+class FakeChat:
+    """Chat completions endpoint that asks for one tool call, then answers"""
+    
+    def __init__(self):
+        self.requests = []
+    
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        if any(message["role"] == "tool" for message in body["messages"]):
+            message = {"role": "assistant", "content": "3 in stock"}
+        else:
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": "call_1",
+                "type": "function",
+                "function": {"name": "stock_level", "arguments": '{"sku": "LED-1"}'},
+            }]}
+        usage = {"prompt_tokens": 40, "completion_tokens": 10, "total_tokens": 50}
+        chunk = {"id": "c", "object": "chat.completion", "created": 0, "model": body["model"]}
+        if not body.get("stream"):
+            return httpx.Response(200, json={
+                **chunk,
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+        delta = dict(message, tool_calls=[
+            {"index": 0, **call} for call in message.get("tool_calls", [])
+        ] or None)
+        events = [
+            {**chunk, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]},
+            {**chunk, "choices": [], "usage": usage},
+        ]
+        text = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        return httpx.Response(200, text=text, headers={"content-type": "text/event-stream"})
+    
+    def model(self) -> RateLimitedOpenAIChat:
+        transport = httpx.MockTransport(self.handle)
+        return RateLimitedOpenAIChat(
+            id="gpt-4o-mini",
+            client=openai.OpenAI(
+                api_key="test", max_retries=0, http_client=httpx.Client(transport=transport)
+            ),
+            async_client=openai.AsyncOpenAI(
+                api_key="test", max_retries=0, http_client=httpx.AsyncClient(transport=transport)
+            ),
+        )
+
+
+def stock_level(sku: str) -> str:
+    """Units in stock for a SKU"""
+    return "3"
+
+
+@pytest.mark.parametrize("mode", ["sync", "stream", "async"])
+def test_every_model_request_of_a_run_takes_a_slot(config, monkeypatch, mode):
+    monkeypatch.setattr(config, "rate_limit_enabled", True)
+    chat = FakeChat()
+    agent = Agent(model=chat.model(), tools=[stock_level], telemetry=False)
+    
+    if mode == "sync":
+        content = agent.run("Is LED-1 in stock?").content
+    elif mode == "stream":
+        content = "".join(
+            event.content or "" for event in agent.run("Is LED-1 in stock?", stream=True)
+        )
+    else:
+        content = asyncio.run(agent.arun("Is LED-1 in stock?")).content
+    
+    assert content == "3 in stock"
+    limiter = get_rate_limiter("gpt-4o-mini")
+    # The tool call round trip is a second request, and both were trued
+    # up to the usage the provider reported
+    assert limiter.counters["requests"] == len(chat.requests) == 2
+    assert limiter.counters["tokens"] == 100
@@ -0,0 +1,200 @@
+"""Product search"""
+import pytest
+
+from product_rag import ProductFilters, ProductIndexer, generate_catalog, generate_queries
+from product_rag.fields import VECTOR_COLUMNS, classify_query, field_weights
+from product_rag.search import _aggregate_chunks
+
+
+@pytest.fixture
+def catalog(indexer):
+    products = list(generate_catalog(300))
+    indexer.index_products(products, batch_size=100)
+    return products
+
+
+def test_hybrid_search_on_a_new_table(indexer):
+    assert indexer.search_type == "hybrid"
+    assert [index.columns for index in indexer.table.list_indices()] == [["text"]]
+    assert indexer.search("LED panel", min_score=0.0) == []
+
+
+def test_hybrid_search_without_text_index_falls_back_to_vector(config, monkeypatch):
+    monkeypatch.setattr(config, "product_search_type", "vector")
+    ProductIndexer().initialize()
+    monkeypatch.setattr(config, "product_search_type", "hybrid")
+    hybrid = ProductIndexer()
+    hybrid.initialize()
+    hybrid.search_type = "vector"
+    hybrid.index_products(generate_catalog(20), batch_size=20)
+    
+    results = hybrid.search("LED panel", limit=5, min_score=0.0, search_type="hybrid")
+    
+    assert len(results) == 5
+
+
+def test_sku_search_finds_the_product(indexer, catalog):
+    product = catalog[42]
+    
+    results = indexer.search(product.sku, limit=5, min_score=0.0)
+    
+    assert results[0]["metadata"]["product_id"] == product.id
+
+
+def test_filters_are_applied(indexer, catalog):
+    filters = ProductFilters(category="Becuri LED", price_max=20.0, in_stock_only=True)
+    
+    results = indexer.search("LED bulb E27", limit=20, min_score=0.0, filters=filters)
+    
+    expected = {
+        p.id for p in catalog
+        if p.category == "Becuri LED" and p.b2b_price is not None
+        and p.b2b_price <= 20.0 and p.stock > 0
+    }
+    assert results
+    assert {r["metadata"]["product_id"] for r in results} <= expected
+    assert len(results) == min(20, len(expected))
+
+
+def test_search_many_embeds_once_and_keeps_query_order(indexer, catalog, monkeypatch):
+    queries = [catalog[5].name, catalog[42].sku, "LED bulb E27", catalog[5].name]
+    expected = [indexer.search(query, limit=5, min_score=0.0) for query in queries]
+    indexer.embedder.cache.clear()
+    base = indexer.embedder.embedder
+    batches = []
+    embed = base.get_embeddings_batch_and_usage
+    
+    def spy(texts):
+        batches.append(list(texts))
+        return embed(texts)
+    
+    monkeypatch.setattr(base, "get_embeddings_batch_and_usage", spy)
+    monkeypatch.setattr(base, "get_embedding", None)
+    
+    results = indexer.search_many(queries, limit=5, min_score=0.0, max_workers=4)
+    
+    assert results == expected
+    # One request for the distinct queries; no per-query embedding calls
+    assert batches == [queries[:3]]
+
+
+@pytest.mark.parametrize("aggregation", ["max", "top_m"])
+def test_chunked_products_are_returned_once(config, monkeypatch, aggregation):
+    monkeypatch.setattr(config, "product_chunk_tokens", 64)
+    monkeypatch.setattr(config, "product_chunk_aggregation", aggregation)
+    indexer = ProductIndexer()
+    indexer.initialize()
+    products = list(generate_catalog(60, long_share=1.0))
+    indexer.index_products(products, batch_size=30)
+    assert indexer.table.count_rows() > 2 * len(products)
+    
+    results = indexer.search(products[7].sku, limit=10, min_score=-1.0)
+    
+    ids = [result["metadata"]["product_id"] for result in results]
+    assert len(ids) == 10
+    assert len(set(ids)) == 10
+    assert ids[0] == products[7].id
+
+
+def test_aggregate_chunks_scores_by_best_or_top_m_chunks():
+    hits = [
+        ({"product_id": "a", "id": "a#1"}, 0.9),
+        ({"product_id": "b", "id": "b"}, 0.8),
+        ({"product_id": "b", "id": "b#2"}, 0.7),
+        ({"product_id": "a", "id": "a"}, 0.1),
+        ({"product_id": "b", "id": "b#1"}, 0.05),
+    ]
+    
+    assert [(row["id"], score) for row, score in _aggregate_chunks(hits)] == [
+        ("a#1", 0.9), ("b", 0.8),
+    ]
+    assert [
+        (row["id"], score) for row, score in _aggregate_chunks(hits, mode="top_m", top_m=2)
+    ] == [("b", pytest.approx(1.5)), ("a#1", pytest.approx(1.0))]
+
+
+def _field_weights(config, query):
+    weights = field_weights(classify_query(query), config.product_field_weights)
+    return {field: w for field, w in weights.items() if w > 0 and field in VECTOR_COLUMNS}
+
+
+def _exact_scores(indexer, query, results, weights, full=False):
+    ids = [result["metadata"]["product_id"] for result in results]
+    scores = indexer._field_scores(indexer.embedder.get_embedding(query), ids, list(weights), full=full)
+    total = sum(weights.values())
+    return [
+        sum(weight * scores[product_id][field] for field, weight in weights.items()) / total
+        for product_id in ids
+    ]
+
+
+def test_fused_scores_match_exact_field_scores(config, monkeypatch):
+    monkeypatch.setattr(config, "product_chunk_tokens", 0)
+    indexer = ProductIndexer(search_type="vector")
+    indexer.initialize()
+    indexer.index_products(generate_catalog(200), batch_size=100)
+    query = "Panou LED 60x60 40W alb neutru"
+    
+    results = indexer.search(query, limit=10, min_score=-1.0)
+    
+    assert len(results) == 10
+    expected = _exact_scores(indexer, query, results, _field_weights(config, query))
+    assert [r["score"] for r in results] == pytest.approx(expected, abs=1e-4)
+
+
+# 64 sign bits of a 64-d hashing embedding keep far less than 1536 bits would
+@pytest.mark.parametrize("quantization, min_recall", [("int8", 0.9), ("binary", 0.5)])
+def test_quantized_search(config, monkeypatch, quantization, min_recall):
+    monkeypatch.setattr(config, "vector_quantization", quantization)
+    indexer = ProductIndexer(search_type="vector")
+    indexer.initialize()
+    catalog = list(generate_catalog(600))
+    indexer.index_products(catalog, batch_size=200)
+    built = indexer.ensure_vector_index(force=True)
+    assert {summary["action"] for summary in built.values()} == {"built"}
+    
+    product = catalog[7]
+    # Probing every IVF partition makes the first pass exhaustive, so the
+    # lookup does not depend on how k-means split the 600 vectors
+    results = indexer.search(product.name, limit=5, min_score=-1.0, nprobes=64)
+    recall = indexer.measure_recall(generate_queries(20, len(catalog)), limit=10)
+    
+    assert product.id in {r["metadata"]["product_id"] for r in results}
+    assert recall["quantization"] == quantization
+    assert recall["first_pass_bytes_per_vector"] < recall["full_bytes_per_vector"]
+    assert recall["recall"] >= min_recall
+
+
+def test_binary_quantization_of_dimensions_not_a_multiple_of_8(config, monkeypatch):
+    monkeypatch.setattr(config, "vector_quantization", "binary")
+    monkeypatch.setattr(config, "product_embedding_dimensions", 60)
+    indexer = ProductIndexer(search_type="vector")
+    indexer.initialize()
+    assert indexer.dimensions == 60
+    catalog = list(generate_catalog(50))
+    
+    stats = indexer.index_products(catalog)
+    
+    assert (stats["embedded"], stats["errors"]) == (50, 0)
+    product = catalog[5]
+    results = indexer.search(product.name, limit=5, min_score=-1.0)
+    assert product.id in {r["metadata"]["product_id"] for r in results}
+
+
+def test_matryoshka_rerank_scores_with_full_vectors(config, monkeypatch):
+    monkeypatch.setattr(config, "product_embedding_dimensions", 16)
+    monkeypatch.setattr(config, "product_matryoshka_rerank", True)
+    indexer = ProductIndexer(search_type="vector")
+    indexer.initialize()
+    assert (indexer.dimensions, indexer.matryoshka_rerank) == (16, True)
+    catalog = list(generate_catalog(200))
+    indexer.index_products(catalog, batch_size=100)
+    product = catalog[3]
+    
+    results = indexer.search(product.name, limit=5, min_score=-1.0)
+    
+    assert results[0]["metadata"]["product_id"] == product.id
+    expected = _exact_scores(
+        indexer, product.name, results, _field_weights(config, product.name), full=True
+    )
+    assert [r["score"] for r in results] == pytest.approx(expected, abs=1e-4)
@@ -0,0 +1,71 @@
+"""Blue/green catalog rebuilds behind a table alias"""
+import lancedb
+
+from product_rag import ProductIndexer, generate_catalog
+from shared import table_alias
+from shared.table_alias import ALIAS_TABLE, list_tables, resolve_table, set_alias
+
+
+def test_set_alias_round_trip(config):
+    uri = config.lancedb_uri
+    assert resolve_table(uri, "catalog") == "catalog"
+    
+    set_alias(uri, "catalog", "catalog__v1")
+    set_alias(uri, "catalog", "catalog__v2")
+    set_alias(uri, "other", "other__v1")
+    assert resolve_table(uri, "catalog") == "catalog__v2"
+    assert resolve_table(uri, "other") == "other__v1"
+    
+    set_alias(uri, "catalog", None)
+    assert resolve_table(uri, "catalog") == "catalog"
+    assert resolve_table(uri, "other") == "other__v1"
+
+
+def test_swaps_by_other_processes_are_seen_after_the_check_interval(config, monkeypatch):
+    uri = config.lancedb_uri
+    set_alias(uri, "catalog", "catalog__v1")
+    # Another process swaps the alias through its own connection
+    lancedb.connect(uri).open_table(ALIAS_TABLE).update(
+        where="table_name = 'catalog'", values={"physical_name": "catalog__v2"}
+    )
+    assert resolve_table(uri, "catalog") == "catalog__v1"
+    
+    monkeypatch.setattr(table_alias, "ALIAS_CHECK_SECONDS", 0.0)
+    assert resolve_table(uri, "catalog") == "catalog__v2"
+
+
+def test_rebuild_swaps_the_alias_and_readers_follow(indexer):
+    products = list(generate_catalog(30))
+    indexer.index_products(products)
+    reader = ProductIndexer()
+    reader.initialize()
+    
+    first = indexer.rebuild(products, keep_previous=1)
+    
+    assert first["swapped"]
+    assert resolve_table(indexer.config.lancedb_uri, indexer.table_name) == first["table"]
+    assert indexer.physical_table_name == first["table"]
+    assert first["dropped_tables"] == []
+    assert reader.refresh_table()
+    assert reader.physical_table_name == first["table"]
+    assert reader.search(products[0].name, limit=5, min_score=0.0)
+    
+    second = indexer.rebuild(products, keep_previous=1)
+    
+    assert second["swapped"]
+    assert second["previous_table"] == first["table"]
+    # The original table is the oldest version and is dropped first
+    assert second["dropped_tables"] == [indexer.table_name]
+    assert sorted(list_tables(indexer.db)) == sorted([ALIAS_TABLE, first["table"], second["table"]])
+
+
+def test_failed_validation_keeps_the_live_table(indexer):
+    products = list(generate_catalog(30))
+    indexer.index_products(products)
+    
+    result = indexer.rebuild(products[:10])
+    
+    assert not result["swapped"]
+    assert result["validation"]["row_ratio"] < 0.95
+    assert resolve_table(indexer.config.lancedb_uri, indexer.table_name) == indexer.table_name
+    assert result["table"] not in list_tables(indexer.db)
@@ -0,0 +1,52 @@
+"""Opening product tables created with another layout"""
+import lancedb
+import pyarrow as pa
+import pytest
+
+from product_rag import ProductIndexer, generate_catalog
+
+
+def _reopen(config, **overrides):
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    indexer = ProductIndexer()
+    indexer.initialize()
+    return indexer
+
+
+def test_changed_dimensions_point_to_rebuild(indexer, config, monkeypatch):
+    indexer.index_products(generate_catalog(50), batch_size=50)
+    monkeypatch.setattr(config, "product_embedding_dimensions", 32)
+    
+    upgraded = _reopen(config)
+    
+    assert "expected fixed_size_list<item: float>[32]" in upgraded.schema_mismatch
+    with pytest.raises(RuntimeError, match="rebuild"):
+        upgraded.search("LED panel", min_score=0.0)
+    with pytest.raises(RuntimeError, match="rebuild"):
+        upgraded.index_products(generate_catalog(5))
+    
+    result = upgraded.rebuild(generate_catalog(50), batch_size=50)
+    
+    assert result["swapped"]
+    assert upgraded.schema_mismatch is None
+    assert upgraded.search("LED panel", min_score=0.0)
+
+
+def test_baseline_table_is_opened_and_rebuilt(config):
+    db_schema = pa.schema([
+        pa.field("vector", pa.list_(pa.float32(), 1536)),
+        pa.field("id", pa.string()),
+        pa.field("payload", pa.string()),
+    ])
+    lancedb.connect(config.lancedb_uri).create_table("product_catalog", schema=db_schema)
+    
+    indexer = ProductIndexer()
+    indexer.initialize()
+    
+    assert "missing columns" in indexer.schema_mismatch
+    with pytest.raises(RuntimeError, match="rebuild"):
+        indexer.delete_products(skus=["LED-1"])
+    result = indexer.rebuild(generate_catalog(20), batch_size=20)
+    assert result["swapped"]
+    assert indexer.search("LED bulb", min_score=0.0)
@@ -0,0 +1,56 @@
+"""Idempotent upserts and deletes in the product index"""
+from collections import Counter
+
+from product_rag import generate_catalog
+
+
+def _product_rows(indexer):
+    rows = indexer.table.search().select(["id", "product_id", "sku"]).limit(100_000).to_list()
+    return Counter(row["product_id"] for row in rows), {row["sku"] for row in rows}
+
+
+def test_reindexing_changed_products_replaces_their_rows(indexer, config, monkeypatch):
+    monkeypatch.setattr(config, "product_chunk_tokens", 64)
+    products = list(generate_catalog(20, long_share=0.5))
+    indexer.index_products(products, batch_size=8)
+    chunks_before, _ = _product_rows(indexer)
+    assert max(chunks_before.values()) > 1
+    
+    shortened = [
+        product.model_copy(update={"description": f"Short description {i}"})
+        for i, product in enumerate(products)
+    ]
+    stats = indexer.index_products(shortened, batch_size=8)
+    
+    assert stats["embedded"] == 20
+    chunks_after, _ = _product_rows(indexer)
+    assert chunks_after == Counter({product.id: 1 for product in products})
+
+
+def test_reindexing_the_same_batch_twice_does_not_duplicate_rows(indexer):
+    products = list(generate_catalog(30))
+    indexer.index_products(products, batch_size=10)
+    rows_before = indexer.table.count_rows()
+    
+    indexer.index_products(products[5:25], batch_size=10)
+    
+    assert indexer.table.count_rows() == rows_before
+
+
+def test_delete_products_by_sku_and_id(indexer, config, monkeypatch):
+    monkeypatch.setattr(config, "product_chunk_tokens", 64)
+    products = list(generate_catalog(10, long_share=0.5))
+    indexer.index_products(products)
+    rows_before = indexer.table.count_rows()
+    chunks, _ = _product_rows(indexer)
+    
+    stats = indexer.delete_products(
+        product_ids=[products[0].id], skus=[products[1].sku, "MISSING-SKU"]
+    )
+    
+    assert stats["requested"] == 3
+    assert stats["deleted_rows"] == chunks[products[0].id] + chunks[products[1].id]
+    assert indexer.table.count_rows() == rows_before - stats["deleted_rows"]
+    remaining, skus = _product_rows(indexer)
+    assert set(remaining) == {product.id for product in products[2:]}
+    assert products[1].sku not in skus
@@ -0,0 +1,60 @@
+"""Price and stock updates without re-embedding"""
+import asyncio
+
+import pytest
+
+from product_rag import generate_catalog
+
+
+def _rows(indexer):
+    rows = indexer.table.to_arrow().to_pylist()
+    return {row["id"]: row for row in rows}
+
+
+def _repriced(products):
+    return [
+        product.model_copy(update={"b2b_price": product.b2b_price + 1, "stock": product.stock + 5})
+        if i % 2 == 0 else product
+        for i, product in enumerate(products)
+    ]
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_reindexing_moved_prices_updates_columns_only(indexer, run_async):
+    products = list(generate_catalog(40))
+    indexer.index_products(products, batch_size=10)
+    before = _rows(indexer)
+    
+    repriced = _repriced(products)
+    if run_async:
+        stats = asyncio.run(indexer.index_products_async(repriced, batch_size=10))
+    else:
+        stats = indexer.index_products(repriced, batch_size=10)
+    
+    assert stats["updated"] == 20
+    assert stats["embedded"] == 0
+    after = _rows(indexer)
+    assert after.keys() == before.keys()
+    expected = {product.id: product for product in repriced}
+    for row_id, row in after.items():
+        product = expected[row["product_id"]]
+        assert (row["b2b_price"], row["stock"]) == (product.b2b_price, product.stock)
+        assert row["vector"] == before[row_id]["vector"]
+        assert row["text"] == before[row_id]["text"]
+
+
+def test_update_prices_and_stock_by_sku(indexer):
+    products = list(generate_catalog(5))
+    indexer.index_products(products)
+    
+    stats = indexer.update_prices_and_stock([
+        {"sku": products[0].sku, "stock": 0},
+        {"sku": products[1].sku, "b2b_price": 9.5},
+        {"sku": "MISSING-SKU", "stock": 3},
+    ])
+    
+    assert (stats["updated"], stats["not_found"]) == (2, 1)
+    rows = {row["sku"]: row for row in _rows(indexer).values()}
+    assert rows[products[0].sku]["stock"] == 0
+    assert rows[products[0].sku]["b2b_price"] == products[0].b2b_price
+    assert rows[products[1].sku]["b2b_price"] == 9.5